@@ -0,0 +1,7 @@
+"""
+HTTP API package initialization file for MedClarify application.
+"""
+
+from .server import create_app
+
+__all__ = ["create_app"]
@@ -0,0 +1,100 @@
+import time
+import asyncio
+import logging
+from typing import Dict
+
+logger = logging.getLogger(__name__)
+
+class OverloadedError(Exception):
+    """Raised when a request can't be admitted; maps to HTTP 429"""
+    def __init__(self, retry_after: float):
+        super().__init__("Server is overloaded, retry later")
+        self.retry_after = retry_after
+
+class AdmissionController:
+    """Bound the work running at once and the requests waiting for a slot"""
+    def __init__(self, max_concurrency: int, max_queue: int, queue_timeout: float):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        # Requests take their slots one at a time in arrival order, so a weighted request
+        # can't be starved and two can't each hold part of what the other needs
+        self._turn = asyncio.Lock()
+        self.running = 0
+        self.waiting = 0
+        self.rejected = 0
+
+    def weighted(self, weight: int) -> "Admission":
+        """Admit a request that runs up to weight units of work at once (e.g. a batch) as that many slots"""
+        return Admission(self, max(1, min(weight, self.max_concurrency)))
+
+    async def __aenter__(self):
+        await self.acquire(1)
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self.release(1)
+
+    async def acquire(self, weight: int):
+        """Take weight slots, waiting at most queue_timeout; raises OverloadedError"""
+        # Refuse at once when the queue is full instead of letting latency grow without bound
+        if self._semaphore.locked() and self.waiting >= self.max_queue:
+            self.rejected += 1
+            raise OverloadedError(self.queue_timeout)
+
+        self.waiting += 1
+        started = time.monotonic()
+        acquired = 0
+
+        async def take():
+            nonlocal acquired
+            async with self._turn:
+                while acquired < weight:
+                    await self._semaphore.acquire()
+                    acquired += 1
+
+        try:
+            await asyncio.wait_for(take(), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            self._release_slots(acquired)
+            self.rejected += 1
+            logger.warning(f"Request waited {time.monotonic() - started:.1f}s for {weight} slot(s), rejecting")
+            raise OverloadedError(self.queue_timeout)
+        except BaseException:
+            self._release_slots(acquired)
+            raise
+        finally:
+            self.waiting -= 1
+        self.running += weight
+
+    def release(self, weight: int):
+        self.running -= weight
+        self._release_slots(weight)
+
+    def _release_slots(self, count: int):
+        for _ in range(count):
+            self._semaphore.release()
+
+    def stats(self) -> Dict:
+        """Slots in use, waiting and rejected request counters"""
+        return {
+            "running": self.running,
+            "waiting": self.waiting,
+            "rejected": self.rejected,
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue
+        }
+
+class Admission:
+    """Context manager holding several slots of an AdmissionController"""
+    def __init__(self, controller: AdmissionController, weight: int):
+        self.controller = controller
+        self.weight = weight
+
+    async def __aenter__(self):
+        await self.controller.acquire(self.weight)
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self.controller.release(self.weight)
@@ -0,0 +1,207 @@
+"""
+Headless JSON API for MedClarify, served next to the Streamlit UI.
+
+Run with:
+    uvicorn api.server:create_app --factory --host 0.0.0.0 --port 8000
+
+Each worker process holds its own warm service instances, including in-memory copies of the
+on-disk indexes it writes: the local vector index (VECTOR_BACKEND=local) and the BM25 index
+(HYBRID_SEARCH=true). Those files are locked to the first process that opens them, so with
+either enabled run a single worker; further workers (or a concurrent ingest.py) never become
+ready. Several workers (--workers N) need VECTOR_BACKEND=pinecone and HYBRID_SEARCH=false.
+"""
+
+import io
+import time
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from typing import Dict, List, Optional
+from fastapi import FastAPI, File, HTTPException, Request, UploadFile
+from fastapi.responses import JSONResponse, PlainTextResponse
+from pydantic import BaseModel, Field
+from config.settings import Config
+from services.registry import get_registry
+from services.telemetry import get_telemetry
+from utils.logging_setup import setup_logger, get_default_log_path
+from .admission import AdmissionController, OverloadedError
+
+logger = logging.getLogger(__name__)
+
+# Room for the multipart boundaries and headers around an uploaded report
+MULTIPART_OVERHEAD = 64 * 1024
+
+class VerifyRequest(BaseModel):
+    claim: str = Field(..., min_length=1)
+    top_k: int = Field(5, ge=1, le=20)
+
+class BatchVerifyRequest(BaseModel):
+    claims: List[str] = Field(..., min_length=1)
+    top_k: int = Field(5, ge=1, le=20)
+
+def _evidence(results: List[Dict]) -> List[Dict]:
+    return [
+        {
+            "id": result.get("id"),
+            "claim": result.get("claim", ""),
+            "evidence_level": result.get("evidence_level", ""),
+            "explanation": result.get("explanation", ""),
+            "relevance_score": result.get("relevance_score"),
+            "sources": result.get("sources", [])
+        }
+        for result in results
+    ]
+
+class ServiceState:
+    """Warm services and cached index stats shared by every request of a worker"""
+    def __init__(self):
+        self.registry = get_registry()
+        self.ready = False
+        self.error: Optional[str] = None
+        self.admission = AdmissionController(Config.API_MAX_CONCURRENCY, Config.API_MAX_QUEUE, Config.API_QUEUE_TIMEOUT)
+        self._index_stats: Dict = {}
+        self._index_stats_at = 0.0
+        self._stats_lock = asyncio.Lock()
+
+    async def start(self):
+        """Build and warm every service off the event loop"""
+        try:
+            await asyncio.to_thread(self.registry.get_all)
+            self.ready = True
+            logger.info("API services are ready")
+        except Exception as e:
+            self.error = str(e)
+            logger.error(f"Failed to start API services: {str(e)}")
+
+    def service(self, name: str):
+        if self.error:
+            raise HTTPException(status_code=503, detail=f"Services failed to start: {self.error}")
+        if not self.ready:
+            raise HTTPException(status_code=503, detail="Services are still starting")
+        return self.registry.get(name)
+
+    async def index_stats(self) -> Dict:
+        """Index size and backend, refreshed at most every API_STATS_TTL seconds"""
+        async with self._stats_lock:
+            if time.monotonic() - self._index_stats_at > Config.API_STATS_TTL:
+                vector_db = self.service("vector_db")
+                self._index_stats = {
+                    "backend": vector_db.backend,
+                    "claims": await asyncio.to_thread(vector_db.count),
+                    "revision": vector_db.revision
+                }
+                self._index_stats_at = time.monotonic()
+            return self._index_stats
+
+def create_app() -> FastAPI:
+    """Build the FastAPI application"""
+    setup_logger("services", level=logging.INFO, log_file=get_default_log_path())
+    setup_logger("api", level=logging.INFO, log_file=get_default_log_path())
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        state = ServiceState()
+        app.state.services = state
+        # Warm up in the background so liveness probes answer during start-up
+        startup = asyncio.create_task(state.start())
+        yield
+        startup.cancel()
+        await asyncio.to_thread(state.registry.shutdown)
+
+    app = FastAPI(title="MedClarify API", lifespan=lifespan)
+
+    @app.middleware("http")
+    async def limit_upload(request: Request, call_next):
+        """Refuse oversized reports from their Content-Length, before the body is read"""
+        if request.url.path == "/reports/analyze":
+            length = request.headers.get("content-length", "")
+            # A chunked body would be spooled in full before the upload could be measured
+            if not length.isdigit():
+                return JSONResponse(status_code=411, content={"detail": "Content-Length is required"})
+            if int(length) > Config.API_MAX_UPLOAD_BYTES + MULTIPART_OVERHEAD:
+                return JSONResponse(status_code=413, content={"detail": "Report is too large"})
+        return await call_next(request)
+
+    @app.exception_handler(OverloadedError)
+    async def overloaded(request: Request, exc: OverloadedError):
+        return JSONResponse(
+            status_code=429,
+            content={"detail": str(exc)},
+            headers={"Retry-After": str(int(exc.retry_after) or 1)}
+        )
+
+    @app.get("/healthz")
+    async def healthz():
+        """Liveness: the process is serving requests"""
+        return {"status": "ok"}
+
+    @app.get("/readyz")
+    async def readyz(request: Request):
+        """Readiness from in-process state only, so probes never reach the vector store"""
+        state: ServiceState = request.app.state.services
+        if not state.ready:
+            return JSONResponse(status_code=503, content={"status": "starting", "error": state.error})
+        return {"status": "ready", "admission": state.admission.stats()}
+
+    @app.post("/verify")
+    async def verify(body: VerifyRequest, request: Request):
+        state: ServiceState = request.app.state.services
+        assistant = state.service("assistant")
+        async with state.admission:
+            response, results, new_content_added = await assistant.verify_claim_async(body.claim, top_k=body.top_k)
+        return {"claim": body.claim, "verdict": response, "evidence": _evidence(results),
+                "new_content_added": bool(new_content_added)}
+
+    @app.post("/verify/batch")
+    async def verify_batch(body: BatchVerifyRequest, request: Request):
+        state: ServiceState = request.app.state.services
+        if len(body.claims) > Config.API_MAX_BATCH:
+            raise HTTPException(status_code=413, detail=f"At most {Config.API_MAX_BATCH} claims per request")
+        assistant = state.service("assistant")
+        results: List[Optional[Dict]] = [None] * len(body.claims)
+        # A batch runs up to BATCH_CONCURRENCY claims at once and is admitted as that many requests
+        async with state.admission.weighted(min(len(body.claims), Config.BATCH_CONCURRENCY)):
+            async for position, (response, evidence, new_content_added) in assistant.verify_claims_async(
+                    body.claims, top_k=body.top_k):
+                results[position] = {"claim": body.claims[position], "verdict": response,
+                                     "evidence": _evidence(evidence), "new_content_added": bool(new_content_added)}
+        return {"results": results}
+
+    @app.post("/reports/analyze")
+    async def analyze_report(request: Request, file: UploadFile = File(...)):
+        state: ServiceState = request.app.state.services
+        analyzer = state.service("report_analyzer")
+        # The multipart overhead allowance can hide a few extra bytes of file
+        pdf_bytes = await file.read(Config.API_MAX_UPLOAD_BYTES + 1)
+        if len(pdf_bytes) > Config.API_MAX_UPLOAD_BYTES:
+            raise HTTPException(status_code=413, detail="Report is too large")
+        async with state.admission:
+            sections = await analyzer.analyze_medical_report_async(io.BytesIO(pdf_bytes))
+        if sections is None:
+            raise HTTPException(status_code=502, detail="The report could not be analyzed")
+        return {"sections": sections}
+
+    @app.get("/metrics", response_class=PlainTextResponse)
+    async def metrics():
+        """Prometheus scrape endpoint"""
+        return PlainTextResponse(get_telemetry().render(), media_type="text/plain; version=0.0.4")
+
+    @app.get("/stats")
+    async def stats(request: Request):
+        state: ServiceState = request.app.state.services
+        vector_db = state.service("vector_db")
+        assistant = state.service("assistant")
+        analyzer = state.service("report_analyzer")
+        return {
+            "index": await state.index_stats(),
+            "embedding": dict(vector_db.embedding_stats),
+            "query_cache": vector_db.query_cache.stats(),
+            "record_cache": vector_db.record_cache.stats(),
+            "verdict_cache": assistant.verdict_cache.stats(),
+            "coalescing": assistant.verdict_flights.stats(),
+            "report_cache": analyzer.cache.stats(),
+            "glossary": analyzer.glossary.stats() if analyzer.glossary else None,
+            "admission": state.admission.stats()
+        }
+
+    return app
@@ -1,10 +1,7 @@
 import streamlit as st
 from config.settings import Config
-from services.vector_db import VectorDatabaseClient
-from services.web_search import WebSearchService
-from services.claim_processor import HealthClaimProcessor
-from services.medical_assistant import MedVerifyAssistant
-from services.report_analyzer import MedicalReportAnalyzer
+from services.registry import get_registry
+from services.telemetry import start_metrics_server
 from ui.sidebar import setup_sidebar
 from ui.claim_verification import show_claim_verification
 from ui.report_analysis import show_report_analysis
@@ -31,19 +28,14 @@ def main():
     # Validate configuration
     config_valid = Config.validate_config()
     
-    # Initialize services if configuration is valid
+    # Fetch the shared services if configuration is valid. They are built once per
+    # process and reused across reruns and sessions.
     services = {}
     if config_valid:
-        # Initialize components
-        services["vector_db"] = VectorDatabaseClient()
-        services["web_search"] = WebSearchService()
-        services["claim_processor"] = HealthClaimProcessor()
-        services["assistant"] = MedVerifyAssistant(
-            services["vector_db"], 
-            services["web_search"], 
-            services["claim_processor"]
-        )
-        services["report_analyzer"] = MedicalReportAnalyzer()
+        services = get_registry().get_all()
+        # Streamlit has no API routes; expose /metrics on its own port when configured
+        if Config.METRICS_PORT:
+            start_metrics_server()
     
     # Setup sidebar
     setup_sidebar(services.get("vector_db"))
@@ -0,0 +1,126 @@
+"""
+Benchmark of article content extraction over saved trusted-domain pages.
+
+Compares the original BeautifulSoup/html.parser extractor (get_text on every
+article/main/div/section tag) against utils.html_extraction.extract_main_text and
+its html.parser fallback (used when lxml is missing or rejects a page).
+
+Usage:
+    python -m benchmarks.html_extraction [PAGES_DIR] [--repeat N]
+    python -m benchmarks.html_extraction PAGES_DIR --fetch URL [URL ...]
+
+PAGES_DIR holds *.html files saved from trusted domains (nih.gov, mayoclinic.org, ...).
+--fetch downloads the given pages into PAGES_DIR first. Without PAGES_DIR a generated
+page of repeated sibling containers is used.
+
+Exits with status 1 if the fallback takes more than --max-fallback-ratio times the
+legacy extractor's time on any page.
+"""
+
+import os
+import re
+import sys
+import time
+import argparse
+import hashlib
+from urllib.parse import urlsplit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.html_extraction import HAS_LXML, _extract_with_bs4, extract_main_text
+
+def legacy_extract(html: bytes) -> str:
+    """The extractor previously used by WebSearchService._extract_article_content."""
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, "html.parser")
+    for tag in soup(["script", "style", "nav", "footer", "header", "aside"]):
+        tag.extract()
+
+    content = ""
+    for tag in soup.find_all(["article", "main", "div", "section"]):
+        if len(tag.get_text(strip=True)) > 200:
+            content += tag.get_text(strip=True) + "\n\n"
+
+    content = re.sub(r'\s+', ' ', content).strip()
+    return content[:10000]
+
+def synthetic_page(blocks: int = 300) -> bytes:
+    """A ~60 KB page of identical card containers, the layout of listing and FAQ pages."""
+    card = '<div class="card"><p>' + "Vitamin D supports bone health in adults and children. " * 3 + "</p></div>"
+    return ("<html><body><nav>Home | Topics</nav><main><article>" + card * blocks +
+            "</article></main><footer>Contact</footer></body></html>").encode()
+
+def fetch_pages(urls, pages_dir: str):
+    """Download pages into the benchmark directory."""
+    import httpx
+
+    os.makedirs(pages_dir, exist_ok=True)
+    headers = {"User-Agent": "Mozilla/5.0 (MedClarify benchmark)"}
+    with httpx.Client(headers=headers, follow_redirects=True, timeout=20) as client:
+        for url in urls:
+            response = client.get(url)
+            name = urlsplit(url).netloc + "-" + hashlib.sha1(url.encode()).hexdigest()[:8] + ".html"
+            with open(os.path.join(pages_dir, name), "wb") as f:
+                f.write(response.content)
+            print(f"saved {url} -> {name} ({len(response.content)} bytes)")
+
+def time_extractor(extractor, html: bytes, repeat: int):
+    """Best-of-N wall time and output of one extractor on one page."""
+    best = float("inf")
+    text = ""
+    for _ in range(repeat):
+        started = time.perf_counter()
+        text = extractor(html)
+        best = min(best, time.perf_counter() - started)
+    return best, text
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("pages_dir", nargs="?")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--fetch", nargs="+", metavar="URL")
+    parser.add_argument("--max-fallback-ratio", type=float, default=2.0)
+    args = parser.parse_args()
+
+    if args.fetch:
+        if not args.pages_dir:
+            parser.error("--fetch needs PAGES_DIR")
+        fetch_pages(args.fetch, args.pages_dir)
+
+    if args.pages_dir:
+        names = sorted(f for f in os.listdir(args.pages_dir) if f.endswith((".html", ".htm")))
+        if not names:
+            sys.exit(f"No .html files in {args.pages_dir}")
+        pages = []
+        for name in names:
+            with open(os.path.join(args.pages_dir, name), "rb") as f:
+                pages.append((name, f.read()))
+    else:
+        pages = [("synthetic-cards.html", synthetic_page())]
+
+    print(f"new extractor backend: {'lxml' if HAS_LXML else 'html.parser'}")
+    print(f"{'page':<48} {'KB':>7} {'legacy ms':>10} {'new ms':>8} {'bs4 ms':>8} {'speedup':>8} "
+          f"{'legacy chars':>13} {'new chars':>10}")
+
+    total_legacy = total_new = 0.0
+    regressions = []
+    for name, html in pages:
+        legacy_time, legacy_text = time_extractor(legacy_extract, html, args.repeat)
+        new_time, new_text = time_extractor(extract_main_text, html, args.repeat)
+        fallback_time, _ = time_extractor(_extract_with_bs4, html, args.repeat)
+        total_legacy += legacy_time
+        total_new += new_time
+        if fallback_time > args.max_fallback_ratio * legacy_time:
+            regressions.append(name)
+        print(f"{name[:48]:<48} {len(html) / 1024:>7.1f} {legacy_time * 1000:>10.1f} {new_time * 1000:>8.1f} "
+              f"{fallback_time * 1000:>8.1f} {legacy_time / max(new_time, 1e-9):>7.1f}x "
+              f"{len(legacy_text):>13} {len(new_text):>10}")
+
+    print(f"\ntotal: legacy {total_legacy * 1000:.1f} ms, new {total_new * 1000:.1f} ms, "
+          f"speedup {total_legacy / max(total_new, 1e-9):.1f}x over {len(pages)} pages")
+    if regressions:
+        sys.exit(f"html.parser fallback over {args.max_fallback_ratio:g}x the legacy extractor time on: {', '.join(regressions)}")
+
+if __name__ == "__main__":
+    main()
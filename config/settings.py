@@ -16,6 +16,140 @@ class Config:
     EMBEDDING_MODEL = "sentence-transformers/all-mpnet-base-v2"  # Higher quality than MiniLM
     VECTOR_DB_INDEX = "healthclaims"
     VECTOR_DIMENSION = 768  # MPNet embedding dimension
+    EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "64"))
+    EMBEDDING_POOL_PROCESSES = int(os.getenv("EMBEDDING_POOL_PROCESSES", "0"))  # 0/1 disables the pool
+    EMBEDDING_POOL_MIN_TEXTS = int(os.getenv("EMBEDDING_POOL_MIN_TEXTS", "2000"))
+    INDEX_BATCH_SIZE = int(os.getenv("INDEX_BATCH_SIZE", "100"))
+    # Bulk ingestion (ingest.py)
+    INGEST_BATCH_SIZE = int(os.getenv("INGEST_BATCH_SIZE", "256"))
+    INGEST_WORKERS = int(os.getenv("INGEST_WORKERS", "2"))  # Batches embedded and upserted concurrently
+    INGEST_CHECKPOINT_EVERY = int(os.getenv("INGEST_CHECKPOINT_EVERY", "10"))  # Batches between checkpoints
+    INGEST_MAX_RETRIES = int(os.getenv("INGEST_MAX_RETRIES", "3"))
+    INGEST_BACKOFF = float(os.getenv("INGEST_BACKOFF", "2.0"))  # Seconds before the first batch retry, doubling
+    # New claims at least this similar to a stored claim are merged into it (above 1 disables)
+    DEDUP_SIMILARITY = float(os.getenv("DEDUP_SIMILARITY", "0.95"))
+    
+    # Query embedding cache; set EMBEDDING_CACHE_PATH to persist it across restarts
+    EMBEDDING_CACHE_SIZE = int(os.getenv("EMBEDDING_CACHE_SIZE", "10000"))
+    EMBEDDING_CACHE_TTL = float(os.getenv("EMBEDDING_CACHE_TTL", str(7 * 24 * 3600)))
+    EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", "")
+    
+    # "pinecone" for the hosted index, "local" for the in-process NumPy index
+    VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "pinecone").lower()
+    LOCAL_INDEX_DIR = os.getenv("LOCAL_INDEX_DIR", os.path.join("data", "vector_index"))
+    LOCAL_INDEX_HNSW = os.getenv("LOCAL_INDEX_HNSW", "false").lower() == "true"  # Needs faiss
+    LOCAL_INDEX_HNSW_STALE = float(os.getenv("LOCAL_INDEX_HNSW_STALE", "0.1"))  # Updated share that triggers a rebuild
+    LOCAL_INDEX_FLUSH_INTERVAL = float(os.getenv("LOCAL_INDEX_FLUSH_INTERVAL", "5"))  # Seconds; 0 flushes every write
+    
+    # Minimum similarity for a stored claim to be used as evidence without a web search
+    RELEVANCE_THRESHOLD = float(os.getenv("RELEVANCE_THRESHOLD", "0.75"))
+    
+    # Hybrid retrieval: dense and BM25 candidates ranked by reciprocal rank fusion. A claim is relevant if its
+    # similarity reaches RELEVANCE_THRESHOLD or its [0, 1]-normalized BM25 score reaches HYBRID_LEXICAL_MIN
+    HYBRID_SEARCH = os.getenv("HYBRID_SEARCH", "true").lower() == "true"
+    HYBRID_RRF_K = int(os.getenv("HYBRID_RRF_K", "60"))
+    HYBRID_LEXICAL_MIN = float(os.getenv("HYBRID_LEXICAL_MIN", "0.8"))  # ~every query term present
+    HYBRID_CANDIDATES = int(os.getenv("HYBRID_CANDIDATES", "20"))  # Candidates taken from each retriever
+    METADATA_CACHE_SIZE = int(os.getenv("METADATA_CACHE_SIZE", "10000"))  # Parsed claim records kept in memory
+    METADATA_CACHE_TTL = float(os.getenv("METADATA_CACHE_TTL", "3600"))
+    LEXICAL_INDEX_PATH = os.getenv("LEXICAL_INDEX_PATH", "data/lexical_index.json")
+    BM25_K1 = float(os.getenv("BM25_K1", "1.2"))
+    BM25_B = float(os.getenv("BM25_B", "0.75"))
+    
+    # Semantic verdict cache: reuse a verdict for claims within this cosine distance
+    VERDICT_CACHE_SIZE = int(os.getenv("VERDICT_CACHE_SIZE", "1000"))
+    VERDICT_CACHE_TTL = float(os.getenv("VERDICT_CACHE_TTL", str(6 * 3600)))
+    VERDICT_CACHE_MAX_DISTANCE = float(os.getenv("VERDICT_CACHE_MAX_DISTANCE", "0.05"))
+    # Batch verification (verify_claims.py)
+    BATCH_SEARCH_SIZE = int(os.getenv("BATCH_SEARCH_SIZE", "256"))  # Claims embedded and searched together
+    BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "8"))  # Claims verified concurrently
+    # HTTP API (api/server.py): admitted concurrency, wait queue and request limits
+    API_MAX_CONCURRENCY = int(os.getenv("API_MAX_CONCURRENCY", "16"))
+    API_MAX_QUEUE = int(os.getenv("API_MAX_QUEUE", "64"))  # Requests beyond this get a 429
+    API_QUEUE_TIMEOUT = float(os.getenv("API_QUEUE_TIMEOUT", "30"))
+    API_MAX_BATCH = int(os.getenv("API_MAX_BATCH", "1000"))
+    API_MAX_UPLOAD_BYTES = int(os.getenv("API_MAX_UPLOAD_BYTES", str(20 * 1024 * 1024)))
+    API_STATS_TTL = float(os.getenv("API_STATS_TTL", "30"))  # Seconds index stats are cached
+    # Cosine distance within which a concurrent claim shares another's verdict, evidence unchecked;
+    # tight enough for rewordings only. 0 disables near-duplicate coalescing
+    COALESCE_MAX_DISTANCE = float(os.getenv("COALESCE_MAX_DISTANCE", "0.02"))
+    
+    # Metrics (Prometheus text format on the API's /metrics, or METRICS_PORT for the Streamlit process)
+    METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+    METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))  # 0 disables the standalone exporter
+    OTEL_TRACING = os.getenv("OTEL_TRACING", "false").lower() == "true"  # Stage spans via opentelemetry-api
+    
+    # Shared HTTP connection pool
+    HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+    HTTP_MAX_PER_HOST = int(os.getenv("HTTP_MAX_PER_HOST", "10"))
+    HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", "10"))
+    HTTP_MAX_RETRIES = int(os.getenv("HTTP_MAX_RETRIES", "2"))
+    HTTP_BACKOFF = float(os.getenv("HTTP_BACKOFF", "0.5"))
+    LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "120"))
+    
+    # Text generation backend: "huggingface" (remote Inference API) or "llama_cpp" (local GGUF on CPU)
+    LLM_BACKEND = os.getenv("LLM_BACKEND", "huggingface").lower()
+    LLM_MODEL = os.getenv("LLM_MODEL", "mistralai/Mistral-7B-Instruct-v0.3")
+    HF_INFERENCE_URL = "https://api-inference.huggingface.co/models"
+    LOCAL_LLM_MODEL_PATH = os.getenv("LOCAL_LLM_MODEL_PATH", "")
+    LOCAL_LLM_THREADS = int(os.getenv("LOCAL_LLM_THREADS", str(os.cpu_count() or 4)))
+    LOCAL_LLM_CONTEXT = int(os.getenv("LOCAL_LLM_CONTEXT", "8192"))
+    LOCAL_LLM_MAX_NEW_TOKENS = int(os.getenv("LOCAL_LLM_MAX_NEW_TOKENS", "512"))
+    LOCAL_LLM_CACHE_BYTES = int(os.getenv("LOCAL_LLM_CACHE_BYTES", str(2 * 1024 ** 3)))
+    STREAM_RESPONSES = os.getenv("STREAM_RESPONSES", "true").lower() == "true"  # Token streaming in the UI
+    # Prompt token budget: prompts are sized with the model tokenizer to fit the context window
+    LLM_CONTEXT_TOKENS = int(os.getenv("LLM_CONTEXT_TOKENS", "8192"))  # Remote model; llama_cpp uses LOCAL_LLM_CONTEXT
+    LLM_MAX_NEW_TOKENS = int(os.getenv("LLM_MAX_NEW_TOKENS", "512"))  # Default generation length
+    PROMPT_RESERVE_TOKENS = int(os.getenv("PROMPT_RESERVE_TOKENS", "64"))  # Margin for special and template tokens
+    PROMPT_MIN_PASSAGE_TOKENS = int(os.getenv("PROMPT_MIN_PASSAGE_TOKENS", "64"))  # Shorter remainders are dropped
+    TOKEN_COUNT_CACHE_SIZE = int(os.getenv("TOKEN_COUNT_CACHE_SIZE", "20000"))
+    SYNTHESIS_SOURCE_TOKENS = int(os.getenv("SYNTHESIS_SOURCE_TOKENS", "800"))  # Per web source in claim synthesis
+    
+    # Report PDF extraction: text analyzed at most, and page-parallel extraction of long documents
+    REPORT_MAX_CHARS = int(os.getenv("REPORT_MAX_CHARS", "200000"))
+    PDF_EXTRACT_WORKERS = int(os.getenv("PDF_EXTRACT_WORKERS", str(min(4, os.cpu_count() or 1))))  # 0/1 disables the pool
+    PDF_PARALLEL_MIN_PAGES = int(os.getenv("PDF_PARALLEL_MIN_PAGES", "32"))
+    PDF_PAGES_PER_TASK = int(os.getenv("PDF_PAGES_PER_TASK", "8"))
+    # Long reports are analyzed chunk by chunk (map) and merged into one explanation (reduce)
+    REPORT_CHUNK_TOKENS = int(os.getenv("REPORT_CHUNK_TOKENS", "2000"))
+    REPORT_CHUNK_OVERLAP_TOKENS = int(os.getenv("REPORT_CHUNK_OVERLAP_TOKENS", "100"))
+    REPORT_CHUNK_CONCURRENCY = int(os.getenv("REPORT_CHUNK_CONCURRENCY", "4"))
+    REPORT_CHUNK_SUMMARY_TOKENS = int(os.getenv("REPORT_CHUNK_SUMMARY_TOKENS", "300"))
+    REPORT_MAX_TERMS = int(os.getenv("REPORT_MAX_TERMS", "40"))  # Merged terms explained by the reduce step
+    # Report results and intermediates keyed by content hash: in-memory LRU over compressed SQLite (empty path: memory only)
+    REPORT_CACHE_PATH = os.getenv("REPORT_CACHE_PATH", os.path.join("data", "cache", "reports.sqlite"))
+    REPORT_CACHE_SIZE = int(os.getenv("REPORT_CACHE_SIZE", "2000"))
+    REPORT_CACHE_TTL = float(os.getenv("REPORT_CACHE_TTL", str(7 * 24 * 3600)))
+    REPORT_CACHE_MAX_BYTES = int(os.getenv("REPORT_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+    
+    # Biomedical NER: "huggingface" (remote Inference API) or "onnx" (local, optionally quantized, on CPU)
+    NER_BACKEND = os.getenv("NER_BACKEND", "huggingface").lower()
+    NER_MODEL = os.getenv("NER_MODEL", "Helios9/BioMed_NER")
+    LOCAL_NER_MODEL = os.getenv("LOCAL_NER_MODEL", "")  # Directory or hub id of an ONNX export
+    LOCAL_NER_FILE = os.getenv("LOCAL_NER_FILE", "model_quantized.onnx")  # Empty for the default model.onnx
+    LOCAL_NER_THREADS = int(os.getenv("LOCAL_NER_THREADS", str(os.cpu_count() or 4)))
+    LOCAL_NER_BATCH_SIZE = int(os.getenv("LOCAL_NER_BATCH_SIZE", "8"))
+    LOCAL_NER_STRIDE = int(os.getenv("LOCAL_NER_STRIDE", "64"))  # Token overlap when a text exceeds the model window
+    # Persistent term -> explanation glossary, so common terms are explained once; empty path disables it
+    GLOSSARY_PATH = os.getenv("GLOSSARY_PATH", os.path.join("data", "cache", "glossary.sqlite"))
+    GLOSSARY_TTL = float(os.getenv("GLOSSARY_TTL", str(90 * 24 * 3600)))  # 0 keeps explanations forever
+    
+    # Concurrent article fetching for the web fallback
+    WEB_FETCH_TARGET = int(os.getenv("WEB_FETCH_TARGET", "3"))  # Articles to keep
+    WEB_FETCH_CANDIDATES = int(os.getenv("WEB_FETCH_CANDIDATES", "6"))  # Trusted results fetched in parallel
+    WEB_FETCH_PER_DOMAIN = int(os.getenv("WEB_FETCH_PER_DOMAIN", "2"))
+    WEB_FETCH_DEADLINE = float(os.getenv("WEB_FETCH_DEADLINE", "12"))  # Seconds for the whole fetch phase
+    WEB_FETCH_MAX_BYTES = int(os.getenv("WEB_FETCH_MAX_BYTES", str(2 * 1024 * 1024)))  # Per-page download cap
+    # Fetched articles are split into passages and only those closest to the claim are synthesized
+    WEB_PASSAGE_TOP_K = int(os.getenv("WEB_PASSAGE_TOP_K", "6"))
+    WEB_PASSAGES_PER_ARTICLE = int(os.getenv("WEB_PASSAGES_PER_ARTICLE", "16"))  # Bounds the embedding batch
+    
+    # On-disk cache of SerpAPI responses and extracted articles; empty path disables it
+    HTTP_CACHE_PATH = os.getenv("HTTP_CACHE_PATH", os.path.join("data", "cache", "http.sqlite"))
+    HTTP_CACHE_MAX_BYTES = int(os.getenv("HTTP_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+    SERP_CACHE_TTL = float(os.getenv("SERP_CACHE_TTL", str(24 * 3600)))
+    ARTICLE_CACHE_TTL = float(os.getenv("ARTICLE_CACHE_TTL", str(7 * 24 * 3600)))
+    HTTP_CACHE_OFFLINE = os.getenv("HTTP_CACHE_OFFLINE", "false").lower() == "true"  # Replay only
     
     TRUSTED_DOMAINS = [
         "nih.gov", "cdc.gov", "who.int", "mayoclinic.org", "harvard.edu", 
@@ -30,7 +164,7 @@ class Config:
         
         if not cls.HF_TOKEN:
             missing_keys.append("HF_TOKEN")
-        if not cls.PINECONE_API_KEY:
+        if cls.VECTOR_BACKEND == "pinecone" and not cls.PINECONE_API_KEY:
             missing_keys.append("PINECONE_API_KEY")
         if not cls.SERPAPI_KEY:
             missing_keys.append("SERPAPI_KEY")
@@ -0,0 +1,69 @@
+"""
+Bulk ingestion of health claim corpora into the MedClarify vector database.
+
+Streams JSONL files (one claim object per line), JSON arrays or healthfc.json-style
+{"health_claims": [...]} documents, embeds them in batches on several workers and
+upserts them into the configured vector store (VECTOR_BACKEND).
+
+Progress is checkpointed, so re-running the same command after a crash resumes where
+it stopped. Claims whose content hash is already indexed are skipped without being
+re-embedded; the rest are merged like claims added at runtime, so repeated claims and
+near-duplicates of stored claims only contribute their sources.
+
+The local vector index and the BM25 index are locked while the app or API has them open,
+so stop those before ingesting into them.
+
+Usage:
+    python ingest.py CORPUS [--checkpoint PATH] [--batch-size N] [--workers N] [--update]
+"""
+
+import sys
+import logging
+import argparse
+from config.settings import Config
+from services.vector_db import VectorDatabaseClient
+from services.ingestion import ClaimIngestor
+from utils.logging_setup import setup_logger, get_default_log_path
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("corpus", help="JSON or JSONL file of claims")
+    parser.add_argument("--checkpoint", help="Progress file (default: CORPUS.checkpoint.json)")
+    parser.add_argument("--failed", help="Where claims that could not be indexed are written (default: CORPUS.failed.jsonl)")
+    parser.add_argument("--batch-size", type=int, default=Config.INGEST_BATCH_SIZE)
+    parser.add_argument("--workers", type=int, default=Config.INGEST_WORKERS)
+    parser.add_argument("--checkpoint-every", type=int, default=Config.INGEST_CHECKPOINT_EVERY, metavar="BATCHES")
+    parser.add_argument("--update", action="store_true", help="Re-embed and overwrite claims that are already indexed")
+    args = parser.parse_args()
+
+    # Service modules log under their own names; route them all to the console and log file
+    setup_logger("services", level=logging.INFO, log_file=get_default_log_path())
+
+    vector_db = VectorDatabaseClient()
+    if vector_db.store is None:
+        sys.exit("Vector database could not be initialized, check the configuration")
+
+    ingestor = ClaimIngestor(
+        vector_db,
+        batch_size=args.batch_size,
+        workers=args.workers,
+        checkpoint_path=args.checkpoint or args.corpus + ".checkpoint.json",
+        checkpoint_every=args.checkpoint_every
+    )
+    try:
+        totals = ingestor.ingest(
+            args.corpus,
+            skip_existing=not args.update,
+            failed_path=args.failed or args.corpus + ".failed.jsonl"
+        )
+        stored = vector_db.count()
+    finally:
+        vector_db.close()
+
+    print(f"{totals['records']} records: {totals['indexed']} indexed, {totals['updated']} updated, "
+          f"{totals['merged']} merged, {totals['skipped']} already indexed, "
+          f"{totals['invalid']} invalid, {totals['failed']} failed ({totals['records_per_second']:.1f} records/s)")
+    print(f"Vector store now holds {stored} claims")
+
+if __name__ == "__main__":
+    main()
@@ -7,11 +7,25 @@ from .web_search import WebSearchService
 from .claim_processor import HealthClaimProcessor
 from .medical_assistant import MedVerifyAssistant
 from .report_analyzer import MedicalReportAnalyzer
+from .http_client import HttpClient, get_http_client, run_sync
+from .llm_client import LLMClient, get_llm_client
+from .ner_client import NERClient, get_ner_client
+from .registry import ServiceRegistry, get_registry, shutdown_registry
 
 __all__ = [
     "VectorDatabaseClient",
     "WebSearchService",
     "HealthClaimProcessor", 
     "MedVerifyAssistant",
-    "MedicalReportAnalyzer"
+    "MedicalReportAnalyzer",
+    "HttpClient",
+    "get_http_client",
+    "run_sync",
+    "LLMClient",
+    "get_llm_client",
+    "NERClient",
+    "get_ner_client",
+    "ServiceRegistry",
+    "get_registry",
+    "shutdown_registry"
 ]
\ No newline at end of file
@@ -1,33 +1,85 @@
 import json
+import asyncio
 import logging
-import requests
 from typing import Dict, List
 from config.settings import Config
 from utils.text_processing import extract_json
+from .http_client import run_sync
+from .llm_client import LLMClient, get_llm_client
+from .prompt_budget import overlap_scores
 
 logger = logging.getLogger(__name__)
 
+SYNTHESIS_MAX_NEW_TOKENS = 800
+
 class HealthClaimProcessor:
     """Process and verify health claims using LLM"""
-    def __init__(self):
-        self.hf_api_url = "https://api-inference.huggingface.co/models/mistralai/Mistral-7B-Instruct-v0.3"
-        self.headers = {"Authorization": f"Bearer {Config.HF_TOKEN}"}
+    def __init__(self, llm: LLMClient = None):
+        self.llm = llm or get_llm_client()
         
     def synthesize_web_content(self, claim: str, web_content: List[Dict]) -> Dict:
         """Synthesize web search results into a structured health claim"""
+        return run_sync(self.synthesize_web_content_async(claim, web_content))
+
+    async def synthesize_web_content_async(self, claim: str, web_content: List[Dict]) -> Dict:
+        """Synthesize web search results into a structured health claim without blocking the event loop"""
         if not web_content:
             return {}
             
-        # Combine content from all sources
-        combined_content = f"Health claim to analyze: {claim}\n\n"
-        
-        for i, content in enumerate(web_content):
-            combined_content += f"Source {i+1} - {content['title']}\n"
-            combined_content += f"URL: {content['link']}\n"
-            combined_content += f"Content: {content['content'][:3000]}\n\n"  # Limit content length
+        # Token counting of the sources is CPU work, keep it off the event loop
+        prompt = await asyncio.to_thread(self._build_synthesis_prompt, claim, web_content)
         
-        # Prompt the LLM to synthesize the information
-        prompt = (
+        try:
+            # Call the LLM
+            generated_text = await self.llm.generate_async(prompt, max_new_tokens=SYNTHESIS_MAX_NEW_TOKENS)
+            
+            if generated_text is None:
+                return {}
+                
+            logger.debug(f"Raw LLM response: {generated_text}")
+            # Extract generated text
+            if generated_text:
+                parsed_json = extract_json(generated_text)
+
+                if parsed_json and all(k in parsed_json for k in ["claim", "evidence_level", "explanation", "sources"]):
+                    parsed_json["origin"] = "web_search"
+                    return parsed_json
+            
+            logger.error("Failed to parse LLM response into valid JSON")
+            return {}
+            
+        except Exception as e:
+            logger.error(f"Synthesis error: {str(e)}")
+            return {}
+
+    def _build_synthesis_prompt(self, claim: str, web_content: List[Dict]) -> str:
+        """Combine the sources, most relevant first, into a prompt that fits the context window"""
+        budget = self.llm.budget
+        # Passage selection leaves a similarity score; otherwise rank by overlap with the claim's terms
+        if all("score" in content for content in web_content):
+            scores = [content["score"] for content in web_content]
+        else:
+            scores = overlap_scores(claim, [content['content'] for content in web_content])
+        ranked = [web_content[i] for i in sorted(range(len(web_content)), key=lambda i: scores[i], reverse=True)]
+        intro = f"Health claim to analyze: {claim}\n\n"
+        headers = [
+            f"Source {i+1} - {content['title']}\nURL: {content['link']}\nContent: "
+            for i, content in enumerate(ranked)
+        ]
+
+        available = budget.available(self._synthesis_prompt(claim, intro + "".join(headers)), SYNTHESIS_MAX_NEW_TOKENS)
+        # Drop the least relevant sources rather than give each a uselessly small share
+        keep = max(1, min(len(ranked), available // Config.PROMPT_MIN_PASSAGE_TOKENS))
+        available = min(available, keep * Config.SYNTHESIS_SOURCE_TOKENS)
+        contents = budget.share([content['content'] for content in ranked[:keep]], available)
+
+        combined_content = intro + "".join(f"{headers[i]}{text}\n\n" for i, text in enumerate(contents))
+        return self._synthesis_prompt(claim, combined_content)
+
+    @staticmethod
+    def _synthesis_prompt(claim: str, combined_content: str) -> str:
+        """Prompt the LLM to synthesize the information"""
+        return (
             "You are an expert medical researcher analyzing health claims. Based on the following information from "
             f"reputable medical sources, analyze this health claim: '{claim}'\n\n"
             "Structure your response in JSON format with the following fields:\n"
@@ -47,33 +99,4 @@ class HealthClaimProcessor:
             '  ]\n'
             "}"
         )
-        
-        try:
-            # Make API call to Hugging Face
-            response = requests.post(
-                self.hf_api_url,
-                headers=self.headers,
-                json={"inputs": prompt, "parameters": {"max_new_tokens": 800}}
-            )
-            
-            if response.status_code != 200:
-                logger.error(f"LLM API error: {response.status_code}")
-                return {}
-                
-            result = response.json()
-            logger.info(f"Raw LLM response: {result}")
-            # Extract generated text
-            if isinstance(result, list) and result:
-                generated_text = result[0].get("generated_text", "")
-                parsed_json = extract_json(generated_text)
 
-                if parsed_json and all(k in parsed_json for k in ["claim", "evidence_level", "explanation", "sources"]):
-                    parsed_json["origin"] = "web_search"
-                    return parsed_json
-            
-            logger.error("Failed to parse LLM response into valid JSON")
-            return {}
-            
-        except Exception as e:
-            logger.error(f"Synthesis error: {str(e)}")
-            return {}
\ No newline at end of file
@@ -0,0 +1,67 @@
+import hashlib
+import logging
+from typing import Dict, List, Optional
+import numpy as np
+from config.settings import Config
+from utils.cache import LRUCache, SQLiteStore
+from utils.text_processing import normalize_text
+
+logger = logging.getLogger(__name__)
+
+class EmbeddingCache:
+    """Two-tier (memory LRU + optional SQLite) cache of query embeddings"""
+    def __init__(self, model_name: str = Config.EMBEDDING_MODEL, maxsize: int = Config.EMBEDDING_CACHE_SIZE,
+                 ttl: Optional[float] = Config.EMBEDDING_CACHE_TTL, path: Optional[str] = Config.EMBEDDING_CACHE_PATH):
+        self.model_name = model_name
+        self.memory = LRUCache(maxsize=maxsize, ttl=ttl)
+        self.disk = None
+        if path:
+            try:
+                self.disk = SQLiteStore(path, ttl=ttl)
+            except Exception as e:
+                logger.error(f"Failed to open embedding cache at {path}: {str(e)}")
+        self.disk_hits = 0
+
+    def key(self, text: str) -> str:
+        """Cache key derived from the normalized text and the embedding model"""
+        return hashlib.sha256(f"{self.model_name}\0{normalize_text(text)}".encode("utf-8")).hexdigest()
+
+    def get(self, text: str) -> Optional[np.ndarray]:
+        """Return a cached embedding, promoting disk hits into memory"""
+        key = self.key(text)
+        embedding = self.memory.get(key)
+        if embedding is not None:
+            return embedding
+
+        if self.disk is not None:
+            payload = self.disk.get(key)
+            if payload is not None:
+                embedding = np.frombuffer(payload, dtype=np.float32)
+                self.memory.set(key, embedding)
+                self.disk_hits += 1
+                return embedding
+        return None
+
+    def set(self, text: str, embedding: np.ndarray):
+        """Store an embedding in both tiers"""
+        key = self.key(text)
+        embedding = np.asarray(embedding, dtype=np.float32)
+        self.memory.set(key, embedding)
+        if self.disk is not None:
+            try:
+                self.disk.set(key, embedding.tobytes())
+            except Exception as e:
+                logger.warning(f"Failed to persist embedding: {str(e)}")
+
+    def stats(self) -> Dict:
+        """Hit-rate counters; disk hits are counted as memory misses that were still served"""
+        stats = self.memory.stats()
+        lookups = stats["hits"] + stats["misses"]
+        stats["disk_hits"] = self.disk_hits
+        stats["hit_rate"] = (stats["hits"] + self.disk_hits) / lookups if lookups else 0.0
+        return stats
+
+    def close(self):
+        """Close the disk tier"""
+        if self.disk is not None:
+            self.disk.close()
@@ -0,0 +1,73 @@
+import re
+import logging
+from typing import Dict, Iterable, List
+from config.settings import Config
+from utils.cache import SQLiteStore
+from utils.text_processing import normalize_text
+
+logger = logging.getLogger(__name__)
+
+# "- **Term**: explanation", "1. Term - explanation", "Term: explanation"
+EXPLANATION_PATTERN = re.compile(r"^\s*(?:[-*•]|\d+[.)])?\s*\**\s*([^:*\n]{2,80}?)\s*\**\s*(?::|\s[-–—]\s)\s*(.+?)\s*$")
+
+class Glossary:
+    """Persistent cache of patient-friendly explanations of medical terms, shared by every report"""
+    def __init__(self, path: str = Config.GLOSSARY_PATH, ttl: float = Config.GLOSSARY_TTL):
+        self.store = SQLiteStore(path, ttl=ttl or None)
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _key(term: str) -> str:
+        return normalize_text(term)
+
+    def lookup(self, terms: Iterable[str]) -> Dict[str, str]:
+        """Known explanations keyed by the terms as given, read in one query"""
+        terms = list(terms)
+        try:
+            stored = self.store.get_many([self._key(term) for term in terms])
+        except Exception as e:
+            logger.warning(f"Glossary read failed: {str(e)}")
+            stored = {}
+        known = {}
+        for term in terms:
+            explanation = stored.get(self._key(term))
+            if explanation is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                known[term] = explanation.decode("utf-8")
+        return known
+
+    def learn(self, terms: List[str], section: str) -> int:
+        """Store the explanations of the requested terms found in a generated terms section, in one commit"""
+        wanted = {self._key(term): term for term in terms}
+        explanations = {}
+        for line in section.splitlines():
+            match = EXPLANATION_PATTERN.match(line)
+            if not match:
+                continue
+            key = self._key(match.group(1))
+            if key in wanted:
+                explanations[key] = match.group(2).encode("utf-8")
+        if not explanations:
+            return 0
+        try:
+            self.store.set_many(explanations)
+        except Exception as e:
+            logger.warning(f"Glossary write failed: {str(e)}")
+            return 0
+        return len(explanations)
+
+    @staticmethod
+    def format(explanations: Dict[str, str]) -> str:
+        """Render explanations the way the LLM is asked to write them"""
+        return "\n".join(f"- {term}: {explanation}" for term, explanation in explanations.items())
+
+    def stats(self) -> Dict:
+        """Hit and miss counters"""
+        lookups = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses, "hit_rate": self.hits / lookups if lookups else 0.0}
+
+    def close(self):
+        self.store.close()
@@ -0,0 +1,85 @@
+import json
+import time
+import hashlib
+import logging
+from typing import Any, Dict, Optional
+from config.settings import Config
+from utils.cache import SQLiteStore
+
+logger = logging.getLogger(__name__)
+
+class HttpCache:
+    """Compressed on-disk cache of SerpAPI responses and extracted article text, with HTTP revalidation"""
+    def __init__(self, path: str = Config.HTTP_CACHE_PATH, max_bytes: int = Config.HTTP_CACHE_MAX_BYTES,
+                 ttls: Optional[Dict[str, float]] = None, offline: bool = Config.HTTP_CACHE_OFFLINE):
+        # Freshness is tracked per namespace here; the store only enforces the size cap
+        self.store = SQLiteStore(path, max_bytes=max_bytes, compress=True)
+        self.ttls = ttls or {"serp": Config.SERP_CACHE_TTL, "article": Config.ARTICLE_CACHE_TTL}
+        self.offline = offline
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+
+    @staticmethod
+    def _key(namespace: str, identifier: str) -> str:
+        return namespace + ":" + hashlib.sha256(identifier.encode("utf-8")).hexdigest()
+
+    def get(self, namespace: str, identifier: str) -> Optional[Dict[str, Any]]:
+        """Return the cached entry (body, etag, last_modified, fresh) or None"""
+        try:
+            payload = self.store.get(self._key(namespace, identifier))
+        except Exception as e:
+            logger.warning(f"HTTP cache read failed: {str(e)}")
+            return None
+        if payload is None:
+            self.misses += 1
+            return None
+
+        entry = json.loads(payload)
+        # Offline mode replays whatever was recorded, however old
+        entry["fresh"] = self.offline or time.time() - entry["stored_at"] < self.ttls.get(namespace, 0)
+        if entry["fresh"]:
+            self.hits += 1
+            return entry
+
+        # Stale entries still count as misses; a successful revalidation is tracked separately
+        self.misses += 1
+        if not (entry.get("etag") or entry.get("last_modified")):
+            return None
+        return entry
+
+    def set(self, namespace: str, identifier: str, body: Any, etag: str = None, last_modified: str = None):
+        """Store a response body along with its validators"""
+        entry = {"body": body, "etag": etag, "last_modified": last_modified, "stored_at": time.time()}
+        try:
+            self.store.set(self._key(namespace, identifier), json.dumps(entry).encode("utf-8"))
+        except Exception as e:
+            logger.warning(f"HTTP cache write failed: {str(e)}")
+
+    def refresh(self, namespace: str, identifier: str, entry: Dict[str, Any]):
+        """Mark a revalidated (304) entry fresh again"""
+        self.revalidated += 1
+        self.set(namespace, identifier, entry["body"], entry.get("etag"), entry.get("last_modified"))
+
+    @staticmethod
+    def revalidation_headers(entry: Optional[Dict[str, Any]]) -> Dict[str, str]:
+        """Conditional request headers for a stale entry"""
+        headers = {}
+        if entry and entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry and entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def stats(self) -> Dict:
+        """Hit, miss and revalidation (304) counters"""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "revalidated": self.revalidated,
+            "hit_rate": self.hits / lookups if lookups else 0.0
+        }
+
+    def close(self):
+        self.store.close()
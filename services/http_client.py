@@ -0,0 +1,231 @@
+import json
+import atexit
+import asyncio
+import random
+import logging
+import threading
+import weakref
+from typing import Any, AsyncIterator, Awaitable, Dict, Iterator, Optional
+from urllib.parse import urlsplit
+import httpx
+from config.settings import Config
+from .telemetry import get_telemetry
+
+logger = logging.getLogger(__name__)
+telemetry = get_telemetry()
+
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+class _LoopState:
+    """Connection pool and per-host limits bound to one event loop"""
+    def __init__(self, client: httpx.AsyncClient):
+        self.client = client
+        self.host_semaphores: Dict[str, asyncio.Semaphore] = {}
+
+class HttpClient:
+    """Shared pooled async HTTP client with per-host limits, timeouts and retry with backoff"""
+    def __init__(self, max_connections: int = Config.HTTP_MAX_CONNECTIONS,
+                 max_per_host: int = Config.HTTP_MAX_PER_HOST,
+                 timeout: float = Config.HTTP_TIMEOUT,
+                 max_retries: int = Config.HTTP_MAX_RETRIES,
+                 backoff: float = Config.HTTP_BACKOFF):
+        self.max_connections = max_connections
+        self.max_per_host = max_per_host
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        # httpx pools can't be shared across event loops, so keep one per loop
+        self._states: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, _LoopState]" = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+
+    def _state(self) -> _LoopState:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            state = self._states.get(loop)
+            if state is None:
+                client = httpx.AsyncClient(
+                    timeout=self.timeout,
+                    follow_redirects=True,
+                    limits=httpx.Limits(
+                        max_connections=self.max_connections,
+                        max_keepalive_connections=self.max_connections
+                    )
+                )
+                state = _LoopState(client)
+                self._states[loop] = state
+            return state
+
+    def _host_semaphore(self, state: _LoopState, url: str) -> asyncio.Semaphore:
+        host = urlsplit(url).netloc
+        semaphore = state.host_semaphores.get(host)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.max_per_host)
+            state.host_semaphores[host] = semaphore
+        return semaphore
+
+    async def request(self, method: str, url: str, retry: bool = True, **kwargs) -> httpx.Response:
+        """Send a request, retrying transport errors and retryable status codes with exponential backoff"""
+        state = self._state()
+        attempts = self.max_retries + 1 if retry else 1
+        host = urlsplit(url).netloc
+
+        for attempt in range(attempts):
+            try:
+                async with self._host_semaphore(state, url):
+                    response = await state.client.request(method, url, **kwargs)
+                telemetry.count("upstream_requests_total", host=host, outcome=response.status_code)
+                telemetry.count("upstream_bytes_total", len(response.content), host=host)
+                if response.status_code not in RETRYABLE_STATUS_CODES or attempt == attempts - 1:
+                    return response
+                delay = self._retry_delay(attempt, response.headers.get("Retry-After"))
+                logger.warning(f"{method} {url} returned {response.status_code}, retrying in {delay:.1f}s")
+            except httpx.TransportError as e:
+                telemetry.count("upstream_requests_total", host=host, outcome="error")
+                if attempt == attempts - 1:
+                    raise
+                delay = self._retry_delay(attempt)
+                logger.warning(f"{method} {url} failed ({type(e).__name__}), retrying in {delay:.1f}s")
+            telemetry.count("upstream_retries_total", host=host)
+            await asyncio.sleep(delay)
+
+    def _retry_delay(self, attempt: int, retry_after: Optional[str] = None) -> float:
+        """Exponential backoff with jitter, honouring a numeric Retry-After header"""
+        if retry_after:
+            try:
+                return min(float(retry_after), 60.0)
+            except ValueError:
+                pass
+        return self.backoff * (2 ** attempt) * (0.5 + random.random())
+
+    async def get(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("GET", url, **kwargs)
+
+    async def post(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("POST", url, **kwargs)
+
+    async def get_capped(self, url: str, max_bytes: int, **kwargs) -> httpx.Response:
+        """Stream a GET response, reading at most max_bytes of the body"""
+        state = self._state()
+        async with self._host_semaphore(state, url):
+            async with state.client.stream("GET", url, **kwargs) as response:
+                body = bytearray()
+                if response.status_code == 200:
+                    async for chunk in response.aiter_bytes():
+                        body.extend(chunk)
+                        if len(body) >= max_bytes:
+                            logger.debug(f"Truncated {url} at {max_bytes} bytes")
+                            break
+                host = urlsplit(url).netloc
+                telemetry.count("upstream_requests_total", host=host, outcome=response.status_code)
+                telemetry.count("upstream_bytes_total", len(body), host=host)
+                # Decompressed body, so drop the encoding/length headers that described the wire format
+                headers = {k: v for k, v in response.headers.items()
+                           if k.lower() not in ("content-encoding", "content-length", "transfer-encoding")}
+                return httpx.Response(response.status_code, headers=headers,
+                                      content=bytes(body[:max_bytes]), request=response.request)
+
+    async def stream_sse(self, url: str, method: str = "POST", **kwargs) -> AsyncIterator[Dict]:
+        """Send a request and yield the JSON payload of each server-sent event as it arrives"""
+        state = self._state()
+        async with self._host_semaphore(state, url):
+            async with state.client.stream(method, url, **kwargs) as response:
+                telemetry.count("upstream_requests_total", host=urlsplit(url).netloc, outcome=response.status_code)
+                if response.status_code != 200:
+                    await response.aread()
+                    response.raise_for_status()
+                async for line in response.aiter_lines():
+                    if not line.startswith("data:"):
+                        continue
+                    data = line[len("data:"):].strip()
+                    if data == "[DONE]":
+                        break
+                    try:
+                        yield json.loads(data)
+                    except json.JSONDecodeError:
+                        logger.debug(f"Skipping malformed event from {url}: {data[:100]}")
+
+    def close(self):
+        """Close the connection pools of every loop that is still alive"""
+        with self._lock:
+            states = list(self._states.items())
+            self._states.clear()
+        for loop, state in states:
+            try:
+                if loop.is_running():
+                    asyncio.run_coroutine_threadsafe(state.client.aclose(), loop).result(timeout=5)
+                elif not loop.is_closed():
+                    loop.run_until_complete(state.client.aclose())
+            except Exception as e:
+                logger.warning(f"Error closing HTTP client: {str(e)}")
+
+class _BackgroundLoop:
+    """Event loop running in a daemon thread that sync wrappers submit coroutines to"""
+    def __init__(self):
+        self._loop = None
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def get(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None or self._loop.is_closed():
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(target=self._loop.run_forever, name="medclarify-async", daemon=True)
+                self._thread.start()
+            return self._loop
+
+    def stop(self):
+        with self._lock:
+            if self._loop is not None and self._loop.is_running():
+                self._loop.call_soon_threadsafe(self._loop.stop)
+                self._thread.join(timeout=5)
+                self._loop.close()
+            self._loop = None
+            self._thread = None
+
+_background_loop = _BackgroundLoop()
+
+def run_sync(coro: Awaitable) -> Any:
+    """Run a coroutine to completion on the shared background loop and return its result"""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        pass
+    else:
+        raise RuntimeError("run_sync() cannot be called from a running event loop, await the coroutine instead")
+    return asyncio.run_coroutine_threadsafe(coro, _background_loop.get()).result()
+
+def iter_sync(agen: AsyncIterator) -> Iterator:
+    """Consume an async generator from synchronous code, one item at a time, via the background loop"""
+    loop = _background_loop.get()
+    try:
+        while True:
+            try:
+                yield asyncio.run_coroutine_threadsafe(agen.__anext__(), loop).result()
+            except StopAsyncIteration:
+                return
+    finally:
+        # Runs when the consumer stops early too, so the underlying stream is released
+        asyncio.run_coroutine_threadsafe(agen.aclose(), loop).result()
+
+_http_client: Optional[HttpClient] = None
+_http_client_lock = threading.Lock()
+
+def get_http_client() -> HttpClient:
+    """Return the process-wide HTTP client"""
+    global _http_client
+    if _http_client is None:
+        with _http_client_lock:
+            if _http_client is None:
+                _http_client = HttpClient()
+    return _http_client
+
+def shutdown_http_client():
+    """Close the shared HTTP client and stop the background loop"""
+    global _http_client
+    with _http_client_lock:
+        if _http_client is not None:
+            _http_client.close()
+            _http_client = None
+    _background_loop.stop()
+
+atexit.register(shutdown_http_client)
@@ -0,0 +1,170 @@
+import os
+import json
+import time
+import logging
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from typing import Dict, Iterator, List, Optional
+from config.settings import Config
+
+try:
+    import ijson
+    HAS_IJSON = True
+except ImportError:  # pragma: no cover - depends on the environment
+    HAS_IJSON = False
+
+logger = logging.getLogger(__name__)
+
+def iter_claims(path: str) -> Iterator[Dict]:
+    """Stream claim records from a JSONL file, a JSON array or a {"health_claims": [...]} document"""
+    if path.endswith((".jsonl", ".ndjson")):
+        with open(path, "r", encoding="utf-8") as f:
+            for line_number, line in enumerate(f, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    logger.warning(f"Skipping malformed JSON on line {line_number} of {path}")
+        return
+
+    with open(path, "rb") as f:
+        first = f.read(1)
+        while first and first.isspace():
+            first = f.read(1)
+        f.seek(0)
+        prefix = "item" if first == b"[" else "health_claims.item"
+
+        if HAS_IJSON:
+            yield from ijson.items(f, prefix, use_float=True)
+            return
+
+        logger.warning("ijson is not installed, loading the whole JSON document into memory")
+        data = json.load(f)
+        yield from (data if prefix == "item" else data.get("health_claims", []))
+
+class ClaimIngestor:
+    """Bulk, resumable ingestion of claim corpora into the vector database"""
+    def __init__(self, vector_db, batch_size: int = Config.INGEST_BATCH_SIZE, workers: int = Config.INGEST_WORKERS,
+                 checkpoint_path: Optional[str] = None, checkpoint_every: int = Config.INGEST_CHECKPOINT_EVERY):
+        self.vector_db = vector_db
+        self.batch_size = batch_size
+        self.workers = max(1, workers)
+        self.checkpoint_path = checkpoint_path
+        self.checkpoint_every = max(1, checkpoint_every)
+
+    def _load_checkpoint(self, source: str) -> Dict:
+        """Read the progress of a previous run over the same source"""
+        if not self.checkpoint_path or not os.path.exists(self.checkpoint_path):
+            return {}
+        with open(self.checkpoint_path, "r") as f:
+            checkpoint = json.load(f)
+        if checkpoint.get("source") != source:
+            logger.warning(f"Checkpoint {self.checkpoint_path} belongs to another source, starting over")
+            return {}
+        return checkpoint
+
+    def _save_checkpoint(self, checkpoint: Dict):
+        """Persist the store, then atomically record how far ingestion got"""
+        self.vector_db.flush()
+        if not self.checkpoint_path:
+            return
+        directory = os.path.dirname(self.checkpoint_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.checkpoint_path + ".tmp", "w") as f:
+            json.dump(checkpoint, f)
+        os.replace(self.checkpoint_path + ".tmp", self.checkpoint_path)
+
+    def _index_batch(self, records: List, skip_existing: bool) -> Dict:
+        """Embed and upsert one batch, retrying transient failures"""
+        claims = [r for r in records if isinstance(r, dict) and r.get("claim")]
+        result = {"records": len(records), "invalid": len(records) - len(claims), "indexed": 0, "updated": 0,
+                  "merged": 0, "skipped": 0, "failed": []}
+        for attempt in range(Config.INGEST_MAX_RETRIES + 1):
+            try:
+                counts = self.vector_db.index_claims(claims, skip_existing=skip_existing)
+                result["indexed"] = counts["inserted"]
+                for key in ("updated", "merged", "skipped"):
+                    result[key] = counts[key]
+                return result
+            except Exception as e:
+                if attempt == Config.INGEST_MAX_RETRIES:
+                    logger.error(f"Giving up on a batch of {len(claims)} claims: {str(e)}")
+                    result["failed"] = claims
+                    return result
+                logger.warning(f"Batch failed ({str(e)}), retrying")
+                time.sleep(Config.INGEST_BACKOFF * (2 ** attempt))
+
+    def ingest(self, path: str, skip_existing: bool = True, failed_path: Optional[str] = None) -> Dict:
+        """Ingest a corpus, resuming from the checkpoint and returning the run totals"""
+        source = os.path.abspath(path)
+        checkpoint = self._load_checkpoint(source)
+        keys = ("records", "indexed", "updated", "merged", "skipped", "invalid", "failed")
+        totals = {key: checkpoint.get(key, 0) for key in keys}
+        if totals["records"]:
+            logger.info(f"Resuming {path} after {totals['records']} records")
+
+        records = islice(iter_claims(path), totals["records"], None)
+        started = time.perf_counter()
+        processed = 0
+
+        # Bulk writes are persisted at checkpoints rather than after every batch
+        store = self.vector_db.store
+        autosave = getattr(store, "autosave", None)
+        if autosave is not None:
+            store.autosave = False
+
+        failed_file = None
+        # Batches complete in any order, but are committed in input order so the checkpoint
+        # never skips a batch that is still running
+        in_flight = deque()
+        batches = 0
+        try:
+            with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="ingest") as executor:
+                while True:
+                    batch = list(islice(records, self.batch_size))
+                    if batch:
+                        in_flight.append(executor.submit(self._index_batch, batch, skip_existing))
+                    if not in_flight:
+                        break
+                    if batch and len(in_flight) < 2 * self.workers:
+                        continue
+
+                    result = in_flight.popleft().result()
+                    for key in ("records", "indexed", "updated", "merged", "skipped", "invalid"):
+                        totals[key] += result[key]
+                    totals["failed"] += len(result["failed"])
+                    processed += result["records"]
+                    if result["failed"] and failed_path:
+                        if failed_file is None:
+                            failed_file = open(failed_path, "a", encoding="utf-8")
+                        for claim in result["failed"]:
+                            failed_file.write(json.dumps(claim) + "\n")
+
+                    batches += 1
+                    if batches % self.checkpoint_every == 0:
+                        self._save_checkpoint(dict(totals, source=source))
+                        self._log_progress(totals, processed, started)
+
+            self._save_checkpoint(dict(totals, source=source, complete=True))
+        finally:
+            if failed_file is not None:
+                failed_file.close()
+            if autosave is not None:
+                store.autosave = autosave
+
+        self._log_progress(totals, processed, started)
+        totals["records_per_second"] = processed / max(time.perf_counter() - started, 1e-9)
+        return totals
+
+    @staticmethod
+    def _log_progress(totals: Dict, processed: int, started: float):
+        rate = processed / max(time.perf_counter() - started, 1e-9)
+        logger.info(
+            f"Ingested {totals['records']} records ({totals['indexed']} indexed, {totals['updated']} updated, "
+            f"{totals['merged']} merged into near-duplicates, {totals['skipped']} already indexed, "
+            f"{totals['invalid']} invalid, {totals['failed']} failed) at {rate:.1f} records/s"
+        )
@@ -0,0 +1,173 @@
+import os
+import re
+import json
+import math
+import heapq
+import logging
+import threading
+from collections import Counter
+from typing import Dict, List, Tuple
+from config.settings import Config
+from utils.file_lock import FileLock
+
+logger = logging.getLogger(__name__)
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+STOPWORDS = frozenset("""
+a an and are as at be been but by can could do does for from has have how if in into is it its may
+might more no not of on or so such than that the their then there these this those to was were what
+when which who will with would you your
+""".split())
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word and number tokens, so names like "B12" or "ivermectin" match exactly"""
+    return [token for token in TOKEN_PATTERN.findall(text.lower()) if token not in STOPWORDS]
+
+class LexicalIndex:
+    """In-memory BM25 inverted index kept in step with the vector store"""
+    def __init__(self, path: str = Config.LEXICAL_INDEX_PATH, k1: float = Config.BM25_K1, b: float = Config.BM25_B):
+        self.path = path
+        self.k1 = k1
+        self.b = b
+        self._lock = threading.RLock()
+        # Documents are addressed by a dense slot number; postings map term -> {slot: term frequency}
+        self._postings: Dict[str, Dict[int, int]] = {}
+        self._slots: Dict[str, int] = {}
+        self._ids: List[str] = []
+        self._terms: List[Dict[str, int]] = []
+        self._lengths: List[int] = []
+        self._free: List[int] = []
+        self._total_length = 0
+        self._dirty = False
+        # Each process flushes its own copy over the file, so only one may have it open
+        self._file_lock = FileLock(path + ".lock") if path else None
+        if self._file_lock:
+            self._file_lock.acquire()
+        self._load()
+
+    def count(self) -> int:
+        """Number of indexed documents"""
+        return len(self._slots)
+
+    def _load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r") as f:
+                stored = json.load(f)
+            for doc_id, terms in stored.get("documents", {}).items():
+                self._add_terms(doc_id, terms)
+            self._dirty = False
+            logger.info(f"Loaded lexical index with {self.count()} documents from {self.path}")
+        except Exception as e:
+            logger.error(f"Failed to load lexical index, it will be rebuilt: {str(e)}")
+            self.clear()
+
+    def flush(self):
+        """Atomically write the index to disk"""
+        with self._lock:
+            if not self.path or not self._dirty:
+                return
+            documents = {doc_id: self._terms[slot] for doc_id, slot in self._slots.items()}
+            self._dirty = False
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.path + ".tmp", "w") as f:
+            json.dump({"documents": documents}, f)
+        os.replace(self.path + ".tmp", self.path)
+
+    def close(self):
+        """Flush the index and release it for other processes"""
+        try:
+            self.flush()
+        finally:
+            if self._file_lock:
+                self._file_lock.release()
+
+    def clear(self):
+        with self._lock:
+            self._postings.clear()
+            self._slots.clear()
+            self._ids = []
+            self._terms = []
+            self._lengths = []
+            self._free = []
+            self._total_length = 0
+            self._dirty = True
+
+    def add(self, doc_id: str, text: str):
+        """Index a document, replacing any previous version with the same id"""
+        self._add_terms(doc_id, dict(Counter(tokenize(text))))
+
+    def _add_terms(self, doc_id: str, terms: Dict[str, int]):
+        with self._lock:
+            self._remove(doc_id)
+            if self._free:
+                slot = self._free.pop()
+                self._ids[slot] = doc_id
+                self._terms[slot] = terms
+                self._lengths[slot] = sum(terms.values())
+            else:
+                slot = len(self._ids)
+                self._ids.append(doc_id)
+                self._terms.append(terms)
+                self._lengths.append(sum(terms.values()))
+            self._slots[doc_id] = slot
+            for term, frequency in terms.items():
+                self._postings.setdefault(term, {})[slot] = frequency
+            self._total_length += self._lengths[slot]
+            self._dirty = True
+
+    def _remove(self, doc_id: str):
+        slot = self._slots.pop(doc_id, None)
+        if slot is None:
+            return
+        terms = self._terms[slot]
+        for term in terms:
+            postings = self._postings.get(term)
+            if postings is not None:
+                postings.pop(slot, None)
+                if not postings:
+                    del self._postings[term]
+        self._total_length -= self._lengths[slot]
+        self._terms[slot] = {}
+        self._lengths[slot] = 0
+        self._free.append(slot)
+
+    def remove(self, doc_id: str):
+        """Drop a document from the index"""
+        with self._lock:
+            self._remove(doc_id)
+            self._dirty = True
+
+    def search(self, query: str, top_k: int = 20) -> List[Tuple[str, float]]:
+        """
+        Return up to top_k (id, score) pairs ranked by BM25.
+
+        Scores are divided by the score of an average-length document that contains every
+        query term once and capped at 1, so they compare across queries.
+        """
+        query_terms = set(tokenize(query))
+        with self._lock:
+            documents = len(self._slots)
+            if not documents or not query_terms:
+                return []
+            average_length = self._total_length / documents
+
+            scores: Dict[int, float] = {}
+            reference = 0.0
+            for term in query_terms:
+                postings = self._postings.get(term)
+                document_frequency = len(postings) if postings else 0
+                idf = math.log(1 + (documents - document_frequency + 0.5) / (document_frequency + 0.5))
+                reference += idf
+                if not postings:
+                    continue
+                for slot, frequency in postings.items():
+                    norm = self.k1 * (1 - self.b + self.b * self._lengths[slot] / average_length)
+                    scores[slot] = scores.get(slot, 0.0) + idf * frequency * (self.k1 + 1) / (frequency + norm)
+
+            ranked = heapq.nlargest(top_k, scores.items(), key=lambda item: item[1])
+            return [(self._ids[slot], min(1.0, score / reference)) for slot, score in ranked]
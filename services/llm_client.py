@@ -0,0 +1,299 @@
+import asyncio
+import logging
+import threading
+from abc import ABC, abstractmethod
+from typing import AsyncIterator, Dict, List, Optional
+from config.settings import Config
+from .http_client import HttpClient, get_http_client, run_sync
+from .prompt_budget import PromptBudget, TokenCounter
+from .telemetry import get_telemetry
+
+logger = logging.getLogger(__name__)
+telemetry = get_telemetry()
+
+class LLMClient(ABC):
+    """Interface shared by the text generation backends"""
+    model_name = ""
+    backend_name = ""
+    context_window = Config.LLM_CONTEXT_TOKENS
+    default_new_tokens = Config.LLM_MAX_NEW_TOKENS
+
+    def __init__(self):
+        self.prefixes: List[str] = []
+        self._budget: Optional[PromptBudget] = None
+        self._warm = False
+
+    @property
+    def budget(self) -> PromptBudget:
+        """Token budget of the model's context window, for sizing prompts"""
+        if self._budget is None:
+            self._budget = PromptBudget(self._token_counter(), self.context_window)
+        return self._budget
+
+    def _token_counter(self) -> TokenCounter:
+        """Backend hook: a counter using the model's tokenizer"""
+        return TokenCounter(self.model_name)
+
+    def _record_tokens(self, prompt: str, completion: Optional[str], prompt_tokens: Optional[int] = None,
+                       completion_tokens: Optional[int] = None):
+        """Count prompt and completion tokens while metrics are enabled, tokenizing off the event loop"""
+        if not telemetry.enabled:
+            return
+        if prompt_tokens is not None and completion_tokens is not None:
+            self._count_tokens(prompt, completion, prompt_tokens, completion_tokens)
+            return
+        # Fire and forget: a report prompt takes milliseconds to tokenize
+        asyncio.get_running_loop().run_in_executor(
+            None, self._count_tokens, prompt, completion, prompt_tokens, completion_tokens
+        )
+
+    def _count_tokens(self, prompt: str, completion: Optional[str], prompt_tokens: Optional[int],
+                      completion_tokens: Optional[int]):
+        try:
+            counter = self.budget.counter
+            if prompt_tokens is None:
+                prompt_tokens = counter.count(prompt)
+            if completion_tokens is None:
+                completion_tokens = counter.count(completion) if completion else 0
+        except Exception as e:
+            logger.debug(f"Token counting failed: {str(e)}")
+            return
+        telemetry.count("llm_tokens_total", prompt_tokens, direction="in", backend=self.backend_name)
+        if completion_tokens:
+            telemetry.count("llm_tokens_total", completion_tokens, direction="out", backend=self.backend_name)
+
+    def register_prefix(self, prefix: str):
+        """Declare a prompt prefix shared by many requests (e.g. a system prompt) so backends can pre-compute it"""
+        if prefix and prefix not in self.prefixes:
+            self.prefixes.append(prefix)
+            self._prime(prefix)
+
+    def _prime(self, prefix: str):
+        """Backend hook to pre-compute a shared prefix"""
+
+    def generate(self, prompt: str, max_new_tokens: Optional[int] = None) -> Optional[str]:
+        """Generate a completion for the prompt, or None on failure"""
+        return run_sync(self.generate_async(prompt, max_new_tokens))
+
+    @abstractmethod
+    async def generate_async(self, prompt: str, max_new_tokens: Optional[int] = None) -> Optional[str]:
+        """Generate a completion (without the prompt) for the prompt, or None on failure"""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def stream_async(self, prompt: str, max_new_tokens: Optional[int] = None) -> AsyncIterator[str]:
+        """Yield completion text as it is generated"""
+        raise NotImplementedError
+        yield  # pragma: no cover
+
+    def warm_up(self):
+        """Load the tokenizer used to size prompts and whatever the backend needs before the first request; runs once"""
+        if self._warm:
+            return
+        self.budget.counter.load()
+        self._warm_up()
+        self._warm = True
+
+    def _warm_up(self):
+        """Backend hook to load resources before the first request"""
+
+    def close(self):
+        """Release backend resources"""
+
+class HuggingFaceLLMClient(LLMClient):
+    """Remote generation through the Hugging Face Inference API"""
+    backend_name = "huggingface"
+
+    def __init__(self, model_name: str = Config.LLM_MODEL, http_client: HttpClient = None):
+        super().__init__()
+        self.model_name = model_name
+        self.api_url = f"{Config.HF_INFERENCE_URL}/{model_name}"
+        self.headers = {"Authorization": f"Bearer {Config.HF_TOKEN}"}
+        self.http = http_client or get_http_client()
+
+    def _payload(self, prompt: str, max_new_tokens: Optional[int], stream: bool = False) -> Dict:
+        parameters = {"return_full_text": False, "max_new_tokens": max_new_tokens or self.default_new_tokens}
+        payload = {"inputs": prompt, "parameters": parameters}
+        if stream:
+            payload["stream"] = True
+        return payload
+
+    async def generate_async(self, prompt: str, max_new_tokens: Optional[int] = None) -> Optional[str]:
+        response = await self.http.post(
+            self.api_url,
+            headers=self.headers,
+            json=self._payload(prompt, max_new_tokens),
+            timeout=Config.LLM_TIMEOUT
+        )
+        if response.status_code != 200:
+            logger.error(f"LLM API error: {response.status_code}")
+            return None
+
+        result = response.json()
+        if not isinstance(result, list) or not result:
+            logger.error("Invalid response from LLM API")
+            return None
+        text = result[0].get("generated_text", "")
+        self._record_tokens(prompt, text)
+        return text
+
+    async def stream_async(self, prompt: str, max_new_tokens: Optional[int] = None) -> AsyncIterator[str]:
+        events = self.http.stream_sse(
+            self.api_url,
+            headers=self.headers,
+            json=self._payload(prompt, max_new_tokens, stream=True),
+            timeout=Config.LLM_TIMEOUT
+        )
+        parts = []
+        try:
+            async for event in events:
+                token = event.get("token", {})
+                if token.get("special"):
+                    continue
+                text = token.get("text", "")
+                if text:
+                    parts.append(text)
+                    yield text
+        finally:
+            # Every streamed event carries one generated token
+            self._record_tokens(prompt, None, completion_tokens=len(parts))
+
+class LlamaCppTokenCounter(TokenCounter):
+    """Token counting with the vocabulary of a loaded GGUF model"""
+    def __init__(self, llm, model_name: str):
+        super().__init__(model_name)
+        self.llm = llm
+        self._loaded = True
+
+    def _encode(self, text: str) -> Optional[List[int]]:
+        return self.llm.tokenize(text.encode("utf-8"), add_bos=False)
+
+    def _decode(self, tokens: List[int]) -> str:
+        return self.llm.detokenize(tokens).decode("utf-8", errors="ignore")
+
+class LlamaCppLLMClient(LLMClient):
+    """Local CPU generation with a GGUF model kept resident through llama.cpp"""
+    backend_name = "llama_cpp"
+
+    def __init__(self, model_path: str = Config.LOCAL_LLM_MODEL_PATH, n_threads: int = Config.LOCAL_LLM_THREADS,
+                 n_ctx: int = Config.LOCAL_LLM_CONTEXT, cache_bytes: int = Config.LOCAL_LLM_CACHE_BYTES):
+        super().__init__()
+        from llama_cpp import Llama, LlamaRAMCache
+
+        if not model_path:
+            raise ValueError("LOCAL_LLM_MODEL_PATH must point to a GGUF model for the llama_cpp backend")
+        self.model_name = model_path
+        self.context_window = n_ctx
+        self.default_new_tokens = Config.LOCAL_LLM_MAX_NEW_TOKENS
+        self.llm = Llama(
+            model_path=model_path,
+            n_ctx=n_ctx,
+            n_threads=n_threads,
+            n_threads_batch=n_threads,
+            verbose=False
+        )
+        # Saved KV states are matched by longest token prefix, so prompts that start with a
+        # registered system prompt skip re-evaluating it
+        self.llm.set_cache(LlamaRAMCache(capacity_bytes=cache_bytes))
+        # A llama.cpp context is not re-entrant
+        self._lock = threading.Lock()
+        logger.info(f"Loaded local LLM from {model_path} with {n_threads} threads")
+
+    def _token_counter(self) -> TokenCounter:
+        return LlamaCppTokenCounter(self.llm, self.model_name)
+
+    def _warm_up(self):
+        """Run a one-token completion so the weights are paged in before the first request"""
+        with self._lock:
+            self.llm.create_completion(" ", max_tokens=1)
+
+    def _prime(self, prefix: str):
+        """Evaluate a shared prefix once so its KV state lands in the cache"""
+        with self._lock:
+            self.llm.create_completion(prefix, max_tokens=1)
+
+    def _complete(self, prompt: str, max_new_tokens: Optional[int]) -> Dict:
+        with self._lock:
+            return self.llm.create_completion(prompt, max_tokens=max_new_tokens or self.default_new_tokens)
+
+    async def generate_async(self, prompt: str, max_new_tokens: Optional[int] = None) -> Optional[str]:
+        # Inference is CPU-bound, keep it off the event loop
+        result = await asyncio.to_thread(self._complete, prompt, max_new_tokens)
+        text = result["choices"][0]["text"]
+        usage = result.get("usage") or {}
+        self._record_tokens(prompt, text, usage.get("prompt_tokens"), usage.get("completion_tokens"))
+        return text
+
+    async def stream_async(self, prompt: str, max_new_tokens: Optional[int] = None) -> AsyncIterator[str]:
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+        done = object()
+        cancelled = threading.Event()
+
+        def produce():
+            try:
+                with self._lock:
+                    chunks = self.llm.create_completion(
+                        prompt,
+                        max_tokens=max_new_tokens or self.default_new_tokens,
+                        stream=True
+                    )
+                    for chunk in chunks:
+                        if cancelled.is_set():
+                            break
+                        loop.call_soon_threadsafe(queue.put_nowait, chunk["choices"][0]["text"])
+            except Exception as e:
+                loop.call_soon_threadsafe(queue.put_nowait, e)
+            finally:
+                loop.call_soon_threadsafe(queue.put_nowait, done)
+
+        producer = asyncio.ensure_future(asyncio.to_thread(produce))
+        parts = []
+        try:
+            while True:
+                item = await queue.get()
+                if item is done:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                if item:
+                    parts.append(item)
+                    yield item
+        finally:
+            cancelled.set()
+            await producer
+            # One streamed chunk per generated token
+            self._record_tokens(prompt, None, completion_tokens=len(parts))
+
+    def close(self):
+        close = getattr(self.llm, "close", None)
+        if callable(close):
+            close()
+
+def create_llm_client(backend: Optional[str] = None, http_client: HttpClient = None) -> LLMClient:
+    """Build the LLM client selected by configuration, warmed up so no request loads the tokenizer"""
+    backend = (backend or Config.LLM_BACKEND).lower()
+    if backend == "huggingface":
+        client = HuggingFaceLLMClient(http_client=http_client)
+    elif backend == "llama_cpp":
+        client = LlamaCppLLMClient()
+    else:
+        raise ValueError(f"Unknown LLM backend: {backend}")
+    try:
+        client.warm_up()
+    except Exception as e:
+        # A failed warm-up only costs latency on the first real request
+        logger.warning(f"LLM warm-up failed: {str(e)}")
+    return client
+
+_llm_client: Optional[LLMClient] = None
+_llm_client_lock = threading.Lock()
+
+def get_llm_client() -> LLMClient:
+    """Return the process-wide LLM client, so a local model is only loaded once"""
+    global _llm_client
+    if _llm_client is None:
+        with _llm_client_lock:
+            if _llm_client is None:
+                _llm_client = create_llm_client()
+    return _llm_client
@@ -1,126 +1,311 @@
+import asyncio
 import logging
-import requests
-from typing import Dict, List, Tuple
+from itertools import islice
+from typing import AsyncIterator, Dict, Iterable, Iterator, List, Optional, Tuple
 from config.settings import Config
+from utils.text_processing import normalize_text
+from .http_client import iter_sync, run_sync
+from .llm_client import LLMClient, get_llm_client
+from .single_flight import SingleFlight
+from .telemetry import get_telemetry
+from .verdict_cache import SemanticVerdictCache
 
 logger = logging.getLogger(__name__)
+telemetry = get_telemetry()
 
 class MedVerifyAssistant:
     """Assistant for verifying medical claims with RAG and web search"""
-    def __init__(self, vector_db, web_search, claim_processor):
+    TECHNICAL_ISSUE_RESPONSE = "I encountered a technical issue while analyzing this claim. Please try again later."
+    ERROR_RESPONSE = "I encountered an error while analyzing this claim. Please try again later."
+    SYSTEM_PROMPT = (
+        "You are MedClarify, an expert-level medical claim verification assistant. "
+        "Your job is to evaluate health-related claims using only the specific evidence provided. "
+        "You respond with clear, structured, and scientifically grounded analysis. "
+        "Do not include personal opinions, and do not introduce information that is not explicitly in the provided sources. "
+        "Be transparent and concise in your assessments."
+    )
+
+    def __init__(self, vector_db, web_search, claim_processor, verdict_cache: SemanticVerdictCache = None,
+                 llm: LLMClient = None):
         self.vector_db = vector_db
         self.web_search = web_search
         self.claim_processor = claim_processor
-        self.hf_api_url = "https://api-inference.huggingface.co/models/mistralai/Mistral-7B-Instruct-v0.3"
-        self.headers = {"Authorization": f"Bearer {Config.HF_TOKEN}"}
+        self.verdict_cache = verdict_cache or SemanticVerdictCache()
+        self.llm = llm or get_llm_client()
+        # Concurrent requests for the same claim share one verdict and one evidence lookup
+        self.verdict_flights = SingleFlight()
+        self.evidence_flights = SingleFlight()
+        # Every verification prompt starts with the system prompt
+        self.llm.register_prefix(self.SYSTEM_PROMPT)
+        telemetry.register_cache("verdict", self.verdict_cache.stats)
         
     def verify_claim(self, claim: str, top_k: int = 5) -> Tuple[str, List[Dict], bool]:
         """Verify a health claim using RAG and web search if needed"""
-        # Step 1: Search vector database
-        db_results = self.vector_db.search(claim, top_k=top_k)
+        return run_sync(self.verify_claim_async(claim, top_k=top_k))
+
+    async def verify_claim_async(self, claim: str, top_k: int = 5,
+                                 db_results: Optional[List[Dict]] = None) -> Tuple[str, List[Dict], bool]:
+        """Verify a health claim using RAG and web search if needed, without blocking the event loop"""
+        return await self.verdict_flights.run(
+            self._flight_key(claim, top_k),
+            lambda: self._verify_claim_async(claim, top_k, db_results),
+            embed=lambda: self._embed_claim_async(claim),
+            group=top_k
+        )
+
+    async def _verify_claim_async(self, claim: str, top_k: int,
+                                  db_results: Optional[List[Dict]] = None) -> Tuple[str, List[Dict], bool]:
+        """Run a single verification; callers go through the single-flight group"""
+        with telemetry.span("verify"):
+            evidence = await self._gather_evidence_async(claim, top_k, db_results)
+            if evidence["cached_response"] is not None:
+                return evidence["cached_response"], evidence["results"], evidence["new_content_added"]
+
+            response = await self._generate_response_async(claim, evidence["results"], top_k)
+            self._cache_verdict(evidence, top_k, response)
+            return response, evidence["results"], evidence["new_content_added"]
+
+    def verify_claims(self, claims: Iterable[str], top_k: int = 5) -> Iterator[Tuple[int, Tuple[str, List[Dict], bool]]]:
+        """Verify many claims, yielding (position, verify_claim result) pairs as each one finishes"""
+        return iter_sync(self.verify_claims_async(claims, top_k=top_k))
+
+    async def verify_claims_async(self, claims: Iterable[str],
+                                  top_k: int = 5) -> AsyncIterator[Tuple[int, Tuple[str, List[Dict], bool]]]:
+        """
+        Verify many claims, yielding (position, result) pairs in completion order.
+
+        Claims are read BATCH_SEARCH_SIZE at a time; each chunk is embedded in one encode and
+        searched in bulk, then verified with at most BATCH_CONCURRENCY claims in flight so the
+        LLM and web fallbacks stay within the HTTP pool's per-host limits.
+        """
+        claims = iter(claims)
+        semaphore = asyncio.Semaphore(Config.BATCH_CONCURRENCY)
+
+        async def verify(position: int, claim: str, db_results: List[Dict]):
+            async with semaphore:
+                try:
+                    return position, await self.verify_claim_async(claim, top_k, db_results=db_results)
+                except Exception as e:
+                    logger.error(f"Batch verification error for claim {position}: {str(e)}")
+                    return position, (self.ERROR_RESPONSE, [], False)
+
+        pending = set()
+        position = 0
+        try:
+            while True:
+                chunk = list(islice(claims, Config.BATCH_SEARCH_SIZE))
+                if chunk:
+                    searched = await asyncio.to_thread(
+                        self.vector_db.search_many, chunk, top_k, min_score=Config.RELEVANCE_THRESHOLD
+                    )
+                    for claim, db_results in zip(chunk, searched):
+                        pending.add(asyncio.create_task(verify(position, claim, db_results)))
+                        position += 1
+
+                # Drain until the backlog is small enough to search the next chunk, or to the end
+                while pending and (not chunk or len(pending) > Config.BATCH_CONCURRENCY):
+                    done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                    for task in done:
+                        yield task.result()
+                if not chunk:
+                    break
+        finally:
+            # The consumer stopped early
+            for task in pending:
+                task.cancel()
+
+    def verify_claim_stream(self, claim: str, top_k: int = 5) -> Tuple[Iterator[str], List[Dict], bool]:
+        """Retrieve evidence, then return an iterator over the verdict tokens as they are generated"""
+        evidence = run_sync(self._gather_evidence_async(claim, top_k))
+        if evidence["cached_response"] is not None:
+            tokens = iter([evidence["cached_response"]])
+        else:
+            tokens = iter_sync(self._stream_verdict_async(claim, evidence, top_k))
+        return tokens, evidence["results"], evidence["new_content_added"]
+
+    async def _stream_verdict_async(self, claim: str, evidence: Dict, top_k: int) -> AsyncIterator[str]:
+        """Stream the verdict and cache it once it is complete"""
+        chunks = []
+        try:
+            async for token in self._stream_response_async(claim, evidence["results"], top_k):
+                chunks.append(token)
+                yield token
+        except Exception as e:
+            # A verdict cut short is shown as is but never cached
+            logger.error(f"Response streaming error: {str(e)}")
+            if not chunks:
+                yield self.TECHNICAL_ISSUE_RESPONSE
+            return
+        self._cache_verdict(evidence, top_k, "".join(chunks).strip())
+
+    @staticmethod
+    def _flight_key(claim: str, top_k: int) -> str:
+        return f"{top_k}:{normalize_text(claim)}"
+
+    async def _embed_claim_async(self, claim: str):
+        """Embed a claim through the query cache, off the event loop"""
+        return (await asyncio.to_thread(self.vector_db.embed_queries, [claim]))[0]
+
+    async def _gather_evidence_async(self, claim: str, top_k: int, db_results: Optional[List[Dict]] = None) -> Dict:
+        """Collect the evidence a verdict is generated from, shared by concurrent requests for the same claim"""
+        return await self.evidence_flights.run(
+            self._flight_key(claim, top_k),
+            lambda: self._collect_evidence_async(claim, top_k, db_results),
+            embed=lambda: self._embed_claim_async(claim),
+            group=top_k
+        )
+
+    async def _collect_evidence_async(self, claim: str, top_k: int, db_results: Optional[List[Dict]] = None) -> Dict:
+        """Collect the evidence a verdict is generated from, short-circuiting on a cached verdict"""
+        evidence = {"results": [], "new_content_added": False, "cached_response": None, "cache_key": None}
+
+        # Step 1: Search vector database (embedding and index calls are blocking, run them in a thread),
+        # unless a bulk search already did
+        if db_results is None:
+            with telemetry.span("retrieval"):
+                db_results = await asyncio.to_thread(
+                    self.vector_db.search, claim, top_k, min_score=Config.RELEVANCE_THRESHOLD
+                )
         
-        # Step 2: Determine if results are relevant enough
-        relevant_results = [r for r in db_results if r["relevance_score"] > 0.75]
+        # Step 2: Determine if results are relevant enough; the search already dropped every
+        # candidate under RELEVANCE_THRESHOLD, so the same cut applies to single and bulk searches
+        relevant_results = db_results
         
         # If we have relevant results, use them
-        if relevant_results:  # Only items with score > 0.75
+        if relevant_results:  # Only items above the relevance threshold
             logger.info(f"Found {len(relevant_results)} relevant results in vector database")
-            response = self._generate_response(claim, relevant_results, top_k)
-            return response, relevant_results, False
+            evidence["results"] = relevant_results
+
+            # Reuse the verdict of a near-identical claim answered from the same evidence
+            evidence_ids = [r.get("id") for r in relevant_results]
+            claim_embedding = await self._embed_claim_async(claim)
+            evidence["cache_key"] = (claim_embedding, evidence_ids, self.vector_db.revision)
+            cached = self.verdict_cache.get(claim_embedding, top_k, evidence_ids, revision=self.vector_db.revision)
+            if cached is not None:
+                logger.info("Returning cached verdict for semantically equivalent claim")
+                evidence["cached_response"] = cached["response"]
+                evidence["results"] = cached["results"]
+            telemetry.count("evidence_source_total", source="verdict_cache" if cached is not None else "database")
+            return evidence
         
         # Step 3: If no relevant results, perform web search
         logger.info("No relevant results in database, performing web search")
-        web_content = self.web_search.search_health_claim(claim)
+        with telemetry.span("web_search"):
+            web_content = await self.web_search.search_health_claim_async(claim)
         
         if not web_content:
             # No web results either
             logger.info("No relevant web content found")
-            response = self._generate_response(claim, [], top_k)
-            return response, [], False
+            telemetry.count("evidence_source_total", source="none")
+            return evidence
         
-        # Step 4: Synthesize web content into a health claim
-        synthesized_claim = self.claim_processor.synthesize_web_content(claim, web_content)
+        # Step 4: Keep the passages closest to the claim and synthesize them into a health claim
+        with telemetry.span("passage_selection"):
+            try:
+                claim_embedding = await self._embed_claim_async(claim)
+                web_content = await asyncio.to_thread(
+                    self.web_search.select_passages, web_content, claim_embedding, self.vector_db.embed_texts
+                )
+            except Exception as e:
+                # Synthesis still works on the unranked pages, just with a longer prompt
+                logger.error(f"Passage selection failed, using the full web content: {str(e)}")
+        with telemetry.span("synthesis"):
+            synthesized_claim = await self.claim_processor.synthesize_web_content_async(claim, web_content)
+        telemetry.count("evidence_source_total", source="web" if synthesized_claim else "none")
         
         # Step 5: Add to vector database if valid
-        new_content_added = False
         if synthesized_claim:
             logger.info("Adding synthesized claim to vector database")
-            success = self.vector_db.add_claim(synthesized_claim)
-            new_content_added = success
+            with telemetry.span("index_update"):
+                evidence["new_content_added"] = await asyncio.to_thread(self.vector_db.add_claim, synthesized_claim)
             
             # Use synthesized claim as result
-            results = [synthesized_claim]
-            response = self._generate_response(claim, results, top_k)
-            return response, results, new_content_added
+            evidence["results"] = [synthesized_claim]
         
-        # Fallback
-        response = self._generate_response(claim, [], top_k)
-        return response, [], False
+        return evidence
+
+    def _cache_verdict(self, evidence: Dict, top_k: int, response: str):
+        """Remember a verdict generated from stored evidence"""
+        if evidence["cache_key"] is None or not response:
+            return
+        if response in (self.TECHNICAL_ISSUE_RESPONSE, self.ERROR_RESPONSE):
+            return
+        claim_embedding, evidence_ids, revision = evidence["cache_key"]
+        self.verdict_cache.set(
+            claim_embedding, top_k, evidence_ids,
+            {"response": response, "results": evidence["results"]},
+            revision=revision
+        )
     
     def _generate_response(self, claim: str, retrieved_claims: List[Dict], top_k: int = 3) -> str:
         """Generate a response based on the claim and retrieved information"""
-        try:
-            # Prepare context from retrieved claims
-            context = ""
-            # Sort retrieved claims by relevance score in descending order
-            sorted_claims = sorted(retrieved_claims, key=lambda x: x.get('relevance_score', 0), reverse=True)
-            
-            # Limit to top_k results
-            top_claims = sorted_claims[:top_k]
-            
-            if top_claims:
-                context = "Retrieved medical evidence (ONLY USE THESE SPECIFIC EVIDENCE ITEMS):\n\n"
-                for idx, result in enumerate(top_claims):
-                    context += f"Evidence #{idx+1} (Relevance: {result.get('relevance_score', 0):.2f}):\n"
-                    context += f"Claim: {result.get('claim', '')}\n"
-                    context += f"Evidence Level: {result.get('evidence_level', '')}\n"
-                    context += f"Explanation: {result.get('explanation', '')}\n\n"
-            
-            # Construct prompt
-            system_prompt = (
-                "You are MedClarify, an expert-level medical claim verification assistant. "
-                "Your job is to evaluate health-related claims using only the specific evidence provided. "
-                "You respond with clear, structured, and scientifically grounded analysis. "
-                "Do not include personal opinions, and do not introduce information that is not explicitly in the provided sources. "
-                "Be transparent and concise in your assessments."
-            )
+        return run_sync(self._generate_response_async(claim, retrieved_claims, top_k))
 
+    def _build_prompt(self, claim: str, retrieved_claims: List[Dict], top_k: int = 3) -> str:
+        """Build the verification prompt, fitting the most relevant evidence into the context window"""
+        # Sort retrieved claims by relevance score in descending order
+        sorted_claims = sorted(retrieved_claims, key=lambda x: x.get('relevance_score', 0), reverse=True)
+        
+        # Limit to top_k results
+        top_claims = sorted_claims[:top_k]
+        
+        # Construct prompt
+        instruction_prompt = (
+            f"Analyze the following health claim: \"{claim}\"\n\n"
+            "IMPORTANT INSTRUCTIONS:\n"
+            "1. ONLY reference the specific evidence items provided below\n"
+            "2. DO NOT create or generate your own evidence items\n"
+            "3. If an evidence item has low relevance, you can mention that it's not strongly related\n"
+            "4. Consider whether the claim appears to be supported by evidence\n"
+            "5. Analyse the claim's validity based on the evidence\n\n"
+        )
+        
+        if not top_claims:
+            instruction_prompt += "No directly relevant evidence was found in our database. Provide a general assessment based on established medical knowledge.\n"
+            return self.SYSTEM_PROMPT + instruction_prompt
+
+        context_header = "Retrieved Evidence:\nRetrieved medical evidence (ONLY USE THESE SPECIFIC EVIDENCE ITEMS):\n\n"
+        evidence_items = [
+            f"Evidence #{idx+1} (Relevance: {result.get('relevance_score', 0):.2f}):\n"
+            f"Claim: {result.get('claim', '')}\n"
+            f"Evidence Level: {result.get('evidence_level', '')}\n"
+            f"Explanation: {result.get('explanation', '')}\n\n"
+            for idx, result in enumerate(top_claims)
+        ]
+        # Evidence is already ranked; keep what fits next to the instructions and the verdict
+        budget = self.llm.budget
+        available = budget.available(self.SYSTEM_PROMPT + instruction_prompt + context_header, self.llm.default_new_tokens)
+        packed = budget.pack(evidence_items, available)
+        if sum(len(text) for _, text in packed) < sum(len(item) for item in evidence_items):
+            logger.info(f"Evidence trimmed to fit the prompt budget: {len(packed)} of {len(evidence_items)} items kept")
+        
+        context = "".join(text.rstrip() + "\n\n" for _, text in packed)
+        return self.SYSTEM_PROMPT + instruction_prompt + context_header + context + "\n"
+
+    async def _generate_response_async(self, claim: str, retrieved_claims: List[Dict], top_k: int = 3) -> str:
+        """Generate a response based on the claim and retrieved information without blocking the event loop"""
+        try:
+            # Fitting the evidence to the budget tokenizes it, keep it off the event loop
+            full_prompt = await asyncio.to_thread(self._build_prompt, claim, retrieved_claims, top_k)
             
-            instruction_prompt = (
-                f"Analyze the following health claim: \"{claim}\"\n\n"
-                "IMPORTANT INSTRUCTIONS:\n"
-                "1. ONLY reference the specific evidence items provided below\n"
-                "2. DO NOT create or generate your own evidence items\n"
-                "3. If an evidence item has low relevance, you can mention that it's not strongly related\n"
-                "4. Consider whether the claim appears to be supported by evidence\n"
-                "5. Analyse the claim's validity based on the evidence\n\n"
-            )
-            
-            if context:
-                instruction_prompt += f"Retrieved Evidence:\n{context}\n"
-            else:
-                instruction_prompt += "No directly relevant evidence was found in our database. Provide a general assessment based on established medical knowledge.\n"
-            
-            full_prompt = system_prompt + instruction_prompt
-            
-            # Call the LLM API
-            response = requests.post(
-                self.hf_api_url,
-                headers=self.headers,
-                json={"inputs": full_prompt}
-            )
+            # Call the LLM
+            with telemetry.span("generation"):
+                generated_text = await self.llm.generate_async(full_prompt)
             
-            if response.status_code == 200:
-                result = response.json()
-                if isinstance(result, list) and result:
-                    generated_text = result[0].get("generated_text", "")
-                    # Remove the prompt from response
-                    response_only = generated_text.replace(full_prompt, "").strip()
-                    return response_only
+            if generated_text is not None:
+                # Remove the prompt from response, should a backend echo it
+                response_only = generated_text.replace(full_prompt, "").strip()
+                return response_only
             
-            logger.error(f"LLM API error: {response.status_code}")
-            return "I encountered a technical issue while analyzing this claim. Please try again later."
+            return self.TECHNICAL_ISSUE_RESPONSE
             
         except Exception as e:
             logger.error(f"Response generation error: {str(e)}")
-            return "I encountered an error while analyzing this claim. Please try again later."
\ No newline at end of file
+            return self.ERROR_RESPONSE
+
+    async def _stream_response_async(self, claim: str, retrieved_claims: List[Dict], top_k: int = 3) -> AsyncIterator[str]:
+        """Yield response tokens as the LLM generates them; errors propagate so a partial verdict is recognizable"""
+        full_prompt = await asyncio.to_thread(self._build_prompt, claim, retrieved_claims, top_k)
+        with telemetry.span("generation"):
+            async for text in self.llm.stream_async(full_prompt):
+                yield text
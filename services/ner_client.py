@@ -0,0 +1,143 @@
+import asyncio
+import logging
+import threading
+from abc import ABC, abstractmethod
+from typing import Dict, Iterable, List, Optional
+from config.settings import Config
+from .http_client import HttpClient, get_http_client
+
+logger = logging.getLogger(__name__)
+
+def collect_terms(entities: Iterable[Dict], min_length: int = 4) -> List[str]:
+    """Entity words long enough to be worth explaining, de-duplicated in order of appearance"""
+    terms: Dict[str, str] = {}
+    for entity in entities:
+        term = str(entity.get("word", "")).strip()
+        if len(term) >= min_length and term.lower() not in terms:
+            terms[term.lower()] = term
+    return list(terms.values())
+
+class NERClient(ABC):
+    """Interface shared by the biomedical named-entity recognition backends"""
+    model_name = ""
+
+    @abstractmethod
+    async def extract_terms_async(self, texts: List[str]) -> List[Optional[List[str]]]:
+        """Medical terms of each text in order of appearance, with None for each text that failed"""
+        raise NotImplementedError
+
+    def warm_up(self):
+        """Load whatever the backend needs before the first request"""
+
+    def close(self):
+        """Release backend resources"""
+
+class HuggingFaceNERClient(NERClient):
+    """Remote token classification through the Hugging Face Inference API"""
+    def __init__(self, model_name: str = Config.NER_MODEL, http_client: HttpClient = None):
+        self.model_name = model_name
+        self.url = f"{Config.HF_INFERENCE_URL}/{model_name}"
+        self.headers = {"Authorization": f"Bearer {Config.HF_TOKEN}"}
+        self.http = http_client or get_http_client()
+
+    async def _extract_async(self, text: str) -> Optional[List[str]]:
+        response = await self.http.post(
+            self.url,
+            headers=self.headers,
+            json={"inputs": text},
+            timeout=Config.LLM_TIMEOUT
+        )
+        if response.status_code != 200:
+            logger.error(f"NER model error: {response.status_code}")
+            return None
+
+        result = response.json()
+        if not isinstance(result, list):
+            logger.error(f"Unexpected NER response: {str(result)[:200]}")
+            return None
+        return collect_terms(result)
+
+    async def extract_terms_async(self, texts: List[str]) -> List[Optional[List[str]]]:
+        # One request per text, bounded like the other per-chunk report calls
+        semaphore = asyncio.Semaphore(Config.REPORT_CHUNK_CONCURRENCY)
+
+        async def extract(text: str) -> Optional[List[str]]:
+            async with semaphore:
+                try:
+                    return await self._extract_async(text)
+                except Exception as e:
+                    logger.error(f"NER request failed: {str(e)}")
+                    return None
+
+        return list(await asyncio.gather(*(extract(text) for text in texts)))
+
+class OnnxNERClient(NERClient):
+    """Local CPU token classification with an ONNX (optionally quantized) export of the NER model"""
+    def __init__(self, model_path: str = Config.LOCAL_NER_MODEL, file_name: str = Config.LOCAL_NER_FILE,
+                 n_threads: int = Config.LOCAL_NER_THREADS, batch_size: int = Config.LOCAL_NER_BATCH_SIZE):
+        import onnxruntime
+        from optimum.onnxruntime import ORTModelForTokenClassification
+        from transformers import AutoTokenizer, pipeline
+
+        if not model_path:
+            raise ValueError("LOCAL_NER_MODEL must name an ONNX export of the NER model for the onnx backend")
+        self.model_name = model_path
+        self.batch_size = batch_size
+        options = onnxruntime.SessionOptions()
+        options.intra_op_num_threads = n_threads
+        model = ORTModelForTokenClassification.from_pretrained(
+            model_path,
+            file_name=file_name or None,
+            session_options=options
+        )
+        self.pipeline = pipeline(
+            "token-classification",
+            model=model,
+            tokenizer=AutoTokenizer.from_pretrained(model_path),
+            aggregation_strategy="simple"
+        )
+        # An ONNX Runtime session already uses every intra-op thread; run one batch at a time
+        self._lock = threading.Lock()
+        logger.info(f"Loaded local NER model from {model_path} with {n_threads} threads")
+
+    def warm_up(self):
+        """Classify a short text so the session is initialized before the first report"""
+        self._classify(["Hemoglobin within normal limits."])
+
+    def _classify(self, texts: List[str]) -> List[List[str]]:
+        with self._lock:
+            # Texts longer than the model window are classified in overlapping strides
+            results = self.pipeline(texts, batch_size=self.batch_size, stride=Config.LOCAL_NER_STRIDE)
+        return [collect_terms(entities) for entities in results]
+
+    async def extract_terms_async(self, texts: List[str]) -> List[Optional[List[str]]]:
+        if not texts:
+            return []
+        try:
+            # Inference is CPU-bound, keep it off the event loop
+            return await asyncio.to_thread(self._classify, texts)
+        except Exception as e:
+            # The texts run as one batch, so they fail together
+            logger.error(f"Local NER failed: {str(e)}")
+            return [None] * len(texts)
+
+def create_ner_client(backend: Optional[str] = None, http_client: HttpClient = None) -> NERClient:
+    """Build the NER client selected by configuration"""
+    backend = (backend or Config.NER_BACKEND).lower()
+    if backend == "huggingface":
+        return HuggingFaceNERClient(http_client=http_client)
+    if backend == "onnx":
+        return OnnxNERClient()
+    raise ValueError(f"Unknown NER backend: {backend}")
+
+_ner_client: Optional[NERClient] = None
+_ner_client_lock = threading.Lock()
+
+def get_ner_client() -> NERClient:
+    """Return the process-wide NER client, so a local model is only loaded once"""
+    global _ner_client
+    if _ner_client is None:
+        with _ner_client_lock:
+            if _ner_client is None:
+                _ner_client = create_ner_client()
+    return _ner_client
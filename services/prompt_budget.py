@@ -0,0 +1,144 @@
+import re
+import hashlib
+import logging
+import threading
+from typing import List, Optional, Sequence, Tuple
+from config.settings import Config
+from utils.cache import LRUCache
+from .lexical_index import tokenize
+
+logger = logging.getLogger(__name__)
+
+# Rough characters per token, used when the model tokenizer is unavailable
+CHARS_PER_TOKEN = 4
+
+# Last sentence end, or failing that the last whitespace, in a truncated text
+SENTENCE_END = re.compile(r"[.!?](?=\s)|\n")
+
+def _clip(text: str) -> str:
+    """Cut a truncated text back to a sentence end, or a word boundary, near its end"""
+    floor = int(len(text) * 0.8)
+    ends = [match.end() for match in SENTENCE_END.finditer(text, floor)]
+    if ends:
+        return text[:ends[-1]].rstrip()
+    cut = text.rfind(" ", floor)
+    return text[:cut].rstrip() if cut > 0 else text
+
+class TokenCounter:
+    """
+    Token counts and token-bounded truncation with a model's tokenizer, falling back to an estimate.
+
+    Tokenizing a long text takes milliseconds and the first use loads the tokenizer, so async
+    callers run it in a thread.
+    """
+    def __init__(self, model_name: str, cache_size: int = Config.TOKEN_COUNT_CACHE_SIZE):
+        self.model_name = model_name
+        self.counts = LRUCache(maxsize=cache_size)
+        self._tokenizer = None
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    def load(self):
+        """Load the Hugging Face tokenizer of the model once, or settle for estimates; blocking, keep it off the event loop"""
+        with self._lock:
+            if self._loaded:
+                return
+            try:
+                from transformers import AutoTokenizer
+                self._tokenizer = AutoTokenizer.from_pretrained(self.model_name, token=Config.HF_TOKEN or None)
+                logger.info(f"Loaded tokenizer for {self.model_name}")
+            except Exception as e:
+                logger.warning(f"Tokenizer for {self.model_name} unavailable, estimating token counts: {str(e)}")
+            self._loaded = True
+
+    def _encode(self, text: str) -> Optional[List[int]]:
+        if not self._loaded:
+            self.load()
+        if self._tokenizer is None:
+            return None
+        return self._tokenizer.encode(text, add_special_tokens=False)
+
+    def _decode(self, tokens: List[int]) -> str:
+        return self._tokenizer.decode(tokens)
+
+    def count(self, text: str) -> int:
+        """Number of tokens in a text, cached by content"""
+        if not text:
+            return 0
+        key = hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+        count = self.counts.get(key)
+        if count is None:
+            tokens = self._encode(text)
+            count = len(tokens) if tokens is not None else -(-len(text) // CHARS_PER_TOKEN)
+            self.counts.set(key, count)
+        return count
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        """Shorten a text to at most max_tokens, ending on a sentence or word boundary"""
+        if max_tokens <= 0:
+            return ""
+        if self.count(text) <= max_tokens:
+            return text
+        tokens = self._encode(text)
+        if tokens is None:
+            return _clip(text[:max_tokens * CHARS_PER_TOKEN])
+        return _clip(self._decode(tokens[:max_tokens]))
+
+class PromptBudget:
+    """Split a model's context window between the fixed prompt, the generated output and ranked passages"""
+    def __init__(self, counter: TokenCounter, context_window: int, reserve_tokens: int = Config.PROMPT_RESERVE_TOKENS):
+        self.counter = counter
+        self.context_window = context_window
+        self.reserve_tokens = reserve_tokens
+
+    def available(self, fixed: str, max_new_tokens: int) -> int:
+        """Tokens left for passages once the fixed prompt text and the output are accounted for"""
+        return max(0, self.context_window - max_new_tokens - self.reserve_tokens - self.counter.count(fixed))
+
+    def pack(self, passages: Sequence[str], budget: int, scores: Optional[Sequence[float]] = None,
+             min_tokens: int = Config.PROMPT_MIN_PASSAGE_TOKENS) -> List[Tuple[int, str]]:
+        """
+        Take passages by descending score (input order by default) while they fit the budget.
+
+        The first passage that does not fit is truncated if at least min_tokens remain. Returns
+        (input index, text) pairs in ranked order.
+        """
+        order = range(len(passages))
+        if scores is not None:
+            order = sorted(order, key=lambda index: scores[index], reverse=True)
+
+        packed = []
+        remaining = budget
+        for index in order:
+            tokens = self.counter.count(passages[index])
+            if tokens <= remaining:
+                packed.append((index, passages[index]))
+                remaining -= tokens
+                continue
+            if remaining >= min_tokens:
+                packed.append((index, self.counter.truncate(passages[index], remaining)))
+            break
+        return packed
+
+    def share(self, passages: Sequence[str], budget: int) -> List[str]:
+        """Give every passage an equal share of the budget, passing what short ones leave over to the rest"""
+        counts = [self.counter.count(passage) for passage in passages]
+        allowed = list(counts)
+        remaining = budget
+        pending = sorted(range(len(passages)), key=lambda index: counts[index])
+        while pending:
+            fair = remaining // len(pending)
+            index = pending.pop(0)
+            allowed[index] = min(counts[index], fair)
+            remaining -= allowed[index]
+        return [
+            passage if allowed[index] >= counts[index] else self.counter.truncate(passage, allowed[index])
+            for index, passage in enumerate(passages)
+        ]
+
+def overlap_scores(query: str, passages: Sequence[str]) -> List[float]:
+    """Fraction of the query's terms that appear in each passage, a cheap relevance score for ranking"""
+    terms = set(tokenize(query))
+    if not terms:
+        return [0.0] * len(passages)
+    return [len(terms & set(tokenize(passage))) / len(terms) for passage in passages]
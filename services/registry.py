@@ -0,0 +1,128 @@
+import atexit
+import logging
+import threading
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+class ServiceRegistry:
+    """Process-wide registry of lazily constructed, shared service instances"""
+    def __init__(self):
+        self._factories: Dict[str, Callable[["ServiceRegistry"], Any]] = {}
+        self._instances: Dict[str, Any] = {}
+        self._order: List[str] = []
+        self._lock = threading.RLock()
+        self._closed = False
+
+    def register(self, name: str, factory: Callable[["ServiceRegistry"], Any]):
+        """Register a factory that builds the named service from the registry"""
+        with self._lock:
+            self._factories[name] = factory
+
+    def get(self, name: str) -> Any:
+        """Return the shared instance of a service, building and warming it on first use"""
+        instance = self._instances.get(name)
+        if instance is not None:
+            return instance
+
+        with self._lock:
+            # Another thread may have finished building while we waited for the lock
+            instance = self._instances.get(name)
+            if instance is not None:
+                return instance
+            if self._closed:
+                raise RuntimeError("Service registry has been shut down")
+            if name not in self._factories:
+                raise KeyError(f"Unknown service: {name}")
+
+            logger.info(f"Building shared service: {name}")
+            instance = self._factories[name](self)
+            self._warm_up(name, instance)
+            self._instances[name] = instance
+            self._order.append(name)
+            return instance
+
+    def get_all(self) -> Dict[str, Any]:
+        """Build (if needed) and return every registered service"""
+        return {name: self.get(name) for name in list(self._factories)}
+
+    def is_built(self, name: str) -> bool:
+        """Check whether a service has already been constructed"""
+        return name in self._instances
+
+    def shutdown(self):
+        """Release all services in reverse construction order"""
+        with self._lock:
+            for name in reversed(self._order):
+                instance = self._instances.pop(name, None)
+                close = getattr(instance, "close", None)
+                if callable(close):
+                    try:
+                        close()
+                    except Exception as e:
+                        logger.error(f"Error shutting down {name}: {str(e)}")
+            self._order = []
+            self._closed = True
+            logger.info("Service registry shut down")
+
+    def _warm_up(self, name: str, instance: Any):
+        """Run the optional warm-up hook of a freshly built service"""
+        warm_up = getattr(instance, "warm_up", None)
+        if not callable(warm_up):
+            return
+        try:
+            warm_up()
+        except Exception as e:
+            # A failed warm-up only costs latency on the first real request
+            logger.warning(f"Warm-up failed for {name}: {str(e)}")
+
+def _register_defaults(registry: ServiceRegistry):
+    """Register the factories for the standard MedClarify services"""
+    from .http_client import get_http_client
+    from .llm_client import get_llm_client
+    from .ner_client import get_ner_client
+    from .vector_db import VectorDatabaseClient
+    from .web_search import WebSearchService
+    from .claim_processor import HealthClaimProcessor
+    from .medical_assistant import MedVerifyAssistant
+    from .report_analyzer import MedicalReportAnalyzer
+
+    registry.register("http_client", lambda r: get_http_client())
+    registry.register("llm", lambda r: get_llm_client())
+    registry.register("ner", lambda r: get_ner_client())
+    registry.register("vector_db", lambda r: VectorDatabaseClient())
+    registry.register("web_search", lambda r: WebSearchService(http_client=r.get("http_client")))
+    registry.register("claim_processor", lambda r: HealthClaimProcessor(llm=r.get("llm")))
+    registry.register("assistant", lambda r: MedVerifyAssistant(
+        r.get("vector_db"),
+        r.get("web_search"),
+        r.get("claim_processor"),
+        llm=r.get("llm")
+    ))
+    registry.register("report_analyzer", lambda r: MedicalReportAnalyzer(
+        llm=r.get("llm"),
+        ner=r.get("ner")
+    ))
+
+_registry: Optional[ServiceRegistry] = None
+_registry_lock = threading.Lock()
+
+def get_registry() -> ServiceRegistry:
+    """Return the process-wide service registry, creating it on first call"""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                registry = ServiceRegistry()
+                _register_defaults(registry)
+                atexit.register(registry.shutdown)
+                _registry = registry
+    return _registry
+
+def shutdown_registry():
+    """Shut down the process-wide registry so the next call rebuilds it"""
+    global _registry
+    with _registry_lock:
+        if _registry is not None:
+            _registry.shutdown()
+            _registry = None
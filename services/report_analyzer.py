@@ -1,113 +1,351 @@
-import os
 import re
-import tempfile
-import PyPDF2
-import requests
+import asyncio
+import hashlib
 import logging
-import streamlit as st
+from typing import AsyncIterator, Dict, Iterator, List, Optional, Tuple
+from langchain.text_splitter import RecursiveCharacterTextSplitter
 from config.settings import Config
+from utils.pdf_extraction import extract_pdf_text, pdf_digest
+from .glossary import Glossary
+from .http_client import iter_sync, run_sync
+from .llm_client import LLMClient, get_llm_client
+from .ner_client import NERClient, collect_terms, get_ner_client
+from .report_cache import ReportCache
+from .telemetry import get_telemetry
 
 logger = logging.getLogger(__name__)
+telemetry = get_telemetry()
+
+REPORT_SECTIONS = [
+    "MEDICAL TERMS EXPLAINED",
+    "REPORT SUMMARY FOR PATIENT",
+    "KEY FINDINGS",
+    "RECOMMENDED QUESTIONS FOR DOCTOR"
+]
+
+TERMS_SECTION = REPORT_SECTIONS[0]
+
+# Bump when a prompt changes so cached results built from the old one are not reused
+CHUNK_PROMPT_VERSION = "1"
+REPORT_PROMPT_VERSION = "1"
+
+REPORT_MAX_NEW_TOKENS = 1500
+
+SECTION_PATTERN = r"(MEDICAL TERMS EXPLAINED|REPORT SUMMARY FOR PATIENT|KEY FINDINGS|RECOMMENDED QUESTIONS FOR DOCTOR):(.*?)(?=MEDICAL TERMS EXPLAINED|REPORT SUMMARY FOR PATIENT|KEY FINDINGS|RECOMMENDED QUESTIONS FOR DOCTOR:|$)"
 
 class MedicalReportAnalyzer:
     """Analyze and explain medical reports"""
-    def __init__(self):
-        self.ner_model_url = "https://api-inference.huggingface.co/models/Helios9/BioMed_NER"
-        self.llm_url = "https://api-inference.huggingface.co/models/mistralai/Mistral-7B-Instruct-v0.3"
-        self.headers = {"Authorization": f"Bearer {Config.HF_TOKEN}"}
+    def __init__(self, llm: LLMClient = None, ner: NERClient = None, glossary: Glossary = None,
+                 cache: ReportCache = None):
+        self.llm = llm or get_llm_client()
+        self.ner = ner or get_ner_client()
+        self.glossary = glossary
+        if self.glossary is None and Config.GLOSSARY_PATH:
+            try:
+                self.glossary = Glossary()
+            except Exception as e:
+                logger.error(f"Failed to open glossary: {str(e)}")
+        # Token-bounded report chunks (about 4 characters per token)
+        self.text_splitter = RecursiveCharacterTextSplitter(
+            chunk_size=Config.REPORT_CHUNK_TOKENS,
+            chunk_overlap=Config.REPORT_CHUNK_OVERLAP_TOKENS,
+            length_function=lambda text: len(text) // 4
+        )
+        # Extracted text, chunk terms and findings and final sections, so repeated uploads and
+        # retries only redo what is missing
+        self.cache = cache or ReportCache()
+        telemetry.register_cache("report", self.cache.stats)
+        if self.glossary is not None:
+            telemetry.register_cache("glossary", self.glossary.stats)
     
+    def close(self):
+        """Close the glossary and the report cache"""
+        if self.glossary:
+            self.glossary.close()
+        self.cache.close()
+
     def analyze_medical_report(self, pdf_file):
         """Analyze a medical report PDF and provide patient-friendly explanations"""
+        return run_sync(self.analyze_medical_report_async(pdf_file))
+
+    @staticmethod
+    def _extract_pdf_text(pdf_file, max_chars: Optional[int] = None) -> str:
+        """Extract text from an uploaded PDF in memory, stopping once max_chars is reached"""
+        return extract_pdf_text(
+            pdf_file,
+            max_chars=max_chars,
+            workers=Config.PDF_EXTRACT_WORKERS,
+            parallel_min_pages=Config.PDF_PARALLEL_MIN_PAGES,
+            pages_per_task=Config.PDF_PAGES_PER_TASK
+        )
+
+    async def analyze_medical_report_async(self, pdf_file):
+        """Analyze a medical report PDF without blocking the event loop"""
         try:
-            # Extract text from PDF
-            pdf_bytes = pdf_file.read()
-            pdf_file_obj = tempfile.NamedTemporaryFile(delete=False)
-            pdf_file_obj.write(pdf_bytes)
-            pdf_file_obj.close()
-            
-            reader = PyPDF2.PdfReader(pdf_file_obj.name)
-            full_text = " ".join(page.extract_text() for page in reader.pages if page.extract_text())
-            
-            # Clean up temporary file
-            os.unlink(pdf_file_obj.name)
-            
-            # Truncate text to avoid API limits
-            truncated_text = full_text[:8000]  # Increased limit for better context
-            
-            # Step 1: Extract medical terms using NER
-            response = requests.post(
-                self.ner_model_url,
-                headers=self.headers,
-                json={"inputs": truncated_text}
-            )
+            digest = await asyncio.to_thread(pdf_digest, pdf_file)
+            result_key = self._result_key(digest)
+            # Cache reads and writes are SQLite I/O plus zlib on the report text, keep them off the event loop
+            cached = await asyncio.to_thread(self.cache.get, "sections", result_key)
+            if cached is not None:
+                return cached
 
-            if response.status_code != 200:
-                st.error(f"NER model error: {response.status_code}")
+            with telemetry.span("report_prepare"):
+                prepared = await self._prepare_report_async(pdf_file, digest)
+            if prepared is None:
                 return None
-                
-            result = response.json()
-
-            # Process NER results
-            medical_terms = []
-            try:
-                if isinstance(result, list):
-                    for entity in result:
-                        term = entity.get("word", "").strip()
-                        if term and len(term) > 3:
-                            medical_terms.append(term)
-                
-                # Remove duplicates and limit terms
-                medical_terms = list(set(medical_terms))[:20]
-            except Exception as e:
-                st.error(f"Error processing NER response: {str(e)}")
-                medical_terms = []
-            
-            # Step 2: Generate explanations and summary using a more powerful model
-            explanation_prompt = (
-                "You are a medical professional explaining complex medical concepts to patients. Your task is to:\n\n"
-                f"1) Explain these medical terms in simple language a patient could understand: {', '.join(medical_terms)}\n\n"
-                f"2) Provide a patient-friendly summary of this medical report, explaining what it means for the patient's health:\n\n{truncated_text}\n\n"
-                "Format your response with clear headings:\n\n"
-                "MEDICAL TERMS EXPLAINED:\n"
-                "(Explain all medical terms, tests, conditions, and measurements)\n\n"
-                "REPORT SUMMARY FOR PATIENT:\n"
-                "(Provide a 2-3 paragraph summary of what the report means in everyday language)\n\n"
-                "KEY FINDINGS:\n"
-                "(List 3-5 bullet points of the most important information patients should know)\n\n"
-                "RECOMMENDED QUESTIONS FOR DOCTOR:\n"
-                "(Suggest 3 questions the patient might want to ask their healthcare provider)"
-            )
-            
-            # Make API call to the more powerful LLM model
-            response = requests.post(
-                self.llm_url,
-                headers=self.headers,
-                json={"inputs": explanation_prompt, "parameters": {"max_new_tokens": 1500}}
-            )
+            explanation_prompt, new_terms, known_terms = prepared
             
-            if response.status_code != 200:
-                st.error(f"LLM model error: {response.status_code}")
-                return None
-                
-            result = response.json()
-            if not isinstance(result, list) or not result:
-                st.error("Invalid response from LLM model")
+            # Generate the explanation with the LLM
+            with telemetry.span("report_generation"):
+                raw_text = await self.llm.generate_async(explanation_prompt, max_new_tokens=REPORT_MAX_NEW_TOKENS)
+            if raw_text is None:
                 return None
-                
-            raw_text = result[0].get("generated_text", "")
-            
-            # Extract structured sections using regex
-            sections = {}
-            section_pattern = r"(MEDICAL TERMS EXPLAINED|REPORT SUMMARY FOR PATIENT|KEY FINDINGS|RECOMMENDED QUESTIONS FOR DOCTOR):(.*?)(?=MEDICAL TERMS EXPLAINED|REPORT SUMMARY FOR PATIENT|KEY FINDINGS|RECOMMENDED QUESTIONS FOR DOCTOR:|$)"
-            
-            matches = re.finditer(section_pattern, raw_text, re.DOTALL)
-            for match in matches:
-                section_title = match.group(1).strip()
-                section_content = match.group(2).strip()
-                sections[section_title] = section_content
-            
+
+            sections = self.parse_sections(raw_text)
+            await self._learn_terms_async(new_terms, sections)
+            sections = self._with_glossary(sections, known_terms)
+            if sections:
+                await asyncio.to_thread(self.cache.set, "sections", result_key, sections)
             return sections
 
         except Exception as e:
-            st.error(f"Error analyzing medical report: {str(e)}")
-            return None
\ No newline at end of file
+            logger.error(f"Error analyzing medical report: {str(e)}")
+            return None
+
+    def analyze_medical_report_stream(self, pdf_file) -> Iterator[Tuple[str, str]]:
+        """Yield (section title, content so far) updates while the explanation is generated"""
+        return iter_sync(self.analyze_medical_report_stream_async(pdf_file))
+
+    async def analyze_medical_report_stream_async(self, pdf_file) -> AsyncIterator[Tuple[str, str]]:
+        """Stream section updates; a section is first yielded as soon as its header is complete"""
+        try:
+            digest = await asyncio.to_thread(pdf_digest, pdf_file)
+            result_key = self._result_key(digest)
+            cached = await asyncio.to_thread(self.cache.get, "sections", result_key)
+            if cached is not None:
+                for title, content in cached.items():
+                    yield title, content
+                return
+
+            with telemetry.span("report_prepare"):
+                prepared = await self._prepare_report_async(pdf_file, digest)
+            if prepared is None:
+                return
+            explanation_prompt, new_terms, known_terms = prepared
+
+            raw_text = ""
+            emitted: Dict[str, str] = {}
+            # Glossary explanations are shown before generation starts
+            for title, content in self._with_glossary({}, known_terms).items():
+                emitted[title] = content
+                yield title, content
+
+            with telemetry.span("report_generation"):
+                async for text in self.llm.stream_async(explanation_prompt, max_new_tokens=REPORT_MAX_NEW_TOKENS):
+                    raw_text += text
+
+                    # Re-parse only when a header could have just completed or a line ended
+                    if not any(c in text for c in ":\n"):
+                        continue
+                    for title, content in self._with_glossary(self.parse_sections(raw_text), known_terms).items():
+                        if emitted.get(title) != content:
+                            emitted[title] = content
+                            yield title, content
+
+            # Flush whatever arrived after the last header or newline
+            sections = self.parse_sections(raw_text)
+            await self._learn_terms_async(new_terms, sections)
+            sections = self._with_glossary(sections, known_terms)
+            for title, content in sections.items():
+                if emitted.get(title) != content:
+                    yield title, content
+            if sections:
+                await asyncio.to_thread(self.cache.set, "sections", result_key, sections)
+
+        except Exception as e:
+            logger.error(f"Error streaming medical report analysis: {str(e)}")
+
+    @staticmethod
+    def parse_sections(raw_text: str) -> Dict[str, str]:
+        """Extract the structured sections from generated text"""
+        sections = {}
+        matches = re.finditer(SECTION_PATTERN, raw_text, re.DOTALL)
+        for match in matches:
+            section_title = match.group(1).strip()
+            section_content = match.group(2).strip()
+            sections[section_title] = section_content
+        return sections
+
+    def _result_key(self, digest: str) -> str:
+        """Cache key of a report's final sections: its content plus everything that shapes the output"""
+        return ":".join([
+            digest, self.llm.model_name, self.ner.model_name, CHUNK_PROMPT_VERSION, REPORT_PROMPT_VERSION,
+            str(Config.REPORT_MAX_CHARS), str(Config.REPORT_CHUNK_TOKENS), str(Config.REPORT_MAX_TERMS)
+        ])
+
+    async def _learn_terms_async(self, new_terms: List[str], sections: Dict[str, str]):
+        """Add the freshly generated term explanations to the glossary"""
+        if self.glossary is None or not new_terms or TERMS_SECTION not in sections:
+            return
+        # Glossary reads and writes are SQLite I/O, keep them off the event loop
+        learned = await asyncio.to_thread(self.glossary.learn, new_terms, sections[TERMS_SECTION])
+        logger.debug(f"Glossary learned {learned} of {len(new_terms)} new terms")
+
+    @staticmethod
+    def _with_glossary(sections: Dict[str, str], known_terms: Dict[str, str]) -> Dict[str, str]:
+        """Put the glossary explanations ahead of the generated terms section"""
+        if not known_terms:
+            return sections
+        terms_section = "\n".join(part for part in (Glossary.format(known_terms), sections.get(TERMS_SECTION)) if part)
+        merged = {TERMS_SECTION: terms_section}
+        merged.update((title, content) for title, content in sections.items() if title != TERMS_SECTION)
+        return merged
+
+    async def _prepare_report_async(self, pdf_file, digest: str) -> Optional[Tuple[str, List[str], Dict[str, str]]]:
+        """Build the explanation prompt, returning it with the terms it asks about and the glossary hits"""
+        text_key = f"{digest}:{Config.REPORT_MAX_CHARS}"
+        full_text = await asyncio.to_thread(self.cache.get, "text", text_key)
+        if full_text is None:
+            # Extract text from PDF (CPU-bound, keep it off the event loop)
+            with telemetry.span("report_extract"):
+                full_text = await asyncio.to_thread(self._extract_pdf_text, pdf_file, Config.REPORT_MAX_CHARS)
+            await asyncio.to_thread(self.cache.set, "text", text_key, full_text)
+        if not full_text.strip():
+            logger.error("No text could be extracted from the report")
+            return None
+
+        chunks = self.text_splitter.split_text(full_text)
+        keys = [hashlib.sha256(chunk.encode("utf-8")).hexdigest() for chunk in chunks]
+        summarize = len(chunks) > 1
+
+        # Map: NER over every chunk in one batch, alongside the per-chunk findings of long reports
+        terms_task = asyncio.create_task(self._chunk_terms_async(chunks, keys))
+        findings = None
+        try:
+            if summarize:
+                with telemetry.span("report_findings"):
+                    findings = await self._chunk_findings_async(chunks, keys)
+            chunk_terms = await terms_task
+        finally:
+            terms_task.cancel()
+        if chunk_terms is None or (summarize and findings is None):
+            return None
+
+        # Reduce: merge the terms, explaining only those the glossary does not know yet
+        medical_terms = collect_terms({"word": term} for terms in chunk_terms for term in terms)
+        medical_terms = medical_terms[:Config.REPORT_MAX_TERMS]
+        known_terms = await asyncio.to_thread(self.glossary.lookup, medical_terms) if self.glossary is not None else {}
+        new_terms = [term for term in medical_terms if term not in known_terms]
+
+        if summarize:
+            logger.info(f"Analyzed report in {len(chunks)} chunks ({len(full_text)} characters)")
+        # Tokenizing the full report is CPU work, keep it off the event loop
+        prompt = await asyncio.to_thread(self._fit_report, new_terms, full_text, findings)
+        return prompt, new_terms, known_terms
+
+    def _fit_report(self, new_terms: List[str], full_text: str, findings: Optional[List[str]]) -> str:
+        """Fit the report text, or the findings of every part, into what the instructions leave of the context"""
+        budget = self.llm.budget
+        if findings is not None:
+            description = "a long medical report, given as the findings of each of its parts in order:\n\n"
+            labels = [f"Part {number} of {len(findings)}:\n" for number in range(1, len(findings) + 1)]
+            fixed = self._explanation_prompt(new_terms, description + "\n\n".join(labels))
+            findings = budget.share(findings, budget.available(fixed, REPORT_MAX_NEW_TOKENS))
+            report = description + "\n\n".join(label + part for label, part in zip(labels, findings))
+        else:
+            description = "this medical report:\n\n"
+            fixed = self._explanation_prompt(new_terms, description)
+            report = description + budget.counter.truncate(full_text, budget.available(fixed, REPORT_MAX_NEW_TOKENS))
+        return self._explanation_prompt(new_terms, report)
+
+    async def _chunk_terms_async(self, chunks: List[str], keys: List[str]) -> Optional[List[List[str]]]:
+        """Medical terms of every chunk, running NER over the chunks not cached yet, or None if any chunk failed"""
+        terms = await asyncio.to_thread(
+            lambda: [self.cache.get("terms", f"{self.ner.model_name}:{key}") for key in keys]
+        )
+        missing = [index for index, chunk_terms in enumerate(terms) if chunk_terms is None]
+        if missing:
+            with telemetry.span("report_ner", model=self.ner.model_name):
+                extracted = await self.ner.extract_terms_async([chunks[index] for index in missing])
+            # Chunks that succeeded are cached even if others failed, so a retry only redoes the failures
+            succeeded = []
+            for index, chunk_terms in zip(missing, extracted):
+                terms[index] = chunk_terms
+                if chunk_terms is not None:
+                    succeeded.append((f"{self.ner.model_name}:{keys[index]}", chunk_terms))
+
+            def cache_terms():
+                for identifier, chunk_terms in succeeded:
+                    self.cache.set("terms", identifier, chunk_terms)
+
+            await asyncio.to_thread(cache_terms)
+        if any(chunk_terms is None for chunk_terms in terms):
+            return None
+        return terms
+
+    async def _chunk_findings_async(self, chunks: List[str], keys: List[str]) -> Optional[List[str]]:
+        """Condensed findings of every chunk, summarized concurrently and cached by content"""
+        semaphore = asyncio.Semaphore(Config.REPORT_CHUNK_CONCURRENCY)
+
+        async def summarize(chunk: str, key: str) -> str:
+            key = f"{self.llm.model_name}:{CHUNK_PROMPT_VERSION}:{key}"
+            cached = await asyncio.to_thread(self.cache.get, "findings", key)
+            if cached is not None:
+                return cached
+            async with semaphore:
+                prompt = await asyncio.to_thread(self._findings_prompt, chunk)
+                findings = await self.llm.generate_async(prompt, max_new_tokens=Config.REPORT_CHUNK_SUMMARY_TOKENS)
+            if findings is None:
+                raise RuntimeError("chunk summary returned no result")
+            await asyncio.to_thread(self.cache.set, "findings", key, findings.strip())
+            return findings.strip()
+
+        # Let every chunk finish so completed ones are cached even if another fails
+        results = await asyncio.gather(*(summarize(chunk, key) for chunk, key in zip(chunks, keys)),
+                                       return_exceptions=True)
+        failed = [result for result in results if isinstance(result, BaseException)]
+        if failed:
+            logger.error(f"{len(failed)} of {len(chunks)} report chunks failed: {str(failed[0])}")
+            return None
+        return results
+
+    def _findings_prompt(self, chunk: str) -> str:
+        """Prompt condensing one report part, with the part trimmed to the context window if needed"""
+        instructions = (
+            "You are a medical professional reading one part of a longer medical report. "
+            "List every diagnosis, test result, measurement, medication and recommendation it contains "
+            "as short bullet points, keeping values, units and reference ranges. Do not add interpretation.\n\n"
+            "REPORT PART:\n"
+        )
+        budget = self.llm.budget
+        available = budget.available(instructions + "\n\nFINDINGS:\n", Config.REPORT_CHUNK_SUMMARY_TOKENS)
+        return f"{instructions}{budget.counter.truncate(chunk, available)}\n\nFINDINGS:\n"
+
+    @staticmethod
+    def _explanation_prompt(new_terms: List[str], report: str) -> str:
+        """Prompt asking for the report sections; terms already in the glossary are left out"""
+        if new_terms:
+            task = (
+                f"1) Explain these medical terms in simple language a patient could understand: {', '.join(new_terms)}\n\n"
+                f"2) Provide a patient-friendly summary of {report}\n\n"
+            )
+            terms_format = (
+                "MEDICAL TERMS EXPLAINED:\n"
+                "(Explain each term above on its own line as \"- Term: explanation\")\n\n"
+            )
+        else:
+            task = f"Provide a patient-friendly summary of {report}\n\n"
+            terms_format = ""
+        return (
+            "You are a medical professional explaining complex medical concepts to patients. Your task is to:\n\n"
+            f"{task}"
+            "Explain what it means for the patient's health.\n\n"
+            "Format your response with clear headings:\n\n"
+            f"{terms_format}"
+            "REPORT SUMMARY FOR PATIENT:\n"
+            "(Provide a 2-3 paragraph summary of what the report means in everyday language)\n\n"
+            "KEY FINDINGS:\n"
+            "(List 3-5 bullet points of the most important information patients should know)\n\n"
+            "RECOMMENDED QUESTIONS FOR DOCTOR:\n"
+            "(Suggest 3 questions the patient might want to ask their healthcare provider)"
+        )
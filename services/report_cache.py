@@ -0,0 +1,67 @@
+import json
+import hashlib
+import logging
+from typing import Any, Dict, Optional
+from config.settings import Config
+from utils.cache import LRUCache, SQLiteStore
+
+logger = logging.getLogger(__name__)
+
+class ReportCache:
+    """Two-tier (memory LRU + compressed SQLite) cache of report text, chunk terms and findings and final sections"""
+    def __init__(self, path: str = Config.REPORT_CACHE_PATH, size: int = Config.REPORT_CACHE_SIZE,
+                 ttl: float = Config.REPORT_CACHE_TTL, max_bytes: int = Config.REPORT_CACHE_MAX_BYTES):
+        self.memory = LRUCache(maxsize=size, ttl=ttl)
+        self.disk: Optional[SQLiteStore] = None
+        if path:
+            try:
+                self.disk = SQLiteStore(path, ttl=ttl, max_bytes=max_bytes, compress=True)
+            except Exception as e:
+                logger.error(f"Failed to open report cache at {path}: {str(e)}")
+        self.disk_hits = 0
+
+    @staticmethod
+    def _key(namespace: str, identifier: str) -> str:
+        return namespace + ":" + hashlib.sha256(identifier.encode("utf-8")).hexdigest()
+
+    def get(self, namespace: str, identifier: str) -> Any:
+        """Return a cached value, promoting disk hits to memory, or None"""
+        key = self._key(namespace, identifier)
+        value = self.memory.get(key)
+        if value is not None or self.disk is None:
+            return value
+        try:
+            payload = self.disk.get(key)
+        except Exception as e:
+            logger.warning(f"Report cache read failed: {str(e)}")
+            return None
+        if payload is None:
+            return None
+        value = json.loads(payload)
+        self.memory.set(key, value)
+        self.disk_hits += 1
+        return value
+
+    def set(self, namespace: str, identifier: str, value: Any):
+        """Store a JSON-serializable value in both tiers"""
+        key = self._key(namespace, identifier)
+        self.memory.set(key, value)
+        if self.disk is None:
+            return
+        try:
+            self.disk.set(key, json.dumps(value).encode("utf-8"))
+        except Exception as e:
+            logger.warning(f"Report cache write failed: {str(e)}")
+
+    def stats(self) -> Dict:
+        """Hit-rate counters; disk hits are counted as memory misses that were still served"""
+        stats = self.memory.stats()
+        lookups = stats["hits"] + stats["misses"]
+        stats["disk_hits"] = self.disk_hits
+        stats["hit_rate"] = (stats["hits"] + self.disk_hits) / lookups if lookups else 0.0
+        return stats
+
+    def close(self):
+        """Close the disk tier"""
+        if self.disk is not None:
+            self.disk.close()
@@ -0,0 +1,118 @@
+import asyncio
+import logging
+import threading
+import concurrent.futures
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+import numpy as np
+from config.settings import Config
+
+logger = logging.getLogger(__name__)
+
+class _Flight:
+    """One in-flight computation and the embedding of the request that started it"""
+    def __init__(self):
+        # A thread-safe future so callers on any event loop can attach
+        self.future: concurrent.futures.Future = concurrent.futures.Future()
+        self.embedding: Optional[np.ndarray] = None
+        # Request parameters besides the text that change the result; only equal groups are joined
+        self.group: Hashable = None
+        self.leading = False
+        self.task: Optional[asyncio.Task] = None
+
+class SingleFlight:
+    """
+    Coalesce concurrent requests for the same or a near-duplicate key onto a single computation.
+
+    A near-duplicate gets the leader's result as is, without checking that it would have found
+    the same evidence, so max_distance should only admit rewordings of the same claim.
+    """
+    def __init__(self, max_distance: float = Config.COALESCE_MAX_DISTANCE):
+        self.max_distance = max_distance
+        self._flights: Dict[str, _Flight] = {}
+        self._lock = threading.Lock()
+        self.leaders = 0
+        self.coalesced = 0
+
+    @staticmethod
+    async def _wait(flight: _Flight) -> Any:
+        # Shielded so a caller giving up does not cancel the shared computation
+        return await asyncio.shield(asyncio.wrap_future(flight.future))
+
+    def _find_leader(self, flight: _Flight) -> Optional[_Flight]:
+        """Find a running computation for a near-duplicate request"""
+        best, best_similarity = None, -1.0
+        for other in self._flights.values():
+            # Only leaders that already know their embedding, so two requests never wait on each other
+            if other is flight or not other.leading or other.embedding is None or other.group != flight.group:
+                continue
+            similarity = float(np.dot(other.embedding, flight.embedding))
+            if similarity > best_similarity:
+                best, best_similarity = other, similarity
+        if best is not None and 1.0 - best_similarity <= self.max_distance:
+            return best
+        return None
+
+    async def run(self, key: str, compute: Callable[[], Awaitable[Any]],
+                  embed: Callable[[], Awaitable[np.ndarray]] = None, group: Hashable = None) -> Any:
+        """
+        Run compute once per key; concurrent callers with the same key, or a near-duplicate one
+        in the same group, share its result. The key must include the group.
+        """
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is None:
+                flight = self._flights[key] = _Flight()
+                flight.group = group
+                owner = True
+            else:
+                self.coalesced += 1
+                owner = False
+        if not owner:
+            return await self._wait(flight)
+
+        # The computation runs as its own task, so the leader being cancelled (a client
+        # disconnect, a closed stream) does not cancel it for the callers that joined it
+        flight.task = asyncio.ensure_future(self._lead(key, flight, compute, embed))
+        return await asyncio.shield(flight.task)
+
+    async def _lead(self, key: str, flight: _Flight, compute: Callable[[], Awaitable[Any]],
+                    embed: Callable[[], Awaitable[np.ndarray]] = None) -> Any:
+        """Compute, or join a near-duplicate leader, and publish the outcome to every waiter"""
+        try:
+            embedding = await embed() if embed is not None and self.max_distance > 0 else None
+            with self._lock:
+                leader = None
+                if embedding is not None:
+                    flight.embedding = embedding
+                    leader = self._find_leader(flight)
+                flight.leading = leader is None
+                if leader is None:
+                    self.leaders += 1
+                else:
+                    self.coalesced += 1
+
+            if leader is not None:
+                logger.info(f"Attaching '{key}' to an in-flight near-duplicate request")
+                result = await self._wait(leader)
+            else:
+                result = await compute()
+            flight.future.set_result(result)
+            return result
+        except BaseException as e:
+            flight.future.set_exception(e)
+            # Nobody may be waiting; mark the exception as retrieved
+            flight.future.exception()
+            raise
+        finally:
+            with self._lock:
+                if self._flights.get(key) is flight:
+                    del self._flights[key]
+
+    def stats(self) -> Dict:
+        """In-flight and coalescing counters"""
+        with self._lock:
+            return {
+                "in_flight": len(self._flights),
+                "leaders": self.leaders,
+                "coalesced": self.coalesced
+            }
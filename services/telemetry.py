@@ -0,0 +1,228 @@
+import time
+import logging
+import threading
+from bisect import bisect_left
+from contextlib import contextmanager, nullcontext
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+from config.settings import Config
+
+logger = logging.getLogger(__name__)
+
+PREFIX = "medclarify_"
+# Latency buckets in seconds, from a cache hit to a slow LLM generation
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+def _labels(labels: Dict[str, object]) -> LabelKey:
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+def _format_labels(labels: LabelKey, extra: Tuple[Tuple[str, str], ...] = ()) -> str:
+    pairs = labels + extra
+    if not pairs:
+        return ""
+    escaped = (value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in pairs)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + "}"
+
+def _format_value(value: float) -> str:
+    # Full precision: a rounded total stops moving and breaks rate() on large counters
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+class _Histogram:
+    __slots__ = ("buckets", "sum", "count")
+
+    def __init__(self, size: int):
+        self.buckets = [0] * size
+        self.sum = 0.0
+        self.count = 0
+
+class MetricsRegistry:
+    """Process-wide counters, histograms and cache stats, rendered in the Prometheus text format"""
+    def __init__(self, buckets: Tuple[float, ...] = DURATION_BUCKETS):
+        self.buckets = buckets
+        self._counters: Dict[str, Dict[LabelKey, float]] = {}
+        self._histograms: Dict[str, Dict[LabelKey, _Histogram]] = {}
+        self._help: Dict[str, str] = {}
+        self._caches: Dict[str, Callable[[], Dict]] = {}
+        self._lock = threading.Lock()
+
+    def describe(self, name: str, help_text: str):
+        self._help[name] = help_text
+
+    def count(self, name: str, value: float = 1, **labels):
+        key = _labels(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+
+    def observe(self, name: str, value: float, **labels):
+        key = _labels(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            histogram = self._histograms.setdefault(name, {}).get(key)
+            if histogram is None:
+                histogram = self._histograms[name][key] = _Histogram(len(self.buckets))
+            if index < len(self.buckets):
+                histogram.buckets[index] += 1
+            histogram.sum += value
+            histogram.count += 1
+
+    def register_cache(self, name: str, stats: Callable[[], Dict]):
+        """Export a cache's stats() hits and misses when metrics are rendered"""
+        with self._lock:
+            self._caches[name] = stats
+
+    def render(self) -> str:
+        """Prometheus text exposition of every metric"""
+        lines: List[str] = []
+        with self._lock:
+            counters = {name: dict(series) for name, series in self._counters.items()}
+            histograms = {
+                name: {key: (list(h.buckets), h.sum, h.count) for key, h in series.items()}
+                for name, series in self._histograms.items()
+            }
+            caches = dict(self._caches)
+
+        for name, series in sorted(counters.items()):
+            self._header(lines, name, "counter")
+            for key, value in series.items():
+                lines.append(f"{PREFIX}{name}{_format_labels(key)} {_format_value(value)}")
+
+        for name, series in sorted(histograms.items()):
+            self._header(lines, name, "histogram")
+            for key, (buckets, total, observations) in series.items():
+                cumulative = 0
+                for bound, bucket in zip(self.buckets, buckets):
+                    cumulative += bucket
+                    lines.append(f"{PREFIX}{name}_bucket{_format_labels(key, (('le', f'{bound:g}'),))} {cumulative}")
+                lines.append(f"{PREFIX}{name}_bucket{_format_labels(key, (('le', '+Inf'),))} {observations}")
+                lines.append(f"{PREFIX}{name}_sum{_format_labels(key)} {_format_value(total)}")
+                lines.append(f"{PREFIX}{name}_count{_format_labels(key)} {observations}")
+
+        if caches:
+            self._header(lines, "cache_requests_total", "counter")
+            for cache, stats in sorted(caches.items()):
+                try:
+                    values = stats()
+                except Exception as e:
+                    logger.debug(f"Cache stats for {cache} unavailable: {str(e)}")
+                    continue
+                hits = values.get("hits", 0) + values.get("disk_hits", 0)
+                misses = values.get("misses", 0) - values.get("disk_hits", 0)
+                lines.append(f'{PREFIX}cache_requests_total{{cache="{cache}",result="hit"}} {hits}')
+                lines.append(f'{PREFIX}cache_requests_total{{cache="{cache}",result="miss"}} {max(misses, 0)}')
+        return "\n".join(lines) + "\n"
+
+    def _header(self, lines: List[str], name: str, kind: str):
+        if name in self._help:
+            lines.append(f"# HELP {PREFIX}{name} {self._help[name]}")
+        lines.append(f"# TYPE {PREFIX}{name} {kind}")
+
+class Telemetry:
+    """Stage spans, counters and histograms; every call is a cheap no-op while disabled"""
+    def __init__(self, enabled: bool = Config.METRICS_ENABLED, tracing: bool = Config.OTEL_TRACING):
+        self.enabled = enabled
+        self.registry = MetricsRegistry()
+        self.tracer = None
+        if tracing:
+            try:
+                from opentelemetry import trace
+                # Export is configured by the OpenTelemetry SDK of the deployment (e.g. opentelemetry-instrument)
+                self.tracer = trace.get_tracer("medclarify")
+            except ImportError:
+                logger.warning("OTEL_TRACING is set but opentelemetry-api is not installed")
+        self._noop = nullcontext()
+        self.registry.describe("stage_duration_seconds", "Wall time spent in each pipeline stage")
+        self.registry.describe("evidence_source_total", "Where verification evidence came from; web is the fallback")
+        self.registry.describe("upstream_requests_total", "Upstream HTTP requests by host and outcome")
+        self.registry.describe("upstream_retries_total", "Upstream HTTP retries by host")
+        self.registry.describe("upstream_bytes_total", "Response bytes downloaded by host")
+        self.registry.describe("llm_tokens_total", "LLM prompt (in) and completion (out) tokens")
+        self.registry.describe("cache_requests_total", "Cache lookups by cache and result")
+
+    def span(self, stage: str, **attributes):
+        """Time a pipeline stage into stage_duration_seconds and, if enabled, an OpenTelemetry span"""
+        if not self.enabled and self.tracer is None:
+            return self._noop
+        return self._span(stage, attributes)
+
+    @contextmanager
+    def _span(self, stage: str, attributes: Dict) -> Iterator[None]:
+        started = time.perf_counter()
+        status = "ok"
+        otel = self.tracer.start_as_current_span(stage, attributes=attributes) if self.tracer else nullcontext()
+        try:
+            with otel:
+                yield
+        except Exception:
+            status = "error"
+            raise
+        finally:
+            if self.enabled:
+                self.registry.observe("stage_duration_seconds", time.perf_counter() - started, stage=stage, status=status)
+
+    def count(self, name: str, value: float = 1, **labels):
+        if self.enabled:
+            self.registry.count(name, value, **labels)
+
+    def observe(self, name: str, value: float, **labels):
+        if self.enabled:
+            self.registry.observe(name, value, **labels)
+
+    def register_cache(self, name: str, stats: Callable[[], Dict]):
+        if self.enabled:
+            self.registry.register_cache(name, stats)
+
+    def render(self) -> str:
+        return self.registry.render()
+
+_telemetry: Optional[Telemetry] = None
+_telemetry_lock = threading.Lock()
+
+def get_telemetry() -> Telemetry:
+    """Return the process-wide telemetry instance"""
+    global _telemetry
+    if _telemetry is None:
+        with _telemetry_lock:
+            if _telemetry is None:
+                _telemetry = Telemetry()
+    return _telemetry
+
+_server: Optional[ThreadingHTTPServer] = None
+
+def start_metrics_server(port: int = Config.METRICS_PORT, host: str = "0.0.0.0") -> bool:
+    """Serve /metrics from a daemon thread, for processes without the API (e.g. Streamlit); idempotent"""
+    global _server
+    telemetry = get_telemetry()
+    if not telemetry.enabled or not port:
+        return False
+    with _telemetry_lock:
+        if _server is not None:
+            return True
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = telemetry.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        try:
+            _server = ThreadingHTTPServer((host, port), MetricsHandler)
+        except OSError as e:
+            logger.warning(f"Metrics server not started on port {port}: {str(e)}")
+            return False
+        threading.Thread(target=_server.serve_forever, name="medclarify-metrics", daemon=True).start()
+        logger.info(f"Serving metrics on port {port}")
+        return True
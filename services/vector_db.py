@@ -1,174 +1,513 @@
 import os
 import json
-import uuid
+import time
+import hashlib
 import logging
-from typing import Dict, List, Any
+import threading
+from typing import Dict, List, Any, Optional, Tuple
 from datetime import datetime
+import numpy as np
 from sentence_transformers import SentenceTransformer
-from pinecone import Pinecone, ServerlessSpec
 from config.settings import Config
+from utils.cache import LRUCache
+from utils.file_lock import FileLockedError
+from utils.text_processing import normalize_text
+from .vector_store import build_filter, create_vector_store
+from .embedding_cache import EmbeddingCache
+from .lexical_index import LexicalIndex
+from .telemetry import get_telemetry
 
 logger = logging.getLogger(__name__)
+telemetry = get_telemetry()
 
 class VectorDatabaseClient:
-    """Production-grade vector database using Pinecone"""
-    def __init__(self):
+    """Production-grade vector database over a pluggable vector store (Pinecone or local)"""
+    def __init__(self, backend: str = None):
         self.embedder = SentenceTransformer(Config.EMBEDDING_MODEL)
-        self.index = None
+        self.backend = backend or Config.VECTOR_BACKEND
+        self.store = None
+        self.lexical = None
+        self._encode_pool = None
+        self._pool_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self.embedding_stats = {"texts": 0, "calls": 0, "seconds": 0.0}
+        self.query_cache = EmbeddingCache(model_name=Config.EMBEDDING_MODEL)
+        # Parsed claim records by id, so only the final survivors of a search need metadata
+        self.record_cache = LRUCache(maxsize=Config.METADATA_CACHE_SIZE, ttl=Config.METADATA_CACHE_TTL)
+        # Bumped on every write so result caches can tell the evidence set has changed
+        self.revision = 0
+        telemetry.register_cache("query_embedding", self.query_cache.stats)
+        telemetry.register_cache("claim_record", self.record_cache.stats)
         self.initialize_db()
+
+    def warm_up(self):
+        """Run a throwaway encode so the first real query doesn't pay model start-up cost"""
+        self.embedder.encode("warm up")
         
     def initialize_db(self):
-        """Initialize Pinecone vector database"""
+        """Initialize the configured vector store"""
         try:
-            # Initialize Pinecone using the new client
-            pc = Pinecone(api_key=Config.PINECONE_API_KEY)
-
-            # Check if index exists, create if not
-            if Config.VECTOR_DB_INDEX not in pc.list_indexes().names():
-                pc.create_index(
-                    name=Config.VECTOR_DB_INDEX,
-                    dimension=Config.VECTOR_DIMENSION,
-                    metric="cosine",
-                    spec=ServerlessSpec(
-                        cloud="aws",
-                        region='us-east-1'
-                    )
-                )
-                logger.info(f"Created new Pinecone index: {Config.VECTOR_DB_INDEX}")
-
-            # Connect to index
-            self.index = pc.Index(Config.VECTOR_DB_INDEX)
-            logger.info(f"Connected to Pinecone index: {Config.VECTOR_DB_INDEX}")
+            self.store = create_vector_store(self.backend)
+            if Config.HYBRID_SEARCH:
+                self.lexical = LexicalIndex()
+                self._sync_lexical_index()
 
             # Load initial data if index is empty
-            stats = self.index.describe_index_stats()
-            if stats.get('total_vector_count', 0) == 0:
+            if self.store.count() == 0:
                 self._load_initial_data()
                 
+        except FileLockedError:
+            # Running without the index would silently answer from web searches only
+            if self.store:
+                self.store.close()
+            raise
         except Exception as e:
-            logger.error(f"Failed to initialize Pinecone: {str(e)}")
-            self.index = None
+            logger.error(f"Failed to initialize vector store ({self.backend}): {str(e)}")
+            self.store = None
+
+    def _sync_lexical_index(self):
+        """Rebuild the BM25 index from the store when it is missing or out of step"""
+        stored = self.store.count()
+        if self.lexical.count() == stored:
+            return
+        logger.info(f"Rebuilding lexical index from {stored} stored claims")
+        try:
+            self.lexical.clear()
+            for vector_id, metadata in self.store.iter_metadata():
+                self.lexical.add(vector_id, self._claim_text(metadata))
+            self.lexical.flush()
+        except NotImplementedError:
+            logger.warning(f"The {self.backend} store can't be scanned, lexical search only covers new claims")
+        except Exception as e:
+            logger.error(f"Failed to rebuild lexical index: {str(e)}")
+
+    def flush(self):
+        """Persist buffered writes of the vector store and the lexical index"""
+        if self.store:
+            self.store.flush()
+        if self.lexical:
+            self.lexical.flush()
+
+    def count(self) -> int:
+        """Number of health claims in the vector database"""
+        if not self.store:
+            return 0
+        return self.store.count()
+
+    def close(self):
+        """Flush and release the vector store and any encoding pool"""
+        if self._encode_pool is not None:
+            self.embedder.stop_multi_process_pool(self._encode_pool)
+            self._encode_pool = None
+        self.query_cache.close()
+        if self.lexical:
+            self.lexical.close()
+        if self.store:
+            self.store.close()
     
     def _load_initial_data(self):
         """Load initial health claims data if available"""
+        from .ingestion import ClaimIngestor
+
         try:
             # Check for local health claims file to bootstrap the database
             if os.path.exists('healthfc.json'):
-                with open('healthfc.json', 'r') as f:
-                    data = json.load(f)
-                    health_claims = data.get("health_claims", [])
-                    
-                if health_claims:
-                    logger.info(f"Loading {len(health_claims)} initial health claims into vector database")
-                    batch_size = 100
-                    for i in range(0, len(health_claims), batch_size):
-                        batch = health_claims[i:i+batch_size]
-                        self._index_claims_batch(batch)
-                    logger.info("Initial health claims loaded successfully")
+                logger.info("Loading initial health claims into vector database")
+                ClaimIngestor(self, batch_size=Config.INDEX_BATCH_SIZE).ingest('healthfc.json')
+                logger.info("Initial health claims loaded successfully")
         except Exception as e:
             logger.error(f"Failed to load initial data: {str(e)}")
-    
-    def _index_claims_batch(self, claims):
-        """Index a batch of health claims into Pinecone"""
+
+    def embed_texts(self, texts: List[str]) -> np.ndarray:
+        """Encode many texts with one vectorized call, returning L2-normalized embeddings"""
+        if not texts:
+            return np.zeros((0, Config.VECTOR_DIMENSION), dtype=np.float32)
+
+        started = time.perf_counter()
+        pool = self._get_encode_pool() if len(texts) >= Config.EMBEDDING_POOL_MIN_TEXTS else None
+        with telemetry.span("embedding"):
+            if pool is not None:
+                embeddings = self.embedder.encode_multi_process(texts, pool, batch_size=Config.EMBEDDING_BATCH_SIZE)
+                norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+                embeddings = embeddings / np.maximum(norms, 1e-12)
+            else:
+                embeddings = self.embedder.encode(
+                    texts,
+                    batch_size=Config.EMBEDDING_BATCH_SIZE,
+                    normalize_embeddings=True,
+                    convert_to_numpy=True,
+                    show_progress_bar=False
+                )
+        elapsed = time.perf_counter() - started
+
+        with self._stats_lock:
+            self.embedding_stats["texts"] += len(texts)
+            self.embedding_stats["calls"] += 1
+            self.embedding_stats["seconds"] += elapsed
+        if len(texts) > 1:
+            logger.debug(f"Encoded {len(texts)} texts in {elapsed:.2f}s ({len(texts) / max(elapsed, 1e-9):.1f} texts/s)")
+        return embeddings
+
+    def embed_queries(self, queries: List[str]) -> np.ndarray:
+        """Embed search queries through the query cache, encoding all misses in one batch"""
+        embeddings = [self.query_cache.get(query) for query in queries]
+        missing = [i for i, embedding in enumerate(embeddings) if embedding is None]
+
+        if missing:
+            encoded = self.embed_texts([queries[i] for i in missing])
+            for i, embedding in zip(missing, encoded):
+                self.query_cache.set(queries[i], embedding)
+                embeddings[i] = embedding
+
+        return np.vstack(embeddings) if embeddings else np.zeros((0, Config.VECTOR_DIMENSION), dtype=np.float32)
+
+    def _get_encode_pool(self):
+        """Lazily start the multi-process encoding pool used for large corpora"""
+        if Config.EMBEDDING_POOL_PROCESSES <= 1:
+            return None
+        with self._pool_lock:
+            if self._encode_pool is None:
+                devices = ["cpu"] * Config.EMBEDDING_POOL_PROCESSES
+                self._encode_pool = self.embedder.start_multi_process_pool(target_devices=devices)
+                logger.info(f"Started embedding pool with {len(devices)} processes")
+            return self._encode_pool
+
+    @staticmethod
+    def _claim_text(claim: Dict) -> str:
+        """Text used to embed a claim (claim + explanation)"""
+        return claim.get("claim", "") + " " + claim.get("explanation", "")
+
+    @staticmethod
+    def claim_id(claim: Dict) -> str:
+        """Stable vector id derived from the normalized claim text"""
+        return hashlib.sha256(normalize_text(claim.get("claim", "")).encode("utf-8")).hexdigest()[:32]
+
+    def _build_vectors(self, claims: List[Dict], default_evidence_level: str = "",
+                       default_origin: str = None) -> List[tuple]:
+        """Embed a batch of claims and pair each embedding with its metadata"""
+        embeddings = self.embed_texts([self._claim_text(claim) for claim in claims])
+
         vectors = []
-        
-        for claim in claims:
-            claim_id = str(uuid.uuid4())
-            # Create text for embedding (claim + explanation)
-            text = claim.get("claim", "") + " " + claim.get("explanation", "")
-            # Generate embedding
-            embedding = self.embedder.encode(text).tolist()
-            
-            # Prepare metadata
+        for claim, embedding in zip(claims, embeddings):
+            claim_id = self.claim_id(claim)
             metadata = {
                 "claim": claim.get("claim", ""),
-                "evidence_level": claim.get("evidence_level", ""),
+                "evidence_level": claim.get("evidence_level", default_evidence_level),
                 "explanation": claim.get("explanation", ""),
                 "sources": json.dumps(claim.get("sources", [])),
-                "timestamp": datetime.now().isoformat()
+                "timestamp": datetime.now().isoformat(),
+                # Numeric copy of the timestamp for range filters
+                "created_at": time.time()
             }
-            
-            vectors.append((claim_id, embedding, metadata))
-        
-        # Upsert vectors in batch
-        if vectors:
-            to_upsert = [(id, vec, meta) for id, vec, meta in vectors]
-            self.index.upsert(vectors=to_upsert)
+            origin = claim.get("origin", default_origin)
+            if origin:
+                metadata["origin"] = origin
+            vectors.append((claim_id, embedding.tolist(), metadata))
+        return vectors
+    
+    def index_claims(self, claims: List[Dict], skip_existing: bool = True) -> Dict[str, int]:
+        """
+        Index a batch of health claims with the same upsert semantics as add_claims.
+
+        Returns the add_claims counts plus how many claims were skipped because their id was
+        already stored. Batches indexed concurrently are not merged with each other.
+        """
+        counts = {"inserted": 0, "updated": 0, "merged": 0, "skipped": 0}
+        if skip_existing and claims:
+            # Already indexed claims are dropped before paying for their embeddings
+            existing = self.store.fetch(list({self.claim_id(claim) for claim in claims}))
+            kept = [claim for claim in claims if self.claim_id(claim) not in existing]
+            counts["skipped"] = len(claims) - len(kept)
+            claims = kept
+        if not claims:
+            return counts
+
+        vectors, merged = self._merge_near_duplicates(self._build_vectors(claims), claims)
+        self._upsert(vectors)
+        counts.update(merged)
+        return counts
+
+    def _upsert(self, vectors: List[tuple]):
+        """Write vectors to the store and keep the lexical index and revision in step"""
+        if not vectors:
+            return
+        self.store.upsert(vectors)
+        for vector_id, _, metadata in vectors:
+            self.record_cache.set(vector_id, self._format_record(vector_id, metadata))
+            if self.lexical:
+                self.lexical.add(vector_id, self._claim_text(metadata))
+        with self._stats_lock:
+            self.revision += 1
     
-    def search(self, query: str, top_k: int = 5) -> List[Dict]:
-        """Search for relevant claims using semantic similarity"""
-        if not self.index:
+    def search(self, query: str, top_k: int = 5, min_score: Optional[float] = None, evidence_level=None,
+               origin=None, since=None, until=None) -> List[Dict]:
+        """
+        Search for relevant claims, fusing semantic similarity with BM25 keyword matches.
+
+        Candidates are ranked on ids and scores alone; metadata is only loaded (through the
+        record cache) for the top_k results that pass min_score (see _fuse_lexical_scores for
+        the hybrid rule). relevance_score is the cosine similarity. evidence_level,
+        origin and the since/until creation time range (datetimes or epoch seconds) are
+        pushed down into the store query.
+        """
+        return self.search_many(
+            [query], top_k=top_k, min_score=min_score, evidence_level=evidence_level,
+            origin=origin, since=since, until=until
+        )[0]
+
+    def search_many(self, queries: List[str], top_k: int = 5, min_score: Optional[float] = None,
+                    evidence_level=None, origin=None, since=None, until=None) -> List[List[Dict]]:
+        """Search for several queries with one embedding batch, one bulk store query and one record fetch"""
+        if not self.store:
             logger.error("Vector database not initialized")
-            return []
+            return [[] for _ in queries]
         
         try:
-            # Generate query embedding
-            query_embedding = self.embedder.encode(query).tolist()
-            
-            # Search in Pinecone
-            results = self.index.query(
-                vector=query_embedding,
-                top_k=top_k,
-                include_metadata=True
+            # Generate query embeddings
+            query_embeddings = self.embed_queries(queries)
+            metadata_filter = build_filter(
+                evidence_level=evidence_level,
+                origin=origin,
+                since=since.timestamp() if isinstance(since, datetime) else since,
+                until=until.timestamp() if isinstance(until, datetime) else until
             )
             
-            # Format results
-            formatted_results = []
-            for match in results.get('matches', []):
-                metadata = match.get('metadata', {})
-                
-                # Parse sources from JSON string
-                sources = []
-                if metadata.get('sources'):
-                    try:
-                        sources = json.loads(metadata.get('sources', '[]'))
-                    except json.JSONDecodeError:
-                        sources = []
-                
-                formatted_results.append({
-                    "claim": metadata.get("claim", ""),
-                    "evidence_level": metadata.get("evidence_level", ""),
-                    "explanation": metadata.get("explanation", ""),
-                    "sources": sources,
-                    "relevance_score": match.get('score', 0)
-                })
+            # Phase 1: ids and scores only
+            with telemetry.span("vector_query", backend=self.backend):
+                all_matches = self.store.query_many(
+                    [embedding.tolist() for embedding in query_embeddings],
+                    # A few extra dense ranks so fusion can reorder the top_k
+                    top_k=min(2 * top_k, max(top_k, Config.HYBRID_CANDIDATES)) if self.lexical else top_k,
+                    include_metadata=False,
+                    filter=metadata_filter
+                )
+            all_ranked = []
+            for query, query_embedding, matches in zip(queries, query_embeddings, all_matches):
+                scores = {match["id"]: match.get("score", 0) for match in matches}
+                if self.lexical:
+                    ranked = self._fuse_lexical_scores(query, query_embedding, scores, metadata_filter, min_score)
+                else:
+                    ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+                    if min_score is not None:
+                        ranked = [(vector_id, score) for vector_id, score in ranked if score >= min_score]
+                all_ranked.append(ranked[:top_k])
             
-            return formatted_results
+            # Phase 2: claim records for the survivors
+            with telemetry.span("record_fetch"):
+                records = self._get_records(list({vector_id for ranked in all_ranked for vector_id, _ in ranked}))
+            return [
+                [dict(records[vector_id], relevance_score=score) for vector_id, score in ranked if vector_id in records]
+                for ranked in all_ranked
+            ]
             
         except Exception as e:
             logger.error(f"Search error: {str(e)}")
-            return []
+            return [[] for _ in queries]
+
+    @staticmethod
+    def _format_record(vector_id: str, metadata: Dict) -> Dict:
+        """Turn stored metadata into a search result record"""
+        # Parse sources from JSON string
+        sources = []
+        if metadata.get('sources'):
+            try:
+                sources = json.loads(metadata.get('sources', '[]'))
+            except json.JSONDecodeError:
+                sources = []
+        
+        return {
+            "id": vector_id,
+            "claim": metadata.get("claim", ""),
+            "evidence_level": metadata.get("evidence_level", ""),
+            "explanation": metadata.get("explanation", ""),
+            "sources": sources
+        }
+
+    def _get_records(self, ids: List[str]) -> Dict[str, Dict]:
+        """Claim records for the given ids, fetching only those missing from the record cache"""
+        records = {}
+        missing = []
+        for vector_id in ids:
+            record = self.record_cache.get(vector_id)
+            if record is None:
+                missing.append(vector_id)
+            else:
+                records[vector_id] = record
+
+        for vector_id, stored in self.store.fetch(missing).items():
+            record = self._format_record(vector_id, stored["metadata"])
+            self.record_cache.set(vector_id, record)
+            records[vector_id] = record
+        return records
+
+    def _fuse_lexical_scores(self, query: str, query_embedding: np.ndarray, scores: Dict[str, float],
+                             metadata_filter: Optional[Dict] = None,
+                             min_score: Optional[float] = None) -> List[Tuple[str, float]]:
+        """
+        Rank dense and BM25 candidates together with reciprocal rank fusion.
+
+        Fusion only orders the candidates. One is kept if its cosine similarity reaches
+        min_score, or if its normalized BM25 score reaches HYBRID_LEXICAL_MIN (the claim holds
+        about every query term), so a partial keyword hit can't lift an unrelated claim over
+        the threshold. Results keep their cosine similarity as the score.
+        """
+        lexical_hits = self.lexical.search(query, Config.HYBRID_CANDIDATES)
+        lexical_scores = dict(lexical_hits)
+        scores = dict(scores)
+
+        # Keyword hits the dense search missed can only pass on their BM25 score, so only those
+        # strong enough are scored against the query embedding, without loading their metadata
+        missing = [
+            vector_id for vector_id, lexical_score in lexical_hits
+            if vector_id not in scores and (min_score is None or lexical_score >= Config.HYBRID_LEXICAL_MIN)
+        ]
+        if missing:
+            scores.update(self.store.score(query_embedding.tolist(), missing, filter=metadata_filter))
+
+        dense_ranks = {vector_id: rank for rank, vector_id in enumerate(sorted(scores, key=scores.get, reverse=True))}
+        lexical_ranks = {vector_id: rank for rank, (vector_id, _) in enumerate(lexical_hits)}
+
+        def fused(vector_id: str) -> float:
+            return sum(1.0 / (Config.HYBRID_RRF_K + ranks[vector_id] + 1)
+                       for ranks in (dense_ranks, lexical_ranks) if vector_id in ranks)
+
+        kept = [
+            vector_id for vector_id, score in scores.items()
+            if min_score is None or score >= min_score or lexical_scores.get(vector_id, 0.0) >= Config.HYBRID_LEXICAL_MIN
+        ]
+        kept.sort(key=fused, reverse=True)
+        return [(vector_id, scores[vector_id]) for vector_id in kept]
     
     def add_claim(self, claim: Dict) -> bool:
-        """Add a new health claim to the vector database"""
-        if not self.index:
-            return False
+        """Add a new health claim to the vector database, returning False if it was only merged into a near-duplicate"""
+        counts = self.add_claims([claim])
+        return counts["inserted"] + counts["updated"] > 0
+
+    def add_claims(self, claims: List[Dict]) -> Dict[str, int]:
+        """
+        Add several health claims with one batched encode and upsert.
+
+        Returns how many claims were inserted, updated in place (same claim text) and merged
+        into a stored near-duplicate or curated claim (sources only).
+        """
+        counts = {"inserted": 0, "updated": 0, "merged": 0}
+        if not self.store or not claims:
+            return counts
         
         try:
-            # Generate unique ID
-            claim_id = str(uuid.uuid4())
-            
-            # Create text for embedding
-            text = claim.get("claim", "") + " " + claim.get("explanation", "")
-            
-            # Generate embedding
-            embedding = self.embedder.encode(text).tolist()
-            
-            # Prepare metadata
-            metadata = {
-                "claim": claim.get("claim", ""),
-                "evidence_level": claim.get("evidence_level", "Low"),  # Default to Low for web-scraped
-                "explanation": claim.get("explanation", ""),
-                "sources": json.dumps(claim.get("sources", [])),
-                "timestamp": datetime.now().isoformat(),
-                "origin": claim.get("origin", "web_search")  # Track origin of claim
-            }
-            
-            # Upsert vector
-            self.index.upsert(vectors=[(claim_id, embedding, metadata)])
-            logger.info(f"Added new claim to vector database: {claim.get('claim')}")
-            return True
+            # Default to Low evidence and web_search origin for web-scraped claims
+            vectors = self._build_vectors(claims, default_evidence_level="Low", default_origin="web_search")
+            vectors, counts = self._merge_near_duplicates(vectors, claims)
+            self._upsert(vectors)
+            return counts
             
         except Exception as e:
             logger.error(f"Failed to add claim: {str(e)}")
-            return False
\ No newline at end of file
+            return {"inserted": 0, "updated": 0, "merged": 0}
+
+    @staticmethod
+    def _merge_sources(existing: str, incoming: str) -> str:
+        """Union two JSON-encoded source lists, keeping the existing order"""
+        merged = json.loads(existing or "[]")
+        seen = {json.dumps(source, sort_keys=True) for source in merged}
+        for source in json.loads(incoming or "[]"):
+            key = json.dumps(source, sort_keys=True)
+            if key not in seen:
+                seen.add(key)
+                merged.append(source)
+        return json.dumps(merged)
+
+    def _find_duplicates(self, vectors: List[tuple]) -> Dict[str, tuple]:
+        """Map vector ids to the stored (id, values, metadata) of a near-duplicate claim, with one query and one fetch"""
+        if Config.DEDUP_SIMILARITY > 1 or not vectors:
+            return {}
+        matches = self.store.query_many([values for _, values, _ in vectors], top_k=1, include_metadata=False)
+        match_ids = {
+            vector_id: found[0]["id"]
+            for (vector_id, _, _), found in zip(vectors, matches)
+            if found and found[0].get("score", 0) >= Config.DEDUP_SIMILARITY
+        }
+        stored = self.store.fetch(list(set(match_ids.values())))
+        return {
+            vector_id: (match_id, stored[match_id]["values"], stored[match_id]["metadata"])
+            for vector_id, match_id in match_ids.items()
+            if match_id in stored
+        }
+
+    @staticmethod
+    def _update_metadata(stored: Dict, incoming: Dict, claim: Dict) -> Optional[Dict]:
+        """
+        Stored metadata updated with the fields the incoming claim provides, or None when a
+        web-synthesized claim meets a curated one, which only contributes its sources.
+        """
+        if stored.get("origin") != "web_search" and incoming.get("origin") == "web_search":
+            return None
+        updated = dict(stored)
+        for field in ("claim", "evidence_level", "explanation"):
+            if claim.get(field):
+                updated[field] = incoming[field]
+        # A curated copy of a web-synthesized claim makes it curated
+        if incoming.get("origin"):
+            updated["origin"] = incoming["origin"]
+        else:
+            updated.pop("origin", None)
+        # timestamp and created_at keep the time the claim was first stored
+        updated["sources"] = VectorDatabaseClient._merge_sources(stored.get("sources"), incoming.get("sources"))
+        return updated
+
+    def _merge_near_duplicates(self, vectors: List[tuple], claims: List[Dict]) -> Tuple[List[tuple], Dict[str, int]]:
+        """
+        Upsert semantics for new vectors built from claims, returning the vectors to write and per-outcome counts.
+
+        A claim with the same id updates the fields it provides and adds its sources (see
+        _update_metadata). A different but near-identical claim only adds its sources to the
+        stored one.
+        """
+        existing = self.store.fetch([vector_id for vector_id, _, _ in vectors])
+        duplicates = self._find_duplicates([vector for vector in vectors if vector[0] not in existing])
+        pending: Dict[str, tuple] = {}
+        counts = {"inserted": 0, "updated": 0, "merged": 0}
+
+        for (vector_id, values, metadata), claim in zip(vectors, claims):
+            same = pending.get(vector_id)
+            if same is None and vector_id in existing:
+                same = (vector_id, existing[vector_id]["values"], existing[vector_id]["metadata"])
+            if same is not None:
+                updated = self._update_metadata(same[2], metadata, claim)
+                if updated is None:
+                    updated = dict(same[2])
+                    updated["sources"] = self._merge_sources(same[2].get("sources"), metadata.get("sources"))
+                    pending[vector_id] = (vector_id, same[1], updated)
+                    counts["merged"] += 1
+                    logger.info(f"Merged web sources into curated claim {vector_id}: {metadata.get('claim')}")
+                else:
+                    pending[vector_id] = (vector_id, values, updated)
+                    counts["updated"] += 1
+                    logger.info(f"Updated existing claim {vector_id}: {metadata.get('claim')}")
+                continue
+
+            target = None
+            if Config.DEDUP_SIMILARITY <= 1:
+                embedding = np.asarray(values, dtype=np.float32)
+                for other in pending.values():
+                    if float(np.dot(np.asarray(other[1], dtype=np.float32), embedding)) >= Config.DEDUP_SIMILARITY:
+                        target = other
+                        break
+            if target is None and vector_id in duplicates:
+                # A stored claim already changed by this batch is merged into its pending copy
+                target = pending.get(duplicates[vector_id][0], duplicates[vector_id])
+
+            if target is None:
+                pending[vector_id] = (vector_id, values, metadata)
+                counts["inserted"] += 1
+                logger.info(f"Added new claim to vector database: {metadata.get('claim')}")
+                continue
+
+            target_id, target_values, target_metadata = target
+            target_metadata = dict(target_metadata)
+            target_metadata["sources"] = self._merge_sources(target_metadata.get("sources"), metadata.get("sources"))
+            pending[target_id] = (target_id, target_values, target_metadata)
+            counts["merged"] += 1
+            logger.info(f"Merged claim into existing near-duplicate {target_id}: {metadata.get('claim')}")
+
+        return list(pending.values()), counts
@@ -0,0 +1,567 @@
+import os
+import json
+import logging
+import threading
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+import numpy as np
+from config.settings import Config
+from utils.file_lock import FileLock
+
+logger = logging.getLogger(__name__)
+
+# (id, embedding, metadata) triples, the same shape Pinecone's upsert accepts
+VectorRecord = Tuple[str, List[float], Dict]
+
+def build_filter(evidence_level=None, origin=None, since: Optional[float] = None,
+                 until: Optional[float] = None) -> Optional[Dict]:
+    """Build a Pinecone-syntax metadata filter; levels and origins may be a value or a list"""
+    conditions = {}
+    if evidence_level:
+        levels = [evidence_level] if isinstance(evidence_level, str) else list(evidence_level)
+        conditions["evidence_level"] = {"$in": levels}
+    if origin:
+        origins = [origin] if isinstance(origin, str) else list(origin)
+        conditions["origin"] = {"$in": origins}
+    if since is not None or until is not None:
+        # Range operators only apply to numbers, so filter on the epoch timestamp
+        created_at = {}
+        if since is not None:
+            created_at["$gte"] = since
+        if until is not None:
+            created_at["$lte"] = until
+        conditions["created_at"] = created_at
+    return conditions or None
+
+def _compare(operator: str, value, operand) -> bool:
+    if operator == "$eq":
+        return value == operand
+    if operator == "$ne":
+        return value != operand
+    if operator == "$in":
+        return value in operand
+    if operator == "$nin":
+        return value not in operand
+    if value is None:
+        return False
+    if operator == "$gt":
+        return value > operand
+    if operator == "$gte":
+        return value >= operand
+    if operator == "$lt":
+        return value < operand
+    if operator == "$lte":
+        return value <= operand
+    raise ValueError(f"Unsupported filter operator: {operator}")
+
+def matches_filter(metadata: Dict, metadata_filter: Optional[Dict]) -> bool:
+    """Evaluate the Pinecone filter subset produced by build_filter against a metadata dict"""
+    if not metadata_filter:
+        return True
+    for field, condition in metadata_filter.items():
+        if field == "$and":
+            if not all(matches_filter(metadata, sub) for sub in condition):
+                return False
+            continue
+        if not isinstance(condition, dict):
+            condition = {"$eq": condition}
+        value = metadata.get(field)
+        if not all(_compare(operator, value, operand) for operator, operand in condition.items()):
+            return False
+    return True
+
+class VectorStore(ABC):
+    """Interface shared by the vector index backends"""
+    @abstractmethod
+    def upsert(self, vectors: List[VectorRecord]):
+        """Insert or overwrite a batch of vectors"""
+        raise NotImplementedError
+
+    @abstractmethod
+    def query(self, vector: List[float], top_k: int = 5, include_metadata: bool = True,
+              filter: Optional[Dict] = None) -> List[Dict]:
+        """Return the top_k matches (passing the metadata filter) as dicts with id, score and metadata"""
+        raise NotImplementedError
+
+    def query_many(self, vectors: List[List[float]], top_k: int = 5, include_metadata: bool = True,
+                   filter: Optional[Dict] = None) -> List[List[Dict]]:
+        """Run several queries, returning one match list per vector"""
+        return [self.query(vector, top_k=top_k, include_metadata=include_metadata, filter=filter) for vector in vectors]
+
+    @abstractmethod
+    def fetch(self, ids: List[str]) -> Dict[str, Dict]:
+        """Return stored values and metadata for the given ids, skipping unknown ones"""
+        raise NotImplementedError
+
+    def score(self, vector: List[float], ids: List[str], filter: Optional[Dict] = None) -> Dict[str, float]:
+        """Cosine similarity of the given stored ids (passing the metadata filter) to a query vector"""
+        # Backends that can't restrict a query to ids pay a full fetch
+        query = np.asarray(vector, dtype=np.float32)
+        query = query / max(float(np.linalg.norm(query)), 1e-12)
+        return {
+            vector_id: float(np.dot(np.asarray(stored["values"], dtype=np.float32), query))
+            for vector_id, stored in self.fetch(ids).items()
+            if matches_filter(stored["metadata"], filter)
+        }
+
+    @abstractmethod
+    def count(self) -> int:
+        """Number of vectors currently stored"""
+        raise NotImplementedError
+
+    @abstractmethod
+    def iter_metadata(self, batch_size: int = 100) -> Iterator[Tuple[str, Dict]]:
+        """Yield (id, metadata) for every stored vector"""
+        raise NotImplementedError
+
+    def flush(self):
+        """Persist any buffered writes"""
+
+    def close(self):
+        """Release resources held by the backend"""
+        self.flush()
+
+class PineconeVectorStore(VectorStore):
+    """Vector store backed by a Pinecone serverless index"""
+    FETCH_BATCH_SIZE = 100
+
+    def __init__(self, index_name: str = Config.VECTOR_DB_INDEX, dimension: int = Config.VECTOR_DIMENSION):
+        from pinecone import Pinecone, ServerlessSpec
+
+        pc = Pinecone(api_key=Config.PINECONE_API_KEY)
+
+        # Check if index exists, create if not
+        if index_name not in pc.list_indexes().names():
+            pc.create_index(
+                name=index_name,
+                dimension=dimension,
+                metric="cosine",
+                spec=ServerlessSpec(
+                    cloud="aws",
+                    region='us-east-1'
+                )
+            )
+            logger.info(f"Created new Pinecone index: {index_name}")
+
+        # Connect to index
+        self.index = pc.Index(index_name)
+        logger.info(f"Connected to Pinecone index: {index_name}")
+
+    def upsert(self, vectors: List[VectorRecord]):
+        if vectors:
+            self.index.upsert(vectors=vectors)
+
+    def query(self, vector: List[float], top_k: int = 5, include_metadata: bool = True,
+              filter: Optional[Dict] = None) -> List[Dict]:
+        results = self.index.query(
+            vector=vector,
+            top_k=top_k,
+            include_metadata=include_metadata,
+            filter=filter
+        )
+        return [
+            {
+                "id": match.get("id"),
+                "score": match.get("score", 0),
+                "metadata": match.get("metadata", {}) or {}
+            }
+            for match in results.get("matches", [])
+        ]
+
+    def query_many(self, vectors: List[List[float]], top_k: int = 5, include_metadata: bool = True,
+                   filter: Optional[Dict] = None) -> List[List[Dict]]:
+        # Pinecone has no multi-vector query; overlap the round trips instead
+        if len(vectors) <= 1:
+            return super().query_many(vectors, top_k=top_k, include_metadata=include_metadata, filter=filter)
+        with ThreadPoolExecutor(max_workers=min(len(vectors), Config.HTTP_MAX_PER_HOST)) as executor:
+            return list(executor.map(
+                lambda vector: self.query(vector, top_k=top_k, include_metadata=include_metadata, filter=filter),
+                vectors
+            ))
+
+    def fetch(self, ids: List[str]) -> Dict[str, Dict]:
+        fetched = {}
+        ids = list(ids)
+        # Ids travel in the query string, so large lookups are split into several requests
+        for start in range(0, len(ids), self.FETCH_BATCH_SIZE):
+            response = self.index.fetch(ids=ids[start:start + self.FETCH_BATCH_SIZE])
+            vectors = getattr(response, "vectors", None)
+            if vectors is None:
+                vectors = response.get("vectors", {})
+
+            for vector_id, vector in vectors.items():
+                values = getattr(vector, "values", None)
+                metadata = getattr(vector, "metadata", None)
+                if isinstance(vector, dict):
+                    values = vector.get("values")
+                    metadata = vector.get("metadata")
+                fetched[vector_id] = {"values": values or [], "metadata": metadata or {}}
+        return fetched
+
+    def count(self) -> int:
+        stats = self.index.describe_index_stats()
+        return stats.get("total_vector_count", 0)
+
+    def iter_metadata(self, batch_size: int = 100) -> Iterator[Tuple[str, Dict]]:
+        # Id listing is only available on serverless indexes
+        for ids in self.index.list(limit=batch_size):
+            for vector_id, vector in self.fetch(list(ids)).items():
+                yield vector_id, vector["metadata"]
+
+class LocalVectorStore(VectorStore):
+    """
+    In-process vector store on a contiguous float32 matrix, persisted to a memory-mapped file.
+
+    Writes are buffered and flushed after flush_interval seconds (with autosave) or on flush()
+    and close(). A flush only writes the rows that changed and appends their metadata to a
+    log, which is folded back into the metadata snapshot once it outgrows the index.
+    The index is locked to the first process that opens it.
+    """
+    VECTORS_FILE = "vectors.f32"
+    METADATA_FILE = "metadata.json"
+    METADATA_LOG = "metadata.jsonl"
+    LOCK_FILE = ".lock"
+
+    def __init__(self, path: str = Config.LOCAL_INDEX_DIR, dimension: int = Config.VECTOR_DIMENSION,
+                 use_hnsw: bool = Config.LOCAL_INDEX_HNSW, autosave: bool = True,
+                 flush_interval: float = Config.LOCAL_INDEX_FLUSH_INTERVAL):
+        self.path = path
+        self.dimension = dimension
+        self.autosave = autosave
+        self.flush_interval = flush_interval
+        self._lock = threading.RLock()
+        self._matrix = np.zeros((0, dimension), dtype=np.float32)
+        self._size = 0
+        self._ids: List[str] = []
+        self._metadata: List[Dict] = []
+        self._positions: Dict[str, int] = {}
+        # Positions written since the last flush, rows already on disk and entries in the log
+        self._dirty: Set[int] = set()
+        self._persisted = 0
+        self._log_entries = 0
+        self._timer: Optional[threading.Timer] = None
+
+        # Optional approximate index for large corpora; exact NumPy search otherwise
+        self._hnsw = None
+        self._hnsw_size = 0
+        # Positions whose vector changed after it was added to the graph, scored exactly
+        self._hnsw_stale: Set[int] = set()
+        self._use_hnsw = use_hnsw and self._faiss_available()
+
+        # Each process flushes its own in-memory copy, so only one may have the index open
+        self._file_lock = FileLock(os.path.join(path, self.LOCK_FILE))
+        self._file_lock.acquire()
+        self._load()
+
+    @staticmethod
+    def _faiss_available() -> bool:
+        try:
+            import faiss  # noqa: F401
+            return True
+        except ImportError:
+            logger.warning("faiss is not installed, falling back to exact NumPy search")
+            return False
+
+    def _load(self):
+        """Map a previously persisted index into memory and replay the metadata log"""
+        vectors_path = os.path.join(self.path, self.VECTORS_FILE)
+        metadata_path = os.path.join(self.path, self.METADATA_FILE)
+        log_path = os.path.join(self.path, self.METADATA_LOG)
+        if not os.path.exists(vectors_path):
+            return
+
+        ids, metadata = [], []
+        if os.path.exists(metadata_path):
+            with open(metadata_path, "r") as f:
+                stored = json.load(f)
+            if stored.get("dimension", self.dimension) != self.dimension:
+                logger.error(f"Local index at {self.path} has a different dimension, ignoring it")
+                return
+            ids = stored.get("ids", [])
+            metadata = stored.get("metadata", [])
+        positions = {vector_id: i for i, vector_id in enumerate(ids)}
+
+        if os.path.exists(log_path):
+            with open(log_path, "r") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        # A torn last line from a crash mid-append
+                        break
+                    position = positions.get(entry["id"])
+                    if position is None:
+                        positions[entry["id"]] = len(ids)
+                        ids.append(entry["id"])
+                        metadata.append(entry["metadata"])
+                    else:
+                        metadata[position] = entry["metadata"]
+                    self._log_entries += 1
+
+        # Rows are written before their log entries, so the vector file covers every logged id
+        rows = os.path.getsize(vectors_path) // (4 * self.dimension)
+        if rows < len(ids):
+            logger.warning(f"Local index at {self.path} is missing {len(ids) - rows} vectors, dropping them")
+            for vector_id in ids[rows:]:
+                del positions[vector_id]
+            ids, metadata = ids[:rows], metadata[:rows]
+
+        if ids:
+            # Pages are only read from disk when first touched, so start-up is constant time
+            self._matrix = np.memmap(vectors_path, dtype=np.float32, mode="r", shape=(len(ids), self.dimension))
+        self._size = len(ids)
+        self._persisted = len(ids)
+        self._ids = ids
+        self._metadata = metadata
+        self._positions = positions
+        logger.info(f"Loaded local vector index with {self._size} vectors from {self.path}")
+
+    def _ensure_capacity(self, required: int):
+        """Grow the backing matrix geometrically, copying it off the read-only memmap"""
+        if isinstance(self._matrix, np.memmap) or required > self._matrix.shape[0]:
+            capacity = max(required, 2 * self._matrix.shape[0], 64)
+            grown = np.zeros((capacity, self.dimension), dtype=np.float32)
+            grown[:self._size] = self._matrix[:self._size]
+            self._matrix = grown
+
+    def upsert(self, vectors: List[VectorRecord]):
+        if not vectors:
+            return
+
+        with self._lock:
+            new_count = sum(1 for vector_id, _, _ in vectors if vector_id not in self._positions)
+            self._ensure_capacity(self._size + new_count)
+
+            for vector_id, values, metadata in vectors:
+                embedding = np.asarray(values, dtype=np.float32)
+                norm = np.linalg.norm(embedding)
+                if norm > 0:
+                    embedding = embedding / norm
+
+                position = self._positions.get(vector_id)
+                if position is None:
+                    position = self._size
+                    self._size += 1
+                    self._ids.append(vector_id)
+                    self._metadata.append(metadata)
+                    self._positions[vector_id] = position
+                else:
+                    self._metadata[position] = metadata
+                    # HNSW graphs can't update vectors in place; score the new vector exactly
+                    if position < self._hnsw_size:
+                        self._hnsw_stale.add(position)
+                self._matrix[position] = embedding
+                self._dirty.add(position)
+
+            if self.autosave:
+                self._schedule_flush()
+
+    def _schedule_flush(self):
+        """Flush once flush_interval seconds after the first unsaved write"""
+        if self.flush_interval <= 0:
+            self.flush()
+            return
+        if self._timer is None:
+            self._timer = threading.Timer(self.flush_interval, self._timed_flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _timed_flush(self):
+        with self._lock:
+            self._timer = None
+        try:
+            self.flush()
+        except Exception as e:
+            logger.error(f"Failed to flush local vector index: {str(e)}")
+
+    def query(self, vector: List[float], top_k: int = 5, include_metadata: bool = True,
+              filter: Optional[Dict] = None) -> List[Dict]:
+        with self._lock:
+            if self._size == 0:
+                return []
+
+            query = np.asarray(vector, dtype=np.float32)
+            norm = np.linalg.norm(query)
+            if norm > 0:
+                query = query / norm
+
+            search = self._query_hnsw if self._use_hnsw else self._query_exact
+            if not filter:
+                positions, scores = search(query, top_k)
+            else:
+                # Widen the candidate pool until enough of it passes the filter
+                k = top_k * 4
+                while True:
+                    positions, scores = search(query, min(k, self._size))
+                    kept = [(p, s) for p, s in zip(positions, scores) if matches_filter(self._metadata[p], filter)]
+                    if len(kept) >= top_k or k >= self._size:
+                        break
+                    k *= 4
+                positions = [p for p, _ in kept[:top_k]]
+                scores = [s for _, s in kept[:top_k]]
+
+            return [
+                {
+                    "id": self._ids[position],
+                    "score": float(score),
+                    "metadata": dict(self._metadata[position]) if include_metadata else {}
+                }
+                for position, score in zip(positions, scores)
+            ]
+
+    def query_many(self, vectors: List[List[float]], top_k: int = 5, include_metadata: bool = True,
+                   filter: Optional[Dict] = None) -> List[List[Dict]]:
+        if filter or self._use_hnsw:
+            return super().query_many(vectors, top_k=top_k, include_metadata=include_metadata, filter=filter)
+
+        with self._lock:
+            if self._size == 0 or not len(vectors):
+                return [[] for _ in vectors]
+
+            queries = np.asarray(vectors, dtype=np.float32)
+            queries = queries / np.maximum(np.linalg.norm(queries, axis=1, keepdims=True), 1e-12)
+
+            k = min(top_k, self._size)
+            # Queries are scored a block at a time with one matrix product, keeping the
+            # score matrix around 256 MB however large the index is
+            block = max(1, (64 * 1024 * 1024) // self._size)
+            results = []
+            for start in range(0, len(queries), block):
+                scores = self._matrix[:self._size] @ queries[start:start + block].T
+                for column in range(scores.shape[1]):
+                    column_scores = scores[:, column]
+                    top = np.argpartition(-column_scores, k - 1)[:k]
+                    top = top[np.argsort(-column_scores[top])]
+                    results.append([
+                        {
+                            "id": self._ids[position],
+                            "score": float(column_scores[position]),
+                            "metadata": dict(self._metadata[position]) if include_metadata else {}
+                        }
+                        for position in top
+                    ])
+            return results
+
+    def _query_exact(self, query: np.ndarray, top_k: int):
+        """Brute-force cosine similarity over the whole matrix"""
+        scores = self._matrix[:self._size] @ query
+        k = min(top_k, self._size)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return top.tolist(), scores[top].tolist()
+
+    def _query_hnsw(self, query: np.ndarray, top_k: int):
+        """Approximate search through a FAISS HNSW graph kept in step with the matrix"""
+        import faiss
+
+        # Rebuild once updated vectors make up a noticeable share of the graph
+        if self._hnsw is not None and len(self._hnsw_stale) > Config.LOCAL_INDEX_HNSW_STALE * self._hnsw_size:
+            self._hnsw = None
+        if self._hnsw is None:
+            self._hnsw = faiss.IndexHNSWFlat(self.dimension, 32, faiss.METRIC_INNER_PRODUCT)
+            self._hnsw_size = 0
+            self._hnsw_stale = set()
+        if self._hnsw_size < self._size:
+            self._hnsw.add(np.ascontiguousarray(self._matrix[self._hnsw_size:self._size]))
+            self._hnsw_size = self._size
+
+        _, positions = self._hnsw.search(query.reshape(1, -1), min(top_k, self._size))
+        # Stale graph entries are re-scored from the matrix, and always considered
+        candidates = {int(p) for p in positions[0] if p >= 0} | self._hnsw_stale
+        candidates = np.fromiter(candidates, dtype=np.int64)
+        scores = self._matrix[candidates] @ query
+        top = np.argsort(-scores)[:top_k]
+        return candidates[top].tolist(), scores[top].tolist()
+
+    def fetch(self, ids: List[str]) -> Dict[str, Dict]:
+        with self._lock:
+            fetched = {}
+            for vector_id in ids:
+                position = self._positions.get(vector_id)
+                if position is not None:
+                    fetched[vector_id] = {
+                        "values": self._matrix[position].tolist(),
+                        "metadata": dict(self._metadata[position])
+                    }
+            return fetched
+
+    def score(self, vector: List[float], ids: List[str], filter: Optional[Dict] = None) -> Dict[str, float]:
+        with self._lock:
+            positions = [
+                (vector_id, self._positions[vector_id]) for vector_id in ids
+                if vector_id in self._positions and matches_filter(self._metadata[self._positions[vector_id]], filter)
+            ]
+            if not positions:
+                return {}
+            query = np.asarray(vector, dtype=np.float32)
+            query = query / max(float(np.linalg.norm(query)), 1e-12)
+            scores = self._matrix[[position for _, position in positions]] @ query
+            return {vector_id: float(score) for (vector_id, _), score in zip(positions, scores)}
+
+    def count(self) -> int:
+        return self._size
+
+    def iter_metadata(self, batch_size: int = 100) -> Iterator[Tuple[str, Dict]]:
+        with self._lock:
+            records = list(zip(self._ids[:self._size], self._metadata[:self._size]))
+        yield from records
+
+    def flush(self):
+        """Write changed rows and append their metadata to the log, compacting the log when it is large"""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if not self._dirty:
+                return
+            os.makedirs(self.path, exist_ok=True)
+            vectors_path = os.path.join(self.path, self.VECTORS_FILE)
+            dirty = sorted(self._dirty)
+
+            # Vectors first: a crash before the log is written only loses this flush's new ids
+            with open(vectors_path, "r+b" if os.path.exists(vectors_path) else "wb") as f:
+                row_bytes = 4 * self.dimension
+                for position in dirty:
+                    if position < self._persisted:
+                        f.seek(position * row_bytes)
+                        f.write(self._matrix[position].tobytes())
+                f.seek(self._persisted * row_bytes)
+                f.write(np.ascontiguousarray(self._matrix[self._persisted:self._size]).tobytes())
+                f.truncate(self._size * row_bytes)
+            self._persisted = self._size
+
+            if self._log_entries + len(dirty) > max(self._size, 1024):
+                self._compact()
+            else:
+                with open(os.path.join(self.path, self.METADATA_LOG), "a") as f:
+                    for position in dirty:
+                        f.write(json.dumps({"id": self._ids[position], "metadata": self._metadata[position]}) + "\n")
+                self._log_entries += len(dirty)
+            self._dirty = set()
+
+    def _compact(self):
+        """Atomically rewrite the metadata snapshot and empty the log"""
+        metadata_path = os.path.join(self.path, self.METADATA_FILE)
+        with open(metadata_path + ".tmp", "w") as f:
+            json.dump({"dimension": self.dimension, "ids": self._ids, "metadata": self._metadata}, f)
+        os.replace(metadata_path + ".tmp", metadata_path)
+        log_path = os.path.join(self.path, self.METADATA_LOG)
+        if os.path.exists(log_path):
+            os.remove(log_path)
+        self._log_entries = 0
+
+    def close(self):
+        try:
+            self.flush()
+        finally:
+            self._file_lock.release()
+
+def create_vector_store(backend: Optional[str] = None) -> VectorStore:
+    """Build the vector store selected by configuration"""
+    backend = (backend or Config.VECTOR_BACKEND).lower()
+    if backend == "local":
+        return LocalVectorStore()
+    if backend == "pinecone":
+        return PineconeVectorStore()
+    raise ValueError(f"Unknown vector backend: {backend}")
@@ -0,0 +1,105 @@
+import time
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from config.settings import Config
+
+logger = logging.getLogger(__name__)
+
+class SemanticVerdictCache:
+    """Reuse generated verdicts for claims that are semantically close to an already verified claim"""
+    def __init__(self, max_entries: int = Config.VERDICT_CACHE_SIZE, ttl: float = Config.VERDICT_CACHE_TTL,
+                 max_distance: float = Config.VERDICT_CACHE_MAX_DISTANCE):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_distance = max_distance
+        self._entries: "OrderedDict[int, Dict]" = OrderedDict()
+        # Entries are grouped by (top_k, evidence ids) so lookups only compare embeddings
+        # of claims that were answered from exactly the same evidence
+        self._buckets: Dict[Tuple, List[int]] = {}
+        self._next_id = 0
+        self._revision = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _bucket_key(top_k: int, evidence_ids: List[str]) -> Tuple:
+        return (top_k, tuple(sorted(evidence_ids)))
+
+    def _sync_revision(self, revision):
+        """Drop everything when the vector database has changed since the entries were stored"""
+        if revision != self._revision:
+            if self._entries:
+                logger.info("Evidence set changed, invalidating verdict cache")
+            self._entries.clear()
+            self._buckets.clear()
+            self._revision = revision
+
+    def get(self, embedding: np.ndarray, top_k: int, evidence_ids: List[str], revision=None) -> Optional[Dict]:
+        """Return a cached verdict for a near-identical claim answered from the same evidence"""
+        with self._lock:
+            self._sync_revision(revision)
+            bucket = self._buckets.get(self._bucket_key(top_k, evidence_ids), [])
+            now = time.monotonic()
+
+            best_id, best_similarity = None, -1.0
+            for entry_id in list(bucket):
+                entry = self._entries[entry_id]
+                if entry["expires_at"] < now:
+                    self._remove(entry_id)
+                    continue
+                similarity = float(np.dot(entry["embedding"], embedding))
+                if similarity > best_similarity:
+                    best_id, best_similarity = entry_id, similarity
+
+            if best_id is not None and 1.0 - best_similarity <= self.max_distance:
+                self._entries.move_to_end(best_id)
+                self.hits += 1
+                return self._entries[best_id]["value"]
+
+            self.misses += 1
+            return None
+
+    def set(self, embedding: np.ndarray, top_k: int, evidence_ids: List[str], value: Dict, revision=None):
+        """Store a verdict, evicting the least recently used entry when full"""
+        with self._lock:
+            self._sync_revision(revision)
+            entry_id = self._next_id
+            self._next_id += 1
+            bucket_key = self._bucket_key(top_k, evidence_ids)
+            self._entries[entry_id] = {
+                "embedding": np.asarray(embedding, dtype=np.float32),
+                "bucket": bucket_key,
+                "value": value,
+                "expires_at": time.monotonic() + self.ttl
+            }
+            self._buckets.setdefault(bucket_key, []).append(entry_id)
+
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+
+    def _remove(self, entry_id: int):
+        entry = self._entries.pop(entry_id)
+        bucket = self._buckets.get(entry["bucket"], [])
+        bucket.remove(entry_id)
+        if not bucket:
+            self._buckets.pop(entry["bucket"], None)
+
+    def invalidate(self):
+        """Drop every cached verdict"""
+        with self._lock:
+            self._entries.clear()
+            self._buckets.clear()
+
+    def stats(self) -> Dict:
+        """Size and hit-rate counters"""
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0
+        }
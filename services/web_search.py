@@ -1,28 +1,47 @@
-import re
+import json
+import asyncio
 import logging
-import requests
-from typing import List, Dict
-from bs4 import BeautifulSoup
+from typing import Callable, List, Dict
+from urllib.parse import urlsplit
+import numpy as np
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from config.settings import Config
+from utils.html_extraction import extract_main_text
+from .http_client import HttpClient, get_http_client, run_sync
+from .http_cache import HttpCache
+from .telemetry import get_telemetry
 
 logger = logging.getLogger(__name__)
+telemetry = get_telemetry()
 
 class WebSearchService:
     """Service for searching health information on the web"""
-    def __init__(self):
+    def __init__(self, http_client: HttpClient = None, cache: HttpCache = None):
         self.serpapi_key = Config.SERPAPI_KEY
+        self.http = http_client or get_http_client()
+        self.cache = cache
+        if self.cache is None and Config.HTTP_CACHE_PATH:
+            try:
+                self.cache = HttpCache()
+            except Exception as e:
+                logger.error(f"Failed to open HTTP cache: {str(e)}")
+        if self.cache:
+            telemetry.register_cache("http", self.cache.stats)
         self.text_splitter = RecursiveCharacterTextSplitter(
             chunk_size=1000,
             chunk_overlap=200
         )
-        
+
     def search_health_claim(self, query: str) -> List[Dict]:
         """Search for health claim information using SerpAPI"""
+        return run_sync(self.search_health_claim_async(query))
+
+    async def search_health_claim_async(self, query: str) -> List[Dict]:
+        """Search for health claim information using SerpAPI without blocking the event loop"""
         try:
             search_query = f"health claim {query} evidence research"
             search_url = "https://serpapi.com/search"
-            
+
             params = {
                 "q": search_query,
                 "api_key": self.serpapi_key,
@@ -30,15 +49,16 @@ class WebSearchService:
                 "num": 10,  # Get top 10 results
                 "gl": "us"  # US results
             }
-            
-            response = requests.get(search_url, params=params)
-            if response.status_code != 200:
-                logger.error(f"SerpAPI error: {response.status_code}")
+
+            # The API key is left out of the cache key
+            cache_id = json.dumps({k: v for k, v in params.items() if k != "api_key"}, sort_keys=True)
+            with telemetry.span("serp_search"):
+                results = await self._cached_get("serp", cache_id, search_url, self._parse_serp_response, params=params)
+            if results is None:
                 return []
-                
-            results = response.json()
+
             organic_results = results.get("organic_results", [])
-            
+
             # Filter for trusted domains
             trusted_results = []
             for result in organic_results:
@@ -49,58 +69,165 @@ class WebSearchService:
                         "link": link,
                         "snippet": result.get("snippet", "")
                     })
-            
-            # Extract content from top 3 trusted sources
-            extracted_content = []
-            for result in trusted_results[:3]:
-                content = self._extract_article_content(result["link"])
-                if content:
-                    extracted_content.append({
-                        "title": result["title"],
-                        "link": result["link"],
-                        "content": content
-                    })
-            
-            return extracted_content
-            
+
+            # Extract content from the first 3 trusted sources that respond
+            with telemetry.span("page_fetch"):
+                return await self._fetch_articles_async(trusted_results)
+
         except Exception as e:
             logger.error(f"Web search error: {str(e)}")
             return []
-    
+
+    async def _fetch_articles_async(self, results: List[Dict]) -> List[Dict]:
+        """Fetch trusted pages concurrently and keep the first WEB_FETCH_TARGET that yield content"""
+        # Over-fetch so one slow or empty page doesn't leave us short of sources
+        candidates = results[:Config.WEB_FETCH_CANDIDATES]
+        if not candidates:
+            return []
+
+        domain_limits: Dict[str, asyncio.Semaphore] = {}
+
+        async def fetch(rank: int, result: Dict):
+            domain = urlsplit(result["link"]).netloc
+            semaphore = domain_limits.setdefault(domain, asyncio.Semaphore(Config.WEB_FETCH_PER_DOMAIN))
+            async with semaphore:
+                content = await self._extract_article_content_async(result["link"])
+            return rank, result, content
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + Config.WEB_FETCH_DEADLINE
+        pending = {asyncio.create_task(fetch(rank, result)) for rank, result in enumerate(candidates)}
+        fetched = []
+
+        try:
+            while pending and len(fetched) < Config.WEB_FETCH_TARGET:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    logger.warning(f"Article fetch deadline reached with {len(fetched)} articles")
+                    break
+                done, pending = await asyncio.wait(pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is not None:
+                        continue
+                    rank, result, content = task.result()
+                    if content:
+                        fetched.append((rank, {
+                            "title": result["title"],
+                            "link": result["link"],
+                            "content": content
+                        }))
+        finally:
+            # Enough good articles (or out of time): stop the stragglers
+            for task in pending:
+                task.cancel()
+
+        # Keep the search engine's ranking rather than arrival order
+        fetched.sort(key=lambda item: item[0])
+        return [article for _, article in fetched[:Config.WEB_FETCH_TARGET]]
+
+    async def _cached_get(self, namespace: str, cache_id: str, url: str, parse, **kwargs):
+        """GET through the HTTP cache, revalidating stale entries with ETag/Last-Modified"""
+        # SQLite reads and writes (with decompression) block, keep them off the event loop
+        entry = await asyncio.to_thread(self.cache.get, namespace, cache_id) if self.cache else None
+        if entry is not None and entry["fresh"]:
+            return entry["body"]
+        if self.cache and self.cache.offline:
+            # Replay mode never touches the network
+            return None
+
+        headers = dict(kwargs.pop("headers", {}))
+        headers.update(HttpCache.revalidation_headers(entry))
+        max_bytes = kwargs.pop("max_bytes", None)
+        if max_bytes:
+            response = await self.http.get_capped(url, max_bytes, headers=headers, **kwargs)
+        else:
+            response = await self.http.get(url, headers=headers, **kwargs)
+
+        if response.status_code == 304 and entry is not None:
+            await asyncio.to_thread(self.cache.refresh, namespace, cache_id, entry)
+            return entry["body"]
+        if response.status_code != 200:
+            logger.error(f"HTTP {response.status_code} for {namespace} request {url}")
+            return None
+
+        body = await parse(response)
+        if self.cache and body:
+            await asyncio.to_thread(
+                self.cache.set, namespace, cache_id, body,
+                etag=response.headers.get("ETag"),
+                last_modified=response.headers.get("Last-Modified")
+            )
+        return body
+
+    @staticmethod
+    async def _parse_serp_response(response) -> Dict:
+        return response.json()
+
+    async def _parse_article_response(self, response) -> str:
+        # Parsing is CPU-bound, keep it off the event loop
+        return await asyncio.to_thread(self._parse_article_html, response.content)
+
+    def select_passages(self, articles: List[Dict], claim_embedding: np.ndarray,
+                        embed_texts: Callable[[List[str]], np.ndarray], top_k: int = Config.WEB_PASSAGE_TOP_K) -> List[Dict]:
+        """
+        Split articles into passages, embed them in one batch and keep the top_k closest to the claim.
+
+        Returns one entry per article that contributed a passage, with its passages in document
+        order as the content and the best passage similarity as the score, best article first.
+        """
+        passages = []
+        for article_index, article in enumerate(articles):
+            chunks = self.text_splitter.split_text(article["content"])[:Config.WEB_PASSAGES_PER_ARTICLE]
+            passages.extend((article_index, chunk_index, chunk) for chunk_index, chunk in enumerate(chunks))
+        if len(passages) <= top_k:
+            return articles
+
+        embeddings = embed_texts([text for _, _, text in passages])
+        scores = embeddings @ np.asarray(claim_embedding, dtype=np.float32)
+        best = np.argsort(-scores)[:top_k]
+
+        selected: Dict[int, List] = {}
+        for position in best:
+            article_index, chunk_index, text = passages[position]
+            selected.setdefault(article_index, []).append((chunk_index, text, float(scores[position])))
+
+        ranked = []
+        for article_index, chosen in selected.items():
+            chosen.sort()
+            ranked.append({
+                **articles[article_index],
+                "content": "\n...\n".join(text for _, text, _ in chosen),
+                "score": max(score for _, _, score in chosen)
+            })
+        ranked.sort(key=lambda article: article["score"], reverse=True)
+        logger.info(f"Kept {len(best)} of {len(passages)} passages from {len(ranked)} of {len(articles)} articles")
+        return ranked
+
+    def close(self):
+        """Close the HTTP cache"""
+        if self.cache:
+            self.cache.close()
+
     def _extract_article_content(self, url: str) -> str:
         """Extract main content from a webpage"""
+        return run_sync(self._extract_article_content_async(url))
+
+    async def _extract_article_content_async(self, url: str) -> str:
+        """Download a webpage and extract its main content off the event loop"""
         try:
             headers = {
                 "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
             }
-            
-            response = requests.get(url, headers=headers, timeout=10)
-            if response.status_code != 200:
-                return ""
-                
-            soup = BeautifulSoup(response.content, "html.parser")
-            
-            # Remove unwanted elements
-            for tag in soup(["script", "style", "nav", "footer", "header", "aside"]):
-                tag.extract()
-            
-            # Extract article content - focus on main content areas
-            article_tags = soup.find_all(["article", "main", "div", "section"])
-            content = ""
-            
-            for tag in article_tags:
-                if len(tag.get_text(strip=True)) > 200:  # Only substantial content
-                    content += tag.get_text(strip=True) + "\n\n"
-                    
-            # Clean the text
-            content = re.sub(r'\s+', ' ', content).strip()
-            
-            # Truncate if too long
-            if len(content) > 10000:
-                content = content[:10000]
-                
-            return content
-            
+
+            content = await self._cached_get("article", url, url, self._parse_article_response,
+                                             headers=headers, timeout=10, max_bytes=Config.WEB_FETCH_MAX_BYTES)
+            return content or ""
+
         except Exception as e:
             logger.error(f"Content extraction error for {url}: {str(e)}")
-            return ""
\ No newline at end of file
+            return ""
+
+    @staticmethod
+    def _parse_article_html(html: bytes) -> str:
+        """Extract main content from downloaded HTML"""
+        return extract_main_text(html, max_chars=10000)
@@ -38,46 +38,54 @@ def show_claim_verification(assistant):
             st.error("Please set up your API credentials to continue.")
         else:
             with st.spinner("Analyzing claim... this may take a moment as I search my database and trusted medical sources..."):
-                # Process the claim
-                response, results, new_content_added = assistant.verify_claim(claim, top_k=search_k)
+                # Process the claim; the verdict itself is streamed below
+                if Config.STREAM_RESPONSES:
+                    tokens, results, new_content_added = assistant.verify_claim_stream(claim, top_k=search_k)
+                else:
+                    response, results, new_content_added = assistant.verify_claim(claim, top_k=search_k)
+                    tokens = iter([response])
                 
-                # Display results
-                st.subheader("Analysis Results")
-                st.markdown(response)
-                
-                # Display references
-                if results:
-                    st.subheader("Reference Sources")
-                    for i, ref in enumerate(results):
-                        with st.expander(f"Reference {i+1}: {ref.get('claim', 'Unknown Claim')}"):
-                            st.markdown(f"**Evidence Level**: {ref.get('evidence_level', 'Not specified')}")
-                            st.markdown(f"**Explanation**: {ref.get('explanation', 'Not available')}")
+            # Display results as they are generated
+            st.subheader("Analysis Results")
+            response_placeholder = st.empty()
+            response = ""
+            for token in tokens:
+                response += token
+                response_placeholder.markdown(response)
+            
+            # Display references
+            if results:
+                st.subheader("Reference Sources")
+                for i, ref in enumerate(results):
+                    with st.expander(f"Reference {i+1}: {ref.get('claim', 'Unknown Claim')}"):
+                        st.markdown(f"**Evidence Level**: {ref.get('evidence_level', 'Not specified')}")
+                        st.markdown(f"**Explanation**: {ref.get('explanation', 'Not available')}")
 
-                            # Add source display that works for both web content and database content
-                            sources = ref.get('sources', [])
-                            
-                            # Standardize source format
-                            if isinstance(sources, str):
-                                try:
-                                    sources = json.loads(sources)
-                                except json.JSONDecodeError:
-                                    sources = []
-                            
-                            if sources:
-                                st.markdown("**Sources:**")
-                                for source in sources:
-                                    if isinstance(source, dict):
-                                        name = source.get('name', '')
-                                        url = source.get('url', '')
-                                        if name and url:
-                                            st.markdown(f"- [{name}]({url})")
-                                        elif name:
-                                            st.markdown(f"- {name}")
-                                        elif url:
-                                            st.markdown(f"- [{url}]({url})")
-                                    elif isinstance(source, str):
-                                        st.markdown(f"- {source}")
+                        # Add source display that works for both web content and database content
+                        sources = ref.get('sources', [])
+                        
+                        # Standardize source format
+                        if isinstance(sources, str):
+                            try:
+                                sources = json.loads(sources)
+                            except json.JSONDecodeError:
+                                sources = []
+                        
+                        if sources:
+                            st.markdown("**Sources:**")
+                            for source in sources:
+                                if isinstance(source, dict):
+                                    name = source.get('name', '')
+                                    url = source.get('url', '')
+                                    if name and url:
+                                        st.markdown(f"- [{name}]({url})")
+                                    elif name:
+                                        st.markdown(f"- {name}")
+                                    elif url:
+                                        st.markdown(f"- [{url}]({url})")
+                                elif isinstance(source, str):
+                                    st.markdown(f"- {source}")
 
-                            # Show badge if new content was added
-                            if new_content_added:
-                                st.success("✨ New information was found and added to our database!")
\ No newline at end of file
+                        # Show badge if new content was added
+                        if new_content_added:
+                            st.success("✨ New information was found and added to our database!")
\ No newline at end of file
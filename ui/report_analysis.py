@@ -2,9 +2,18 @@
 UI components for the medical report analysis feature.
 """
 
+import itertools
 import streamlit as st
 from config.settings import Config
 
+# Report sections in display order, with their on-screen headings
+SECTION_HEADINGS = {
+    "MEDICAL TERMS EXPLAINED": "Medical Terms Explained",
+    "REPORT SUMMARY FOR PATIENT": "Report Summary",
+    "KEY FINDINGS": "Key Findings",
+    "RECOMMENDED QUESTIONS FOR DOCTOR": "Recommended Questions for Your Doctor"
+}
+
 def show_report_analysis(report_analyzer):
     """
     Display and handle the medical report analysis UI.
@@ -30,6 +39,8 @@ def show_report_analysis(report_analyzer):
         if st.button("Analyze Report", key="analyze_report"):
             if not Config.validate_config():
                 st.error("Please set up your API credentials to continue.")
+            elif Config.STREAM_RESPONSES:
+                _stream_report_analysis(report_analyzer, uploaded_file)
             else:
                 with st.spinner("Analyzing medical report... this may take a moment..."):
                     # Process the report
@@ -37,20 +48,35 @@ def show_report_analysis(report_analyzer):
                     
                     if analysis:
                         # Display sections with appropriate formatting
-                        if "MEDICAL TERMS EXPLAINED" in analysis:
-                            st.subheader("Medical Terms Explained")
-                            st.markdown(analysis["MEDICAL TERMS EXPLAINED"])
-                        
-                        if "REPORT SUMMARY FOR PATIENT" in analysis:
-                            st.subheader("Report Summary")
-                            st.markdown(analysis["REPORT SUMMARY FOR PATIENT"])
-                        
-                        if "KEY FINDINGS" in analysis:
-                            st.subheader("Key Findings")
-                            st.markdown(analysis["KEY FINDINGS"])
-                        
-                        if "RECOMMENDED QUESTIONS FOR DOCTOR" in analysis:
-                            st.subheader("Recommended Questions for Your Doctor")
-                            st.markdown(analysis["RECOMMENDED QUESTIONS FOR DOCTOR"])
+                        for section, heading in SECTION_HEADINGS.items():
+                            if section in analysis:
+                                st.subheader(heading)
+                                st.markdown(analysis[section])
                     else:
-                        st.error("An error occurred while analyzing the report. Please try again.")
\ No newline at end of file
+                        st.error("An error occurred while analyzing the report. Please try again.")
+
+def _stream_report_analysis(report_analyzer, uploaded_file):
+    """
+    Render report sections progressively as the explanation is generated.
+    
+    Args:
+        report_analyzer: MedicalReportAnalyzer instance to process reports
+        uploaded_file: Uploaded PDF file
+    """
+    updates = report_analyzer.analyze_medical_report_stream(uploaded_file)
+    
+    # Extraction and NER happen before the first section arrives
+    with st.spinner("Analyzing medical report... this may take a moment..."):
+        first_update = next(updates, None)
+    
+    if first_update is None:
+        st.error("An error occurred while analyzing the report. Please try again.")
+        return
+    
+    placeholders = {}
+    for section, content in itertools.chain([first_update], updates):
+        if section not in placeholders:
+            # A section appears as soon as its header is complete
+            st.subheader(SECTION_HEADINGS.get(section, section.title()))
+            placeholders[section] = st.empty()
+        placeholders[section].markdown(content)
@@ -24,11 +24,11 @@ def setup_sidebar(vector_db=None):
     status_col1, status_col2 = st.sidebar.columns(2)
     
     # Vector DB Status
-    if vector_db and vector_db.index:
+    if vector_db and vector_db.store:
         try:
-            stats = vector_db.index.describe_index_stats()
+            claim_count = vector_db.count()
             status_col1.success("Vector DB: ✅")
-            st.sidebar.success(f"Connected to vector database with {stats.get('total_vector_count', 0)} health claims")
+            st.sidebar.success(f"Connected to {vector_db.backend} vector database with {claim_count} health claims")
         except Exception as e:
             status_col1.warning("Vector DB: ⚠️")
             st.sidebar.warning(f"Connected to vector database but couldn't get stats: {str(e)}")
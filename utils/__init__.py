@@ -2,7 +2,10 @@
 Utilities package initialization file for MedClarify application.
 """
 
-from .text_processing import extract_json
+from .text_processing import extract_json, clean_text, normalize_text
 from .logging_setup import setup_logger
+from .cache import LRUCache, SQLiteStore
+from .file_lock import FileLock, FileLockedError
 
-__all__ = ["extract_json", "setup_logger"]
\ No newline at end of file
+__all__ = ["extract_json", "clean_text", "normalize_text", "setup_logger", "LRUCache", "SQLiteStore", "FileLock",
+           "FileLockedError"]
\ No newline at end of file
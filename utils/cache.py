@@ -0,0 +1,268 @@
+"""
+Generic caching primitives for MedClarify application.
+"""
+
+import os
+import time
+import zlib
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional
+
+class LRUCache:
+    """
+    Thread-safe in-memory LRU cache with optional per-entry TTL and hit/miss counters.
+    """
+    def __init__(self, maxsize: int = 1024, ttl: Optional[float] = None):
+        """
+        Args:
+            maxsize: Maximum number of entries kept before the least recently used is evicted
+            ttl: Seconds an entry stays valid, or None to never expire
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """
+        Look up a key, refreshing its recency on a hit.
+
+        Args:
+            key: Cache key
+            default: Value returned on a miss
+
+        Returns:
+            Cached value or default
+        """
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at is None or expires_at > time.monotonic():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+            self.misses += 1
+            return default
+
+    def set(self, key: Hashable, value: Any):
+        """
+        Insert or replace a value, evicting the least recently used entries if full.
+
+        Args:
+            key: Cache key
+            value: Value to store
+        """
+        expires_at = time.monotonic() + self.ttl if self.ttl else None
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key: Hashable):
+        """Remove a key if present."""
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        """Drop every entry (counters are kept)."""
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Snapshot of cache counters.
+
+        Returns:
+            Dict with size, hits, misses and hit_rate
+        """
+        total = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0
+        }
+
+class SQLiteStore:
+    """
+    Persistent key/blob store on SQLite with TTL, size-bounded LRU eviction and optional zlib compression.
+    """
+    def __init__(self, path: str, ttl: Optional[float] = None, max_bytes: Optional[int] = None,
+                 compress: bool = False):
+        """
+        Args:
+            path: SQLite database file (parent directories are created)
+            ttl: Seconds an entry stays valid, or None to never expire
+            max_bytes: Upper bound on stored payload bytes, or None for unbounded
+            compress: Whether payloads are zlib-compressed on disk
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.compress = compress
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            "key TEXT PRIMARY KEY, value BLOB NOT NULL, size INTEGER NOT NULL, "
+            "created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed_at)")
+        self._conn.commit()
+
+    def get(self, key: str, include_expired: bool = False) -> Optional[bytes]:
+        """
+        Read a payload.
+
+        Args:
+            key: Entry key
+            include_expired: Return entries past their TTL instead of treating them as misses
+
+        Returns:
+            Stored bytes or None
+        """
+        with self._lock:
+            row = self._conn.execute("SELECT value, created_at FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            value, created_at = row
+            if not include_expired and self.is_expired(created_at):
+                return None
+            self._conn.execute("UPDATE entries SET accessed_at = ? WHERE key = ?", (time.time(), key))
+            self._conn.commit()
+        return zlib.decompress(value) if self.compress else value
+
+    def get_many(self, keys: List[str]) -> Dict[str, bytes]:
+        """
+        Read several payloads with one query per batch of keys.
+
+        Args:
+            keys: Entry keys
+
+        Returns:
+            Stored bytes of the keys that have an unexpired entry
+        """
+        found: Dict[str, bytes] = {}
+        keys = list(dict.fromkeys(keys))
+        now = time.time()
+        with self._lock:
+            # Stay under SQLite's default limit on bound parameters
+            for start in range(0, len(keys), 500):
+                batch = keys[start:start + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT key, value, created_at FROM entries WHERE key IN ({placeholders})", batch
+                ).fetchall()
+                for key, value, created_at in rows:
+                    if not self.is_expired(created_at):
+                        found[key] = value
+            if found:
+                self._conn.executemany("UPDATE entries SET accessed_at = ? WHERE key = ?",
+                                       [(now, key) for key in found])
+                self._conn.commit()
+        if self.compress:
+            return {key: zlib.decompress(value) for key, value in found.items()}
+        return found
+
+    def set_many(self, items: Dict[str, bytes]):
+        """
+        Write several payloads in one transaction.
+
+        Args:
+            items: Raw bytes to store by entry key
+        """
+        now = time.time()
+        rows = []
+        for key, value in items.items():
+            payload = zlib.compress(value) if self.compress else value
+            rows.append((key, payload, len(payload), now, now))
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO entries (key, value, size, created_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                rows
+            )
+            if self.max_bytes:
+                self._evict()
+            self._conn.commit()
+
+    def created_at(self, key: str) -> Optional[float]:
+        """Return the write time of an entry, or None if it doesn't exist."""
+        with self._lock:
+            row = self._conn.execute("SELECT created_at FROM entries WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def is_expired(self, created_at: float) -> bool:
+        """Check a write time against the store TTL."""
+        return bool(self.ttl) and created_at + self.ttl < time.time()
+
+    def set(self, key: str, value: bytes):
+        """
+        Write a payload, evicting least recently accessed entries beyond max_bytes.
+
+        Args:
+            key: Entry key
+            value: Raw bytes to store
+        """
+        payload = zlib.compress(value) if self.compress else value
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries (key, value, size, created_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                (key, payload, len(payload), now, now)
+            )
+            if self.max_bytes:
+                self._evict()
+            self._conn.commit()
+
+    def touch(self, key: str):
+        """Reset the TTL of an entry without rewriting it."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute("UPDATE entries SET created_at = ?, accessed_at = ? WHERE key = ?", (now, now, key))
+            self._conn.commit()
+
+    def delete(self, key: str):
+        """Remove an entry if present."""
+        with self._lock:
+            self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+            self._conn.commit()
+
+    def clear(self):
+        """Remove every entry."""
+        with self._lock:
+            self._conn.execute("DELETE FROM entries")
+            self._conn.commit()
+
+    def _evict(self):
+        """Drop least recently accessed entries until the store fits in max_bytes."""
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        excess = total - self.max_bytes
+        rows = self._conn.execute("SELECT key, size FROM entries ORDER BY accessed_at ASC").fetchall()
+        doomed = []
+        for key, size in rows:
+            if excess <= 0:
+                break
+            doomed.append((key,))
+            excess -= size
+        self._conn.executemany("DELETE FROM entries WHERE key = ?", doomed)
+
+    def close(self):
+        """Close the underlying connection."""
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,64 @@
+"""
+Inter-process lock files for MedClarify's on-disk indexes.
+"""
+
+import os
+import logging
+from typing import Optional
+
+try:
+    import fcntl
+    HAS_FCNTL = True
+except ImportError:  # pragma: no cover - depends on the platform
+    HAS_FCNTL = False
+
+logger = logging.getLogger(__name__)
+
+class FileLockedError(RuntimeError):
+    """Raised when another process already holds a lock file"""
+
+class FileLock:
+    """
+    Exclusive, non-blocking advisory lock held for the lifetime of an index.
+
+    The operating system drops the lock when its process exits, so a crash never leaves a
+    stale lock behind.
+    """
+    def __init__(self, path: str):
+        """
+        Args:
+            path: Lock file to create next to the data it protects
+        """
+        self.path = path
+        self._file: Optional[object] = None
+
+    def acquire(self):
+        """
+        Take the lock without waiting.
+
+        Raises:
+            FileLockedError: Another process holds the lock
+        """
+        if self._file is not None:
+            return
+        if not HAS_FCNTL:
+            logger.warning(f"File locking is not supported here, {self.path} is not protected")
+            return
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        lock_file = open(self.path, "a")
+        try:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            raise FileLockedError(f"{self.path} is held by another process")
+        self._file = lock_file
+
+    def release(self):
+        """Drop the lock if it is held"""
+        if self._file is None:
+            return
+        fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+        self._file.close()
+        self._file = None
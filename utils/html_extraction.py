@@ -0,0 +1,140 @@
+"""
+HTML main-content extraction utilities for MedClarify application.
+"""
+
+import re
+from typing import Dict, List, Tuple
+
+try:
+    import lxml.html
+    from lxml import etree
+    HAS_LXML = True
+except ImportError:  # pragma: no cover - depends on the environment
+    HAS_LXML = False
+
+# Elements that never hold article text
+BOILERPLATE_TAGS = ["script", "style", "nav", "footer", "header", "aside", "noscript", "form", "iframe", "svg"]
+
+# Containers that can be chosen as the main content node
+CONTAINER_TAGS = {"article", "main", "div", "section", "td", "body"}
+
+MIN_PARAGRAPH_CHARS = 25
+
+# Widen the chosen node while its parent holds at least this much more paragraph text
+SIBLING_EXPANSION = 1.5
+
+def _collapse(text: str) -> str:
+    return re.sub(r'\s+', ' ', text).strip()
+
+def _best_container(chains: List[Tuple[List[object], int]]) -> object:
+    """
+    Pick the node that holds the article body.
+
+    Each paragraph credits its full length to its nearest container and half to the
+    container's parent, so the best scoring node directly wraps body text. When body
+    text is spread over sibling blocks, the choice is widened to the ancestor that
+    holds most of the paragraph text.
+
+    Args:
+        chains: (ancestors, text_length) per paragraph, ancestors ordered from the
+            nearest container up to the root
+
+    Returns:
+        The chosen node, or None if there were no paragraphs
+    """
+    # Keyed by id(): bs4 Tags hash and compare by their serialized markup, which is slow
+    # and makes identical sibling containers collide
+    nodes: Dict[int, object] = {}
+    scores: Dict[int, float] = {}
+    totals: Dict[int, int] = {}
+    parents: Dict[int, int] = {}
+    for ancestors, length in chains:
+        keys = [id(node) for node in ancestors]
+        for i, (key, node) in enumerate(zip(keys, ancestors)):
+            nodes[key] = node
+            totals[key] = totals.get(key, 0) + length
+            if i + 1 < len(keys):
+                parents[key] = keys[i + 1]
+        if keys:
+            scores[keys[0]] = scores.get(keys[0], 0.0) + length
+        if len(keys) > 1:
+            scores[keys[1]] = scores.get(keys[1], 0.0) + length / 2
+    if not scores:
+        return None
+
+    key = max(scores, key=scores.get)
+    while True:
+        # Skip wrappers that add no paragraph text of their own
+        wrapper = key
+        while wrapper in parents and totals[parents[wrapper]] == totals[key]:
+            wrapper = parents[wrapper]
+        if wrapper in parents and totals[parents[wrapper]] >= SIBLING_EXPANSION * totals[key]:
+            key = parents[wrapper]
+        else:
+            return nodes[key]
+
+def _extract_with_lxml(html: bytes) -> str:
+    tree = lxml.html.fromstring(html)
+    etree.strip_elements(tree, *BOILERPLATE_TAGS, with_tail=False)
+    etree.strip_elements(tree, etree.Comment, with_tail=False)
+
+    chains = []
+    for p in tree.iter("p"):
+        length = len(_collapse(p.text_content()))
+        if length < MIN_PARAGRAPH_CHARS:
+            continue
+        ancestors = [a for a in p.iterancestors() if a.tag in CONTAINER_TAGS]
+        chains.append((ancestors, length))
+
+    node = _best_container(chains)
+    if node is None:
+        body = tree.find("body")
+        node = body if body is not None else tree
+    return _collapse(" ".join(node.itertext()))
+
+def _extract_with_bs4(html: bytes) -> str:
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, "html.parser")
+    for tag in soup(BOILERPLATE_TAGS):
+        tag.decompose()
+
+    chains = []
+    for p in soup.find_all("p"):
+        length = len(_collapse(p.get_text(" ")))
+        if length < MIN_PARAGRAPH_CHARS:
+            continue
+        ancestors = [a for a in p.parents if a.name in CONTAINER_TAGS]
+        chains.append((ancestors, length))
+
+    node = _best_container(chains)
+    if node is None:
+        node = soup.body or soup
+    return _collapse(node.get_text(" "))
+
+def extract_main_text(html: bytes, max_chars: int = 10000) -> str:
+    """
+    Extract the main readable text of a page in a single pass.
+
+    Boilerplate elements are dropped, one main-content node is chosen by paragraph
+    text density, and its text is collected once (no duplication across nested tags).
+    Uses lxml when installed and falls back to BeautifulSoup's html.parser.
+
+    Args:
+        html: Raw page bytes
+        max_chars: Maximum number of characters returned
+
+    Returns:
+        Extracted text, truncated at a word boundary to max_chars
+    """
+    if not html:
+        return ""
+    try:
+        text = _extract_with_lxml(html) if HAS_LXML else _extract_with_bs4(html)
+    except Exception:
+        # lxml rejects some malformed or encoding-declared documents
+        text = _extract_with_bs4(html)
+
+    if len(text) > max_chars:
+        text = text[:max_chars].rsplit(" ", 1)[0]
+    return text
@@ -22,6 +22,10 @@ def setup_logger(name: str, level: int = logging.INFO, log_file: Optional[str] =
     logger = logging.getLogger(name)
     logger.setLevel(level)
     
+    # Streamlit re-runs the app script on every interaction; only attach handlers once
+    if logger.handlers:
+        return logger
+    
     # Create formatter
     formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
     
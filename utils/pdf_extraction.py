@@ -0,0 +1,192 @@
+"""
+PDF text extraction utilities for MedClarify application.
+"""
+
+import io
+import atexit
+import hashlib
+import threading
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+from typing import BinaryIO, Callable, Iterator, List, Optional, Tuple, Union
+
+try:
+    import pypdfium2 as pdfium
+    HAS_PDFIUM = True
+except ImportError:  # pragma: no cover - depends on the environment
+    HAS_PDFIUM = False
+
+PdfSource = Union[bytes, bytearray, memoryview, BinaryIO]
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_workers = 0
+_pool_lock = threading.Lock()
+
+def _as_stream(source: PdfSource) -> BinaryIO:
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        # BytesIO shares an immutable bytes buffer instead of copying it
+        return io.BytesIO(source)
+    source.seek(0)
+    return source
+
+def pdf_digest(source: PdfSource) -> str:
+    """
+    Compute the SHA-256 of a PDF, hashing in-memory uploads without copying them.
+
+    Args:
+        source: PDF bytes or a seekable binary file object
+
+    Returns:
+        Hex digest of the file contents
+    """
+    stream = _as_stream(source)
+    if isinstance(stream, io.BytesIO):
+        return hashlib.sha256(stream.getbuffer()).hexdigest()
+    digest = hashlib.sha256()
+    for block in iter(lambda: stream.read(1024 * 1024), b""):
+        digest.update(block)
+    stream.seek(0)
+    return digest.hexdigest()
+
+@contextmanager
+def _open(stream: BinaryIO) -> Iterator[Tuple[int, Callable[[int], str]]]:
+    """Open a PDF, yielding its page count and a function extracting one page's text"""
+    if HAS_PDFIUM:
+        document = pdfium.PdfDocument(stream)
+
+        def page_text(index: int) -> str:
+            page = document[index]
+            textpage = page.get_textpage()
+            try:
+                return textpage.get_text_range()
+            finally:
+                textpage.close()
+                page.close()
+
+        try:
+            yield len(document), page_text
+        finally:
+            document.close()
+        return
+
+    import PyPDF2
+
+    reader = PyPDF2.PdfReader(stream)
+    yield len(reader.pages), lambda index: reader.pages[index].extract_text() or ""
+
+def _extract_page_range(data: bytes, start: int, stop: int) -> List[str]:
+    """Process pool task: extract the text of pages [start, stop)"""
+    with _open(io.BytesIO(data)) as (_, page_text):
+        return [page_text(index) for index in range(start, stop)]
+
+def _get_pool(workers: int) -> ProcessPoolExecutor:
+    """
+    Return the process-wide extraction pool, started on first use.
+
+    Workers are spawned rather than forked: the parent runs other threads (the HTTP event
+    loop, index flush timers, model runtimes) whose locks a forked child could inherit held.
+
+    Args:
+        workers: Number of extraction processes
+
+    Returns:
+        A pool of that many workers
+    """
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is None or _pool_workers != workers:
+            if _pool is not None:
+                _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+            _pool_workers = workers
+        return _pool
+
+def _discard_pool(pool: ProcessPoolExecutor):
+    """Drop a pool whose worker died so the next call starts a fresh one"""
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+@atexit.register
+def _shutdown_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+def extract_pdf_text(source: PdfSource, max_chars: Optional[int] = None, workers: int = 0,
+                     parallel_min_pages: int = 32, pages_per_task: int = 8) -> str:
+    """
+    Extract the text of a PDF straight from memory, stopping once max_chars is reached.
+
+    Each page is extracted once. pypdfium2 is used when installed, PyPDF2 otherwise.
+    Documents of at least parallel_min_pages pages are split into page ranges that are
+    extracted in a long-lived process pool of the given number of workers.
+
+    Args:
+        source: PDF bytes or a seekable binary file object (e.g. an uploaded file)
+        max_chars: Character budget, or None for the whole document
+        workers: Extraction processes for long documents; 0 or 1 extracts in-process
+        parallel_min_pages: Page count from which the process pool is used
+        pages_per_task: Pages handed to a worker at a time
+
+    Returns:
+        Page texts joined by spaces, truncated to max_chars
+    """
+    stream = _as_stream(source)
+    texts: List[str] = []
+    total = 0
+
+    def collect(text: str) -> bool:
+        """Keep a page's text; True once the budget is spent"""
+        nonlocal total
+        text = text.strip()
+        if text:
+            texts.append(text)
+            total += len(text) + 1
+        return max_chars is not None and total >= max_chars
+
+    with _open(stream) as (page_count, page_text):
+        parallel = workers > 1 and page_count >= parallel_min_pages
+        if not parallel:
+            for index in range(page_count):
+                if collect(page_text(index)):
+                    break
+
+    if parallel:
+        if isinstance(stream, io.BytesIO):
+            data = stream.getvalue()
+        else:
+            # Opening the document moved the file position
+            stream.seek(0)
+            data = stream.read()
+        ranges = [(start, min(start + pages_per_task, page_count)) for start in range(0, page_count, pages_per_task)]
+        executor = _get_pool(workers)
+        # Keep a bounded window of ranges in flight and consume them in page order
+        window = 2 * workers
+        futures = deque()
+        try:
+            futures.extend(executor.submit(_extract_page_range, data, *page_range) for page_range in ranges[:window])
+            submitted = len(futures)
+            while futures:
+                if any(collect(text) for text in futures.popleft().result()):
+                    break
+                if submitted < len(ranges):
+                    futures.append(executor.submit(_extract_page_range, data, *ranges[submitted]))
+                    submitted += 1
+        except BrokenProcessPool:
+            _discard_pool(executor)
+            raise
+        finally:
+            # The pool outlives this call, so stop whatever this document still has queued
+            for pending in futures:
+                pending.cancel()
+
+    text = " ".join(texts)
+    return text[:max_chars] if max_chars is not None else text
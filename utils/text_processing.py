@@ -46,4 +46,16 @@ def clean_text(text: str) -> str:
     """
     # Remove extra whitespace
     text = re.sub(r'\s+', ' ', text).strip()
-    return text
\ No newline at end of file
+    return text
+
+def normalize_text(text: str) -> str:
+    """
+    Normalize text for use in cache keys and deduplication.
+    
+    Args:
+        text: Input text to normalize
+        
+    Returns:
+        Lowercased text with collapsed whitespace and no surrounding punctuation
+    """
+    return clean_text(text).lower().strip(" .!?;:,\"'")
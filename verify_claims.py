@@ -0,0 +1,131 @@
+"""
+Batch fact-checking of health claims with MedClarify.
+
+Reads claims from a CSV file (a "claim" column, or the first column with --no-header),
+a JSONL file (objects with a "claim" field, or plain strings) or a text file with one claim per
+line, verifies them concurrently and writes one JSON result per line as soon as each
+claim is done. Results carry the claim's input position, since they complete out of
+order.
+
+Usage:
+    python verify_claims.py CLAIMS [--output RESULTS.jsonl] [--column NAME | --no-header] [--top-k N]
+"""
+
+import sys
+import csv
+import json
+import time
+import logging
+import argparse
+from typing import Dict, Iterator
+from config.settings import Config
+from services.registry import get_registry
+from utils.logging_setup import setup_logger, get_default_log_path
+
+logger = logging.getLogger(__name__)
+
+def csv_column(path: str, column: str) -> int:
+    """Position of the claim column in a CSV header, raising ValueError if it is missing"""
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        header = next(csv.reader(f), [])
+    if column not in header:
+        raise ValueError(f"{path} has no {column!r} column (header: {', '.join(header)}); "
+                         f"pass --column, or --no-header to read the first column of every row")
+    return header.index(column)
+
+def read_claims(path: str, column: str = "claim", header: bool = True) -> Iterator[str]:
+    """Stream claim texts from a CSV (with a header row unless header is False), JSONL or plain text file"""
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        if path.endswith(".csv"):
+            index = csv_column(path, column) if header else 0
+            reader = csv.reader(f)
+            if header:
+                next(reader, None)
+            for row in reader:
+                if len(row) > index and row[index].strip():
+                    yield row[index].strip()
+        elif path.endswith((".jsonl", ".ndjson")):
+            for line_number, line in enumerate(f, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    logger.warning(f"Skipping malformed JSON on line {line_number} of {path}")
+                    continue
+                claim = record.get(column) if isinstance(record, dict) else record
+                if claim is None or isinstance(claim, (dict, list)):
+                    logger.warning(f"Skipping line {line_number} of {path}: no text in {column!r}")
+                    continue
+                claim = str(claim).strip()
+                if claim:
+                    yield claim
+        else:
+            for line in f:
+                if line.strip():
+                    yield line.strip()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("claims", help="CSV, JSONL or text file of claims")
+    parser.add_argument("--output", help="JSONL results file (default: stdout)")
+    parser.add_argument("--column", default="claim", help="CSV column or JSON field holding the claim")
+    parser.add_argument("--no-header", action="store_true", help="CSV has no header row, claims are in the first column")
+    parser.add_argument("--top-k", type=int, default=5)
+    args = parser.parse_args()
+    if args.claims.endswith(".csv") and not args.no_header:
+        try:
+            csv_column(args.claims, args.column)
+        except ValueError as e:
+            sys.exit(str(e))
+
+    setup_logger("services", level=logging.INFO, log_file=get_default_log_path())
+    if not Config.validate_config():
+        sys.exit("Missing API keys, check HF_TOKEN, SERPAPI_KEY and (for Pinecone) PINECONE_API_KEY")
+    assistant = get_registry().get("assistant")
+
+    # Remember each claim's text until its result comes back
+    in_flight: Dict[int, str] = {}
+
+    def tracked_claims() -> Iterator[str]:
+        for position, claim in enumerate(read_claims(args.claims, args.column, header=not args.no_header)):
+            in_flight[position] = claim
+            yield claim
+
+    output = open(args.output, "a", encoding="utf-8") if args.output else sys.stdout
+    started = time.perf_counter()
+    done = 0
+    try:
+        for position, (response, results, new_content_added) in assistant.verify_claims(tracked_claims(), top_k=args.top_k):
+            output.write(json.dumps({
+                "position": position,
+                "claim": in_flight.pop(position, ""),
+                "verdict": response,
+                "evidence": [
+                    {
+                        "id": result.get("id"),
+                        "claim": result.get("claim", ""),
+                        "evidence_level": result.get("evidence_level", ""),
+                        "relevance_score": result.get("relevance_score"),
+                        "sources": result.get("sources", [])
+                    }
+                    for result in results
+                ],
+                "new_content_added": bool(new_content_added)
+            }) + "\n")
+            output.flush()
+
+            done += 1
+            if done % 100 == 0:
+                elapsed = time.perf_counter() - started
+                print(f"{done} claims verified ({done / max(elapsed, 1e-9):.1f} claims/s)", file=sys.stderr)
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+    elapsed = time.perf_counter() - started
+    print(f"Verified {done} claims in {elapsed:.1f}s ({done / max(elapsed, 1e-9):.1f} claims/s)", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()